@@ -0,0 +1,237 @@
+"""
+Generates IOS-XE CLI outputs of a given size for the benchmarks.
+Not intended to be used as a standalone script.
+
+Every generator repeats blocks recorded from a Catalyst 8000v with varying
+names and addresses until the output reaches the requested number of lines.
+"""
+
+import ipaddress
+
+SHOW_INTERFACES_BLOCK = """\
+GigabitEthernet{index} is {status}, line protocol is {status}
+  Hardware is vNIC, address is 5254.00{a:02x}.{b:02x}{c:02x} (bia 5254.00{a:02x}.{b:02x}{c:02x})
+  Description: link-{index}
+  Internet address is {address}/30
+  MTU 1500 bytes, BW 1000000 Kbit/sec, DLY 10 usec,
+     reliability 255/255, txload 1/255, rxload 1/255
+  Encapsulation ARPA, loopback not set
+  Keepalive set (10 sec)
+  Full Duplex, 1000Mbps, link type is auto, media type is Virtual
+  output flow-control is unsupported, input flow-control is unsupported
+  ARP type: ARPA, ARP Timeout 04:00:00
+  Last input 00:00:01, output 00:00:01, output hang never
+  Last clearing of "show interface" counters never
+  Input queue: 0/375/0/0 (size/max/drops/flushes); Total output drops: 0
+  Queueing strategy: fifo
+  Output queue: 0/40 (size/max)
+  5 minute input rate 2000 bits/sec, 3 packets/sec
+  5 minute output rate 1000 bits/sec, 1 packets/sec
+     123456 packets input, 9876543 bytes, 0 no buffer
+     Received 12 broadcasts (0 IP multicasts)
+     0 runts, 0 giants, 0 throttles
+     0 input errors, 0 CRC, 0 frame, 0 overrun, 0 ignored
+     0 watchdog, 0 multicast, 0 pause input
+     65432 packets output, 5432100 bytes, 0 underruns
+     Output 3 broadcasts (0 IP multicasts)
+     0 output errors, 0 collisions, 1 interface resets
+     0 unknown protocol drops
+     0 babbles, 0 late collision, 0 deferred
+     0 lost carrier, 0 no carrier, 0 pause output
+     0 output buffer failures, 0 output buffers swapped out
+"""
+
+SHOW_IP_ROUTE_HEADER = """\
+Codes: L - local, C - connected, S - static, R - RIP, M - mobile, B - BGP
+       D - EIGRP, EX - EIGRP external, O - OSPF, IA - OSPF inter area
+       N1 - OSPF NSSA external type 1, N2 - OSPF NSSA external type 2
+       E1 - OSPF external type 1, E2 - OSPF external type 2, m - OMP
+       n - NAT, Ni - NAT inside, No - NAT outside, Nd - NAT DIA
+       i - IS-IS, su - IS-IS summary, L1 - IS-IS level-1, L2 - IS-IS level-2
+       ia - IS-IS inter area, * - candidate default, U - per-user static route
+       H - NHRP, G - NHRP registered, g - NHRP registration summary
+       o - ODR, P - periodic downloaded static route, l - LISP
+       a - application route
+       + - replicated route, % - next hop override, p - overrides from PfR
+       & - replicated local route overrides by connected
+
+Gateway of last resort is 192.168.255.1 to network 0.0.0.0
+
+S*    0.0.0.0/0 [1/0] via 192.168.255.1
+"""
+
+SHOW_LOGGING_HEADER = """\
+Syslog logging: enabled (0 messages dropped, 3 messages rate-limited, 0 flushes, 0 overruns, xml disabled, filtering disabled)
+
+No Active Message Discriminator.
+
+No Inactive Message Discriminator.
+
+    Console logging: disabled
+    Monitor logging: level debugging, 0 messages logged, xml disabled,
+                     filtering disabled
+    Buffer logging:  level debugging, {count} messages logged, xml disabled,
+                    filtering disabled
+    Exception Logging: size (4096 bytes)
+    Count and timestamp logging messages: disabled
+    Persistent logging: disabled
+
+No active filter modules.
+
+    Trap logging: level informational, 119 message lines logged
+        Logging Source-Interface:       VRF Name:
+
+Log Buffer (102400 bytes):
+
+"""
+
+SHOW_LOGGING_MESSAGES = (
+    "%LINK-3-UPDOWN: Interface GigabitEthernet{index}, changed state to down",
+    "%LINEPROTO-5-UPDOWN: Line protocol on Interface GigabitEthernet{index}, changed state to up",
+    "%CLNS-5-ADJCHANGE: ISIS: Adjacency to R{index} (GigabitEthernet{index}) Up, new adjacency",
+    "%SYS-5-CONFIG_I: Configured from console by admin on vty0 (10.0.0.{octet})",
+    "%SEC_LOGIN-5-LOGIN_SUCCESS: Login Success [user: admin] [Source: 10.0.0.{octet}] [localport: 22]",
+    "%DMI-5-SYNC_NEEDED: Configuration change requiring running configuration sync detected",
+    "%SYS-2-MALLOCFAIL: Memory allocation of 65536 bytes failed, pool Processor, Traceback= 1A2B3C",
+    "%PLATFORM-4-ELEMENT_WARNING: R0/0: smand: RP/0: Used Memory value 91% exceeds warning level 88%",
+)
+
+SHOW_ISIS_NEIGHBORS_HEADER = """\
+
+Tag core:
+System Id       Type Interface     IP Address      State Holdtime Circuit Id
+"""
+
+SHOW_IP_PROTOCOLS_HEADER = """\
+*** IP Routing is NSF aware ***
+
+Routing Protocol is "application"
+  Sending updates every 0 seconds
+  Invalid after 0 seconds, hold down 0, flushed after 0
+  Outgoing update filter list for all interfaces is not set
+  Incoming update filter list for all interfaces is not set
+  Maximum path: 32
+  Routing for Networks:
+  Routing Information Sources:
+    Gateway         Distance      Last Update
+  Distance: (default is 4)
+
+Routing Protocol is "isis"
+  Outgoing update filter list for all interfaces is not set
+  Incoming update filter list for all interfaces is not set
+  Redistributing: isis
+  Address Summarization:
+    None
+  Maximum path: 4
+  Routing for Networks:
+"""
+
+SHOW_IP_PROTOCOLS_FOOTER = """\
+  Routing Information Sources:
+    Gateway         Distance      Last Update
+    10.255.0.2           115      00:10:27
+  Distance: (default is 115)
+"""
+
+
+def show_interfaces(lines: int) -> str:
+    """
+    Returns "show interfaces" output of about the given number of lines.
+    """
+    block_lines = SHOW_INTERFACES_BLOCK.count("\n")
+    blocks = []
+    for index in range(1, max(1, round(lines / block_lines)) + 1):
+        blocks.append(
+            SHOW_INTERFACES_BLOCK.format(
+                index=index,
+                status="up" if index % 7 else "down",
+                a=(index >> 16) & 0xFF,
+                b=(index >> 8) & 0xFF,
+                c=index & 0xFF,
+                address=_address(index * 4 + 1),
+            )
+        )
+    return "".join(blocks)
+
+
+def show_ip_route(lines: int) -> str:
+    """
+    Returns "show ip route" output of about the given number of lines.
+    """
+    output = [SHOW_IP_ROUTE_HEADER]
+    routes = max(1, lines - SHOW_IP_ROUTE_HEADER.count("\n"))
+    for index in range(routes):
+        network = _address(index * 256)
+        if index % 10 == 0:
+            output.append(
+                f"C        {network}/24 is directly connected, GigabitEthernet{index % 8 + 1}\n"
+            )
+        elif index % 10 == 1:
+            output.append(
+                f"L        {_address(index * 256 + 1)}/32 is directly connected, GigabitEthernet{index % 8 + 1}\n"
+            )
+        else:
+            output.append(
+                f"i L2     {network}/24 [115/{20 + index % 50}] via 10.255.{index % 4}.2, "
+                f"1d02h, GigabitEthernet{index % 4 + 1}\n"
+            )
+    return "".join(output)
+
+
+def show_logging(lines: int) -> str:
+    """
+    Returns "show logging" output of about the given number of lines.
+    """
+    header = SHOW_LOGGING_HEADER.format(count=lines)
+    messages = max(1, lines - header.count("\n"))
+    output = [header]
+    for index in range(messages):
+        seconds = index % 60
+        minutes = (index // 60) % 60
+        hours = (index // 3600) % 24
+        message = SHOW_LOGGING_MESSAGES[index % len(SHOW_LOGGING_MESSAGES)]
+        output.append(
+            f"*Oct 18 {hours:02d}:{minutes:02d}:{seconds:02d}.{index % 1000:03d}: "
+            + message.format(index=index % 48 + 1, octet=index % 250 + 1)
+            + "\n"
+        )
+    return "".join(output)
+
+
+def show_isis_neighbors(lines: int) -> str:
+    """
+    Returns "show isis neighbors" output of about the given number of lines.
+    """
+    output = [SHOW_ISIS_NEIGHBORS_HEADER]
+    neighbors = max(1, lines - SHOW_ISIS_NEIGHBORS_HEADER.count("\n"))
+    for index in range(1, neighbors + 1):
+        output.append(
+            f"R{index:<14} L2   Gi{index:<11} {_address(index * 4 + 2):<15} UP    {20 + index % 10:<8} R{index}.01\n"
+        )
+    return "".join(output)
+
+
+def show_ip_protocols(lines: int) -> str:
+    """
+    Returns "show ip protocols" output of about the given number of lines.
+    """
+    fixed = SHOW_IP_PROTOCOLS_HEADER.count("\n") + SHOW_IP_PROTOCOLS_FOOTER.count("\n")
+    interfaces = max(1, lines - fixed)
+    output = [SHOW_IP_PROTOCOLS_HEADER]
+    for index in range(1, interfaces + 1):
+        output.append(f"    GigabitEthernet{index}\n")
+    output.append(SHOW_IP_PROTOCOLS_FOOTER)
+    return "".join(output)
+
+
+CLI_OUTPUTS = {
+    "show interfaces": show_interfaces,
+    "show ip route": show_ip_route,
+    "show logging": show_logging,
+    "show isis neighbors": show_isis_neighbors,
+    "show ip protocols": show_ip_protocols,
+}
+
+
+def _address(index: int) -> str:
+    return str(ipaddress.IPv4Address(0x0A000000 + index % 0x00FFFFFF))
@@ -0,0 +1,307 @@
+"""
+Offline micro-benchmarks of the parse and transform hot paths.
+
+No device is needed: CLI outputs are generated at several sizes and parsed
+with Genie against an unconnected device. Results are written as JSON and can
+be compared with a previous run to catch regressions.
+
+Run from the root directory of the project:
+    python benchmarks/run.py --output bench_results.json
+    python benchmarks/run.py --sizes 10,1000 --compare bench_results.json
+"""
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import setup as setup
+
+from pyats.topology import loader
+from pydantic import TypeAdapter
+from starlette.responses import JSONResponse
+
+from cli_outputs import CLI_OUTPUTS
+from pyats_connector.api.isis import _extract_isis_interfaces
+from pyats_connector.log_collector import LogCollector
+from pyats_connector.route_index import RouteTable
+from config.global_settings import LOG_COLLECTOR_INDEXED_KEYWORDS
+from utils.fast_json import dumps
+from utils.streaming import iter_json, chunked
+from utils.text_utils import json_default
+
+DEFAULT_SIZES = [10, 100, 1000, 10000, 100000]
+ROUTE_LOOKUPS = 1000
+# What FastAPI runs on a result returned for response_model=Dict.
+RESPONSE_MODEL = TypeAdapter(Dict)
+
+
+def bench_device():
+    """
+    Returns an unconnected IOS-XE device, enough to run Genie parsers on given output.
+    """
+    testbed = loader.load(
+        {
+            "devices": {
+                "bench": {
+                    "os": "iosxe",
+                    "type": "router",
+                    "connections": {"cli": {"protocol": "ssh", "ip": "127.0.0.1"}},
+                }
+            }
+        }
+    )
+    return testbed.devices["bench"]
+
+
+def measure(
+    func: Callable[[], object], min_runs: int, min_time: float, max_runs: int
+) -> List[float]:
+    """
+    Runs func at least min_runs times and until min_time seconds are spent.
+    """
+    timings = []
+    spent = 0.0
+    while len(timings) < max_runs and (len(timings) < min_runs or spent < min_time):
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        timings.append(elapsed)
+        spent += elapsed
+    return timings
+
+
+def cases(device, sizes: List[int]):
+    """
+    Yields (benchmark, case, lines, func) for every benchmark and size.
+
+    Inputs are prepared here, outside of the timed function.
+    """
+    for size in sizes:
+        outputs = {command: generate(size) for command, generate in CLI_OUTPUTS.items()}
+        parsed = {}
+        for command, output in outputs.items():
+            lines = output.count("\n")
+            parsed[command] = device.parse(command, output=output)
+            yield "genie_parse", command, lines, (
+                lambda c=command, o=output: device.parse(c, output=o)
+            )
+
+        protocols = parsed["show ip protocols"]
+        yield "extract_isis_interfaces", "show ip protocols", outputs[
+            "show ip protocols"
+        ].count("\n"), lambda p=protocols: _extract_isis_interfaces(data=p)
+
+        logging_output = outputs["show logging"]
+        logging_lines = logging_output.count("\n")
+        yield "log_collector_index", "show logging", logging_lines, (
+            lambda o=logging_output, n=logging_lines: _collect_logs(o, n)
+        )
+        collector = _collect_logs(logging_output, logging_lines)
+        yield "health_keyword_search", "show logging", logging_lines, (
+            lambda c=collector: c.search("bench", LOG_COLLECTOR_INDEXED_KEYWORDS)
+        )
+        yield "health_keyword_scan", "show logging", logging_lines, (
+            lambda o=logging_output: [
+                line
+                for line in o.splitlines()
+                if any(
+                    k.lower() in line.lower() for k in LOG_COLLECTOR_INDEXED_KEYWORDS
+                )
+            ]
+        )
+
+        routes = parsed["show ip route"]["vrf"]["default"]["address_family"]["ipv4"][
+            "routes"
+        ]
+        route_lines = outputs["show ip route"].count("\n")
+        yield "route_table_build", "show ip route", route_lines, (
+            lambda r=routes: RouteTable(r)
+        )
+        table = RouteTable(routes)
+        addresses = [
+            prefix.split("/")[0] for prefix in list(routes)[:ROUTE_LOOKUPS]
+        ]
+        yield "route_lookup_x1000", "show ip route", route_lines, (
+            lambda t=table, a=addresses: [t.lookup(ip) for ip in a]
+        )
+
+        for command, result in parsed.items():
+            lines = outputs[command].count("\n")
+            yield "json_dumps", command, lines, (
+                lambda r=result: json.dumps(r, default=json_default)
+            )
+            yield "json_stream", command, lines, (
+                lambda r=result: sum(len(c) for c in chunked(iter_json(r, depth=2)))
+            )
+            yield "response_validated", command, lines, (
+                lambda r=result: _validated_response(r)
+            )
+            yield "response_fast", command, lines, lambda r=result: dumps(r)
+
+
+def _validated_response(result: dict) -> bytes:
+    # Validation, conversion to JSON types, then the standard JSONResponse encoding.
+    value = RESPONSE_MODEL.validate_python(result)
+    return JSONResponse(RESPONSE_MODEL.dump_python(value, mode="json")).body
+
+
+def _collect_logs(output: str, lines: int) -> LogCollector:
+    collector = LogCollector(
+        execute=lambda device_name, command: output,
+        max_lines=lines + 1,
+        min_refresh_interval=0,
+    )
+    collector.refresh("bench")
+    return collector
+
+
+def run(
+    sizes: List[int],
+    min_runs: int,
+    min_time: float,
+    max_runs: int,
+    only: Optional[str],
+) -> List[dict]:
+    """
+    Runs the benchmarks and returns one result per benchmark, case and size.
+    """
+    device = bench_device()
+    results = []
+    for benchmark, case, lines, func in cases(device, sizes):
+        if only and only not in benchmark:
+            continue
+        timings = measure(func, min_runs, min_time, max_runs)
+        median = statistics.median(timings)
+        result = {
+            "benchmark": benchmark,
+            "case": case,
+            "lines": lines,
+            "runs": len(timings),
+            "min_sec": min(timings),
+            "median_sec": median,
+            "mean_sec": statistics.fmean(timings),
+            "max_sec": max(timings),
+            "lines_per_sec": lines / median if median else None,
+        }
+        results.append(result)
+        print(
+            f"{benchmark:<24} {case:<20} {lines:>7} lines  median {median * 1000:10.3f} ms",
+            file=sys.stderr,
+        )
+    return results
+
+
+def compare(results: List[dict], baseline: List[dict], threshold: float) -> List[dict]:
+    """
+    Returns the results slower than the baseline median by more than threshold.
+    """
+    previous = {
+        (r["benchmark"], r["case"], r["lines"]): r["median_sec"] for r in baseline
+    }
+    regressions = []
+    for result in results:
+        key = (result["benchmark"], result["case"], result["lines"])
+        if key not in previous or not previous[key]:
+            continue
+        ratio = result["median_sec"] / previous[key]
+        if ratio > 1 + threshold:
+            regressions.append(
+                {
+                    "benchmark": key[0],
+                    "case": key[1],
+                    "lines": key[2],
+                    "baseline_median_sec": previous[key],
+                    "median_sec": result["median_sec"],
+                    "ratio": round(ratio, 3),
+                }
+            )
+    return regressions
+
+
+def metadata() -> Dict[str, str]:
+    """
+    Returns information identifying the run.
+    """
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    try:
+        from importlib.metadata import version
+
+        genie_version = version("genie")
+    except Exception:
+        genie_version = None
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "genie": genie_version,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(s) for s in DEFAULT_SIZES),
+        help="Comma separated CLI output sizes, in lines.",
+    )
+    parser.add_argument("--min-runs", type=int, default=1)
+    parser.add_argument("--max-runs", type=int, default=100)
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=0.5,
+        help="Cases are repeated until this many seconds are spent, up to max-runs.",
+    )
+    parser.add_argument("--only", help="Only run benchmarks containing this name.")
+    parser.add_argument("--output", help="File to write the JSON results to. Defaults to stdout.")
+    parser.add_argument("--compare", help="Previous results file to compare with.")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.25,
+        help="Slowdown ratio over the baseline reported as a regression.",
+    )
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    results = run(sizes, args.min_runs, args.min_time, args.max_runs, args.only)
+    report = {"meta": metadata(), "results": results}
+
+    exit_code = 0
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        report["regressions"] = compare(results, baseline, args.threshold)
+        for regression in report["regressions"]:
+            print(
+                "REGRESSION {benchmark} {case} {lines} lines: x{ratio}".format(**regression),
+                file=sys.stderr,
+            )
+        exit_code = 1 if report["regressions"] else 0
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
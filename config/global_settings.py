@@ -1,11 +1,348 @@
 """
 This module is responsible for loading global settings for the application.
 
-It imports necessary modules and functions, 
-defines a function for retrieving environment variables, 
+It imports necessary modules and functions,
+defines a function for retrieving environment variables,
 and sets several global variables.
 
 
 """
 
+import os
+
+
+def get_env_variable(name: str, default, cast=str):
+    """
+    Retrieves an environment variable, falling back to a default value.
+
+    Args:
+      name (str): The name of the environment variable.
+      default: The value returned when the variable is not set.
+      cast (callable, optional): Function used to convert the raw string. Defaults to str.
+
+    Returns:
+      The converted value of the environment variable or the default.
+    """
+    value = os.getenv(name)
+    if value is None or value == "":
+        return default
+    if cast is bool:
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return cast(value)
+
+
 TESTBED_FILE = "config/pyats_testbed.yaml"
+
+# Connection pool: warm device sessions reused between requests.
+CONNECTION_POOL_ENABLED = get_env_variable(
+    "CONNECTION_POOL_ENABLED", True, bool
+)
+CONNECTION_POOL_MAX_SESSIONS_PER_DEVICE = get_env_variable(
+    "CONNECTION_POOL_MAX_SESSIONS_PER_DEVICE", 2, int
+)
+# Seconds a session can stay idle in the pool before it is disconnected.
+CONNECTION_POOL_IDLE_TIMEOUT = get_env_variable(
+    "CONNECTION_POOL_IDLE_TIMEOUT", 300.0, float
+)
+# Seconds a request waits for a free session before giving up.
+CONNECTION_POOL_ACQUIRE_TIMEOUT = get_env_variable(
+    "CONNECTION_POOL_ACQUIRE_TIMEOUT", 60.0, float
+)
+# Sessions idle for longer than this are probed with an empty command before reuse.
+CONNECTION_POOL_PROBE_AFTER = get_env_variable(
+    "CONNECTION_POOL_PROBE_AFTER", 30.0, float
+)
+CONNECTION_POOL_EVICTION_INTERVAL = get_env_variable(
+    "CONNECTION_POOL_EVICTION_INTERVAL", 30.0, float
+)
+
+# Scheduler running blocking device calls on a dedicated worker pool.
+SCHEDULER_MAX_WORKERS = get_env_variable("SCHEDULER_MAX_WORKERS", 32, int)
+# Calls running at the same time per device. Matches the pooled sessions by default, use 1 to serialize.
+SCHEDULER_PER_DEVICE_CONCURRENCY = get_env_variable(
+    "SCHEDULER_PER_DEVICE_CONCURRENCY", CONNECTION_POOL_MAX_SESSIONS_PER_DEVICE, int
+)
+# Calls waiting for a worker, per device and in total, beyond which new calls are rejected with 429. 0 is unbounded.
+SCHEDULER_MAX_QUEUE_PER_DEVICE = get_env_variable("SCHEDULER_MAX_QUEUE_PER_DEVICE", 50, int)
+SCHEDULER_MAX_QUEUE = get_env_variable("SCHEDULER_MAX_QUEUE", 1000, int)
+# Seconds a call may wait for a worker before it is rejected with 429. 0 waits indefinitely.
+SCHEDULER_MAX_QUEUE_WAIT = get_env_variable("SCHEDULER_MAX_QUEUE_WAIT", 30.0, float)
+
+# Load shedding: when the event loop lags or the scheduler queues grow, requests to unprotected endpoints get 429.
+LOAD_SHED_ENABLED = get_env_variable("LOAD_SHED_ENABLED", True, bool)
+# Seconds of event loop lag from which requests are shed.
+LOAD_SHED_MAX_LOOP_LAG = get_env_variable("LOAD_SHED_MAX_LOOP_LAG", 0.25, float)
+# Calls waiting in the scheduler from which requests are shed.
+LOAD_SHED_QUEUE_DEPTH = get_env_variable("LOAD_SHED_QUEUE_DEPTH", 200, int)
+# Seconds clients are asked to wait in the Retry-After header of shed requests.
+LOAD_SHED_RETRY_AFTER = get_env_variable("LOAD_SHED_RETRY_AFTER", 5, int)
+# Route paths, glob patterns allowed, that are never shed.
+LOAD_SHED_PROTECTED_ENDPOINTS = [
+    "/interfaces/status",
+    "/interfaces/status-and-description",
+    "/interface/detailed-status",
+    "/interface/admin-status",
+    "/isis/neighbors",
+    "/vrf/present",
+    "/routing/lookup",
+    "/health/*",
+    "/devices/list",
+    "/ready",
+    "/metrics",
+    "*/stats",
+    "/circuit-breakers",
+    "/docs",
+    "/openapi.json",
+]
+
+# Connection attempts per session, with exponential backoff and jitter between them.
+CONNECT_MAX_ATTEMPTS = get_env_variable("CONNECT_MAX_ATTEMPTS", 3, int)
+# Seconds before the first retry, doubled after each failed attempt up to CONNECT_BACKOFF_MAX.
+CONNECT_BACKOFF_BASE = get_env_variable("CONNECT_BACKOFF_BASE", 1.0, float)
+CONNECT_BACKOFF_MAX = get_env_variable("CONNECT_BACKOFF_MAX", 10.0, float)
+# Seconds unicon waits for the device during a connection attempt.
+CONNECT_TIMEOUT = get_env_variable("CONNECT_TIMEOUT", 10, int)
+# Consecutive failed connections after which requests to a device fail fast. 0 disables the circuit breaker.
+CIRCUIT_BREAKER_FAILURE_THRESHOLD = get_env_variable(
+    "CIRCUIT_BREAKER_FAILURE_THRESHOLD", 3, int
+)
+# Seconds requests to a failing device fail fast before a probe connection is let through.
+CIRCUIT_BREAKER_COOLDOWN = get_env_variable("CIRCUIT_BREAKER_COOLDOWN", 30.0, float)
+
+# Result cache for read-only device output, keyed by device, method or command and arguments.
+RESULT_CACHE_ENABLED = get_env_variable("RESULT_CACHE_ENABLED", True, bool)
+# Seconds a result is fresh, per pyATS API method or CLI command. Others are not cached.
+RESULT_CACHE_TTLS = {
+    "get_interfaces_status": 5.0,  # /interfaces/status
+    "show interfaces description": 5.0,  # /interfaces/status-and-description
+    "show isis neighbors": 10.0,  # /isis/neighbors
+    "get_vrf_vrfs": 60.0,  # /vrf/present
+}
+# Seconds after expiry during which the stale result is served while it is refreshed.
+RESULT_CACHE_STALE_WHILE_REVALIDATE = get_env_variable(
+    "RESULT_CACHE_STALE_WHILE_REVALIDATE", 30.0, float
+)
+RESULT_CACHE_MAX_ENTRIES = get_env_variable(
+    "RESULT_CACHE_MAX_ENTRIES", 1024, int
+)
+
+# Fleet-wide fan-out endpoints.
+FLEET_MAX_CONCURRENCY = get_env_variable("FLEET_MAX_CONCURRENCY", 20, int)
+FLEET_MAX_CONCURRENCY_PER_SITE = get_env_variable(
+    "FLEET_MAX_CONCURRENCY_PER_SITE", 5, int
+)
+# Seconds a single device may take before it is reported as timed out.
+FLEET_DEVICE_TIMEOUT = get_env_variable("FLEET_DEVICE_TIMEOUT", 120.0, float)
+# Key under the testbed device "custom" section holding the site name.
+FLEET_SITE_ATTRIBUTE = get_env_variable("FLEET_SITE_ATTRIBUTE", "site")
+
+# Asynchronous jobs for long-running device operations.
+JOB_WORKERS = get_env_variable("JOB_WORKERS", 4, int)
+JOB_QUEUE_MAX_SIZE = get_env_variable("JOB_QUEUE_MAX_SIZE", 100, int)
+# Seconds a single device may take within a job.
+JOB_DEVICE_TIMEOUT = get_env_variable("JOB_DEVICE_TIMEOUT", 1800.0, float)
+# Seconds a finished job and its results are kept.
+JOB_RETENTION = get_env_variable("JOB_RETENTION", 3600.0, float)
+
+# Background poller keeping a per-device snapshot of read-mostly data.
+POLLER_ENABLED = get_env_variable("POLLER_ENABLED", False, bool)
+# Comma separated device names or glob pattern to poll. Empty polls the whole inventory.
+POLLER_DEVICES = get_env_variable("POLLER_DEVICES", "")
+# Seconds between polls, per dataset.
+POLLER_INTERVALS = {
+    "interfaces_status": 30.0,
+    "interfaces_status_and_description": 60.0,
+    "isis_neighbors": 30.0,
+    "vrfs_present": 300.0,
+    "health_cpu": 60.0,
+    "health_memory": 60.0,
+}
+# Random variation applied to every interval, as a fraction of the interval.
+POLLER_JITTER = get_env_variable("POLLER_JITTER", 0.1, float)
+POLLER_MAX_CONCURRENCY = get_env_variable("POLLER_MAX_CONCURRENCY", 10, int)
+
+# Incremental collection of the device log buffer.
+LOG_COLLECTOR_MAX_LINES = get_env_variable("LOG_COLLECTOR_MAX_LINES", 20000, int)
+# Seconds during which queries reuse the last fetch instead of asking the device again.
+LOG_COLLECTOR_MIN_REFRESH_INTERVAL = get_env_variable(
+    "LOG_COLLECTOR_MIN_REFRESH_INTERVAL", 2.0, float
+)
+# Keywords indexed when lines are collected. Defaults of health_logging.
+LOG_COLLECTOR_INDEXED_KEYWORDS = [
+    "traceback",
+    "Traceback",
+    "TRACEBACK",
+    "rror",
+    "own",
+    "ADJCHANGE",
+]
+
+# Parsed routing tables kept in memory for filtering, paging and longest-prefix-match lookups.
+# Seconds a routing table is reused before it is pulled from the device again.
+ROUTE_INDEX_TTL = get_env_variable("ROUTE_INDEX_TTL", 60.0, float)
+# Routes held across all devices and VRFs. Least recently used tables are dropped beyond it.
+ROUTE_INDEX_MAX_ROUTES = get_env_variable("ROUTE_INDEX_MAX_ROUTES", 2000000, int)
+# Routes per page when a cursor is given without a limit.
+ROUTES_PAGE_DEFAULT_SIZE = get_env_variable("ROUTES_PAGE_DEFAULT_SIZE", 1000, int)
+ROUTES_PAGE_MAX_SIZE = get_env_variable("ROUTES_PAGE_MAX_SIZE", 10000, int)
+
+# Named compact views of large responses, selected with ?view=, per API function.
+# Selectors use the syntax of ?fields=, described in utils/projection.py.
+INTERFACE_COMPACT_FIELDS = [
+    "enabled",
+    "line_protocol",
+    "oper_status",
+    "description",
+    "ipv4",
+    "mtu",
+    "bandwidth",
+    "port_speed",
+    "duplex_mode",
+]
+INTERFACE_ERROR_FIELDS = [
+    "oper_status",
+    "counters.in_errors",
+    "counters.in_crc_errors",
+    "counters.out_errors",
+    "counters.rate",
+]
+ROUTE_COMPACT_FIELDS = [
+    "source_protocol",
+    "next_hop.next_hop_list.*.next_hop",
+    "next_hop.next_hop_list.*.outgoing_interface",
+    "next_hop.outgoing_interface",
+]
+RESPONSE_VIEWS = {
+    "interfaces_status": {
+        "up": ["[?(@ == 'up')]"],
+        "not_up": ["[?(@ != 'up')]"],
+    },
+    "interface_detailed_status": {
+        "compact": INTERFACE_COMPACT_FIELDS,
+        "errors": INTERFACE_ERROR_FIELDS,
+    },
+    "interfaces_information": {
+        "compact": [f"*.{field}" for field in INTERFACE_COMPACT_FIELDS],
+        "errors": [f"*.{field}" for field in INTERFACE_ERROR_FIELDS],
+    },
+    # Unpaged routes are keyed by prefix, paged ones are under "routes".
+    "route_entries": {
+        "compact": [f"*.{field}" for field in ROUTE_COMPACT_FIELDS]
+        + [f"routes.*.{field}" for field in ROUTE_COMPACT_FIELDS]
+        + ["next_cursor", "error"],
+    },
+    "health_cpu": {
+        "total": ["health_data[?(@.process == 'ALL_PROCESSES')]", "message"],
+    },
+}
+
+# Characters sent per chunk by streamed responses (stream=ndjson|json).
+STREAMING_CHUNK_SIZE = get_env_variable("STREAMING_CHUNK_SIZE", 65536, int)
+
+# Interface change feed. Seconds between polls per dataset, shared by every subscriber of a device.
+CHANGE_FEED_INTERVALS = {
+    "interfaces_status": get_env_variable("CHANGE_FEED_STATUS_INTERVAL", 5.0, float),
+    "interfaces_status_and_description": get_env_variable(
+        "CHANGE_FEED_DESCRIPTION_INTERVAL", 30.0, float
+    ),
+}
+# Events buffered per subscriber. The oldest are dropped for slow subscribers.
+CHANGE_FEED_QUEUE_SIZE = get_env_variable("CHANGE_FEED_QUEUE_SIZE", 1000, int)
+# Recent events kept to replay to clients reconnecting with Last-Event-ID.
+CHANGE_FEED_HISTORY = get_env_variable("CHANGE_FEED_HISTORY", 1000, int)
+# Seconds between keep-alive comments on idle event streams.
+CHANGE_FEED_KEEPALIVE = get_env_variable("CHANGE_FEED_KEEPALIVE", 15.0, float)
+
+# Upper bounds in seconds of the /metrics latency histogram buckets.
+METRICS_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0,
+)
+# Distinct command templates labelled in /metrics; further commands are labelled "other".
+METRICS_MAX_COMMANDS = get_env_variable("METRICS_MAX_COMMANDS", 100, int)
+
+# Device driver: live, record (live and save outputs to the corpus) or replay (serve outputs from the corpus).
+DEVICE_DRIVER_MODE = get_env_variable("DEVICE_DRIVER_MODE", "live").strip().lower()
+DEVICE_CORPUS_DIR = get_env_variable("DEVICE_CORPUS_DIR", "corpus")
+# Seconds a replayed command takes when the corpus has no latency recorded for it.
+REPLAY_DEFAULT_LATENCY = get_env_variable("REPLAY_DEFAULT_LATENCY", 0.05, float)
+# Seconds a replayed command takes, per CLI command, overriding the recorded latency.
+REPLAY_LATENCIES = {}
+# Multiplier of every replayed latency. 0 serves outputs without delay.
+REPLAY_LATENCY_SCALE = get_env_variable("REPLAY_LATENCY_SCALE", 1.0, float)
+# Random variation applied to every replayed latency, as a fraction of the latency.
+REPLAY_JITTER = get_env_variable("REPLAY_JITTER", 0.2, float)
+# Seconds a replayed session takes to open.
+REPLAY_CONNECT_LATENCY = get_env_variable("REPLAY_CONNECT_LATENCY", 2.0, float)
+
+# Raw CLI output store shared by the parsers.
+# Seconds a capture is reused by other parsers and endpoints needing the same command.
+RAW_OUTPUT_MAX_AGE = get_env_variable("RAW_OUTPUT_MAX_AGE", 2.0, float)
+# Captures kept per device and command, for /raw/reparse.
+RAW_OUTPUT_HISTORY = get_env_variable("RAW_OUTPUT_HISTORY", 3, int)
+# Characters of raw output kept across all devices. Least recently used commands are dropped beyond it.
+RAW_OUTPUT_MAX_BYTES = get_env_variable("RAW_OUTPUT_MAX_BYTES", 64 * 1024 * 1024, int)
+
+# Worker processes parsing large CLI outputs, so parsing does not hold the GIL of the server process.
+PARSE_POOL_ENABLED = get_env_variable("PARSE_POOL_ENABLED", False, bool)
+PARSE_POOL_WORKERS = get_env_variable(
+    "PARSE_POOL_WORKERS", min(4, os.cpu_count() or 1), int
+)
+# Outputs shorter than this, in characters, are parsed in the calling thread.
+PARSE_POOL_MIN_OUTPUT_SIZE = get_env_variable("PARSE_POOL_MIN_OUTPUT_SIZE", 50000, int)
+# Seconds a single parse may take in a worker.
+PARSE_POOL_TIMEOUT = get_env_variable("PARSE_POOL_TIMEOUT", 60.0, float)
+# Parsers imported by the workers at start, for every OS in the testbed.
+PARSE_POOL_PREWARM_COMMANDS = [
+    "show ip route",
+    "show ipv6 route",
+    "show interfaces",
+    "show interfaces description",
+    "show ip interface brief",
+    "show ip protocols",
+    "show isis neighbors",
+    "show isis lsp-log",
+    "show vrf",
+]
+
+# Device session backend: unicon (default) or asyncssh, which serves every session from one event loop.
+DEVICE_SESSION_BACKEND = get_env_variable("DEVICE_SESSION_BACKEND", "unicon").strip().lower()
+ASYNC_SSH_SESSIONS_PER_DEVICE = get_env_variable(
+    "ASYNC_SSH_SESSIONS_PER_DEVICE", CONNECTION_POOL_MAX_SESSIONS_PER_DEVICE, int
+)
+# Commands in flight at once across all devices.
+ASYNC_SSH_MAX_CONCURRENCY = get_env_variable("ASYNC_SSH_MAX_CONCURRENCY", 500, int)
+ASYNC_SSH_CONNECT_TIMEOUT = get_env_variable("ASYNC_SSH_CONNECT_TIMEOUT", 10.0, float)
+ASYNC_SSH_COMMAND_TIMEOUT = get_env_variable("ASYNC_SSH_COMMAND_TIMEOUT", 60.0, float)
+# Seconds a session can stay idle before it is closed.
+ASYNC_SSH_IDLE_TIMEOUT = get_env_variable(
+    "ASYNC_SSH_IDLE_TIMEOUT", CONNECTION_POOL_IDLE_TIMEOUT, float
+)
+# known_hosts file checking device host keys. Empty uses ~/.ssh/known_hosts. A device can set its own with known_hosts under its cli connection in the testbed.
+ASYNC_SSH_KNOWN_HOSTS = get_env_variable("ASYNC_SSH_KNOWN_HOSTS", "")
+# Accepts any device host key. Only for lab devices, it leaves sessions open to man-in-the-middle attacks.
+ASYNC_SSH_DISABLE_HOST_KEY_CHECK = get_env_variable(
+    "ASYNC_SSH_DISABLE_HOST_KEY_CHECK", False, bool
+)
+
+# Import pyATS, unicon and Genie in the background once the server is ready, instead of on the first request.
+STARTUP_PREWARM = get_env_variable("STARTUP_PREWARM", True, bool)
+STARTUP_PREWARM_MODULES = [
+    "pyats.topology",
+    "unicon",
+    "unicon.plugins.iosxe",
+    "genie.conf.base",
+    "genie.libs.parser.utils",
+]
+# OpenAPI schema cached between starts. Empty to build it on every start.
+OPENAPI_CACHE_FILE = get_env_variable("OPENAPI_CACHE_FILE", ".cache/openapi.json")
+
+# Session warm-up: connect to devices when the server starts, before /ready reports the server ready.
+SESSION_WARMUP_ENABLED = get_env_variable("SESSION_WARMUP_ENABLED", False, bool)
+# Comma separated device names or glob patterns to warm up. Empty warms up the whole inventory.
+SESSION_WARMUP_DEVICES = get_env_variable("SESSION_WARMUP_DEVICES", "")
+# Devices connecting at once during the warm-up.
+SESSION_WARMUP_CONCURRENCY = get_env_variable("SESSION_WARMUP_CONCURRENCY", 10, int)
+# Fraction of the selected devices that must be connected for /ready to report ready.
+SESSION_WARMUP_READY_RATIO = get_env_variable("SESSION_WARMUP_READY_RATIO", 1.0, float)
+# Seconds after which /ready reports ready even if the target is not met. 0 waits for the target.
+SESSION_WARMUP_TIMEOUT = get_env_variable("SESSION_WARMUP_TIMEOUT", 300.0, float)
@@ -1,5 +1,16 @@
-from fastapi import FastAPI, HTTPException, Query, status, Request
-from typing import List, Optional, Dict
+from utils.startup import startup_report
+from fastapi import (
+    FastAPI,
+    HTTPException,
+    Query,
+    status,
+    Request,
+    Depends,
+    Header,
+    Response,
+)
+from typing import Any, List, Optional, Dict
+from pydantic import BaseModel
 from pyats_connector.api.device_health_state import (
     health_cpu,
     health_memory,
@@ -20,11 +31,14 @@ from pyats_connector.api.interface_state import (
     interface_admin_status,
     verify_state_up,
     interface_events,
+    interfaces_events,
 )
 from pyats_connector.api.routing import (
     vrfs_present,
     interface_interfaces_under_vrf,
     route_entries,
+    route_lookup,
+    route_best_match,
 )
 from pyats_connector.api.isis import (
     isis_neighbors,
@@ -32,14 +46,75 @@ from pyats_connector.api.isis import (
     isis_interfaces,
 )
 from pyats_connector.inventory import get_devices_from_inventory
-from fastapi.responses import JSONResponse
+from pyats_connector.connection_pool import connection_pool, run_idle_eviction
+from pyats_connector.testbed_cache import get_testbed_cache, TestbedCache
+from pyats_connector.single_flight import single_flight
+from pyats_connector.fleet import resolve_devices, unknown_devices, fan_out
+from pyats_connector.jobs import job_manager, JobManager, JobQueueFullError
+from pyats_connector.poller import poller, snapshot_store, select_devices
+from pyats_connector.log_collector import log_collector
+from pyats_connector.route_index import route_index
+from pyats_connector.raw_output_store import raw_output_store
+from pyats_connector.parse_pool import parse_pool
+from pyats_connector.async_sessions import async_session_pool
+from pyats_connector.connection_methods import reparse
+from pyats_connector.change_feed import change_feed
+from pyats_connector.session_warmup import session_warmup
+from pyats_connector.circuit_breaker import circuit_breaker, CircuitOpenError
+from pyats_connector.instrumentation import (
+    request_labels,
+    RequestLabels,
+    observe_phase,
+    device_label,
+)
+from pyats_connector.result_cache import (
+    result_cache,
+    request_cache_policy,
+    CachePolicy,
+    max_age_from_cache_control,
+)
+from config.global_settings import (
+    CONNECTION_POOL_EVICTION_INTERVAL,
+    POLLER_ENABLED,
+    POLLER_DEVICES,
+    ROUTES_PAGE_MAX_SIZE,
+    CHANGE_FEED_KEEPALIVE,
+    RESPONSE_VIEWS,
+    STARTUP_PREWARM,
+    STARTUP_PREWARM_MODULES,
+    OPENAPI_CACHE_FILE,
+)
+from fastapi.responses import JSONResponse, StreamingResponse, PlainTextResponse
+from starlette.routing import Match
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
 
+import asyncio
+import ipaddress
 import logging
 import functools
+import math
+
+from utils.text_utils import get_docstring_summary_and_description, route_docs
+from utils.fast_json import dumps
+from utils.scheduler import scheduler, SchedulerOverloadedError
+from utils.load_shedding import load_shedder
+from utils.metrics import registry
+from utils.streaming import (
+    iter_json,
+    iter_ndjson,
+    chunked,
+    NDJSON_MEDIA_TYPE,
+    JSON_MEDIA_TYPE,
+    SSE_MEDIA_TYPE,
+    sse_event,
+)
+from utils.openapi_cache import cached_openapi
+from utils.projection import parse_selectors, project
 
-from utils.text_utils import get_docstring_summary_and_description
+startup_report.stop_import_timer()
 
-logger = logging.basicConfig(
+logging.basicConfig(
     level=logging.INFO,  # Set the logging level
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
     handlers=[
@@ -47,13 +122,28 @@ logger = logging.basicConfig(
         logging.StreamHandler(),  # Also log to the console
     ],
 )
+logger = logging.getLogger(__name__)
 
 
 def handle_exceptions(func):
     @functools.wraps(func)
     async def wrapper(*args, **kwargs):
         try:
-            return await func(*args, **kwargs)
+            return fast_response(await func(*args, **kwargs), kwargs.get("response"))
+        except HTTPException:
+            raise
+        except SchedulerOverloadedError as e:
+            raise HTTPException(
+                status_code=429,
+                detail=str(e),
+                headers={"Retry-After": str(math.ceil(e.retry_after))},
+            )
+        except CircuitOpenError as e:
+            raise HTTPException(
+                status_code=503,
+                detail=str(e),
+                headers={"Retry-After": str(math.ceil(e.retry_after))},
+            )
         except Exception as e:
             logger.error(f"Error in {func.__name__}: {e}")
             raise HTTPException(
@@ -63,7 +153,260 @@ def handle_exceptions(func):
     return wrapper
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if parse_pool.enabled:
+        testbed = await asyncio.to_thread(get_testbed_cache().get)
+        await asyncio.to_thread(parse_pool.start, testbed.devices.values())
+    eviction_task = asyncio.create_task(
+        run_idle_eviction(connection_pool, CONNECTION_POOL_EVICTION_INTERVAL)
+    )
+    load_shedder.start()
+    await job_manager.start()
+    if POLLER_ENABLED:
+        inventory = await asyncio.to_thread(resolve_devices)
+        poller.start(select_devices(POLLER_DEVICES, inventory), POLLER_DATASETS)
+    if session_warmup.enabled:
+        session_warmup.start(await get_devices_from_inventory())
+    startup_report.mark("ready")
+    logger.info("STARTUP ready: %s", startup_report.report(top=5))
+    if STARTUP_PREWARM:
+        # Runs while requests are served, the first device call no longer pays for the imports.
+        app.state.prewarm = asyncio.create_task(
+            asyncio.to_thread(
+                startup_report.prewarm,
+                STARTUP_PREWARM_MODULES,
+                {"testbed": get_testbed_cache().get, "openapi": app.openapi},
+            )
+        )
+    yield
+    await session_warmup.stop()
+    await change_feed.stop()
+    await poller.stop()
+    await job_manager.stop()
+    await load_shedder.stop()
+    eviction_task.cancel()
+    await asyncio.to_thread(connection_pool.close_all)
+    await asyncio.to_thread(async_session_pool.close_all)
+    parse_pool.shutdown()
+
+
+class InstrumentedJSONResponse(JSONResponse):
+    """
+    JSONResponse encoding with orjson when installed, recording its rendering time as the serialize phase.
+    """
+
+    def render(self, content: Any) -> bytes:
+        with observe_phase("serialize", request_labels.get().device):
+            return dumps(content)
+
+
+# Scope of the current request. The router adds the matched route to it.
+request_scope: ContextVar[Optional[dict]] = ContextVar("request_scope", default=None)
+
+
+def fast_response(result, response: Optional[Response] = None):
+    """
+    Wraps an endpoint result in a JSON response, so FastAPI does not validate and convert it again.
+
+    response_model=Dict or List only documents the endpoints; validating and
+    converting large Genie results cost more than encoding them. The status
+    code of the route decorator is kept, as are headers and status code set on
+    the endpoint's injected response.
+    """
+    if result is None or isinstance(result, Response):
+        return result
+    route = (request_scope.get() or {}).get("route")
+    status_code = getattr(route, "status_code", None) or 200
+    if response is None:
+        return InstrumentedJSONResponse(result, status_code=status_code)
+    fast = InstrumentedJSONResponse(
+        result, status_code=response.status_code or status_code
+    )
+    fast.headers.raw.extend(response.headers.raw)
+    return fast
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=InstrumentedJSONResponse)
+app.openapi = cached_openapi(app, OPENAPI_CACHE_FILE)
+
+# Read-mostly datasets the background poller keeps in the snapshot store.
+POLLER_DATASETS = {
+    "interfaces_status": interfaces_status,
+    "interfaces_status_and_description": interfaces_status_and_description,
+    "isis_neighbors": isis_neighbors,
+    "vrfs_present": vrfs_present,
+    "health_cpu": health_cpu,
+    "health_memory": health_memory,
+}
+
+SOURCE_QUERY = Query(
+    "live",
+    pattern="^(live|snapshot)$",
+    description="snapshot answers from the background poller, falling back to live if no snapshot exists yet.",
+)
+
+FIELDS_QUERY = Query(
+    None,
+    description="Comma separated JSONPath-like selectors of the fields to return, e.g. *.oper_status,*.ipv4 or [?(@.oper_status == 'down')].description.",
+)
+
+
+def view_query(operation: str):
+    """
+    Returns the view query parameter of an endpoint, listing the views defined for its function.
+    """
+    views = list(RESPONSE_VIEWS[operation])
+    return Query(
+        None,
+        pattern=f"^({'|'.join(views)})$",
+        description=f"Named compact view of the response: {', '.join(views)}.",
+    )
+
+
+def project_fields(
+    result, operation: str, fields: Optional[str], view: Optional[str] = None
+):
+    """
+    Keeps only the fields selected by the fields selectors and the named view, before serialization.
+    """
+    selectors = list(RESPONSE_VIEWS[operation][view]) if view else []
+    if fields:
+        selectors.append(fields)
+    if not selectors:
+        return result
+    try:
+        parsed = parse_selectors(",".join(selectors))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return project(result, parsed)
+
+
+@app.middleware("http")
+async def label_request(request: Request, call_next):
+    scope_token = request_scope.set(request.scope)
+    token = request_labels.set(
+        RequestLabels(
+            endpoint=_endpoint_label(request),
+            device=device_label(request.query_params.get("device_name", "")),
+        )
+    )
+    try:
+        return await call_next(request)
+    finally:
+        request_labels.reset(token)
+        request_scope.reset(scope_token)
+
+
+@app.middleware("http")
+async def shed_load(request: Request, call_next):
+    reason = load_shedder.check(_endpoint_label(request))
+    if reason is not None:
+        return JSONResponse(
+            status_code=429,
+            content={"detail": f"Server overloaded: {reason}"},
+            headers={"Retry-After": str(load_shedder.retry_after)},
+        )
+    return await call_next(request)
+
+
+def _endpoint_label(request: Request) -> str:
+    scope = request.scope
+    return _route_label(scope["method"], scope["path"], scope.get("root_path", ""))
+
+
+@functools.lru_cache(maxsize=4096)
+def _route_label(method: str, path: str, root_path: str) -> str:
+    # The route path template keeps the label bounded, e.g. /jobs/{job_id}.
+    # Matched once per method and path instead of walking every route on each request.
+    scope = {"type": "http", "method": method, "path": path, "root_path": root_path}
+    for route in app.router.routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+
+@app.middleware("http")
+async def report_cache_age(request: Request, call_next):
+    policy = CachePolicy()
+    token = request_cache_policy.set(policy)
+    try:
+        response = await call_next(request)
+    finally:
+        request_cache_policy.reset(token)
+    if policy.status is not None:
+        response.headers["Age"] = str(int(policy.age))
+        response.headers["X-Cache"] = policy.status
+    return response
+
+
+STREAM_QUERY = Query(
+    None,
+    pattern="^(ndjson|json)$",
+    description="Stream the response as it is serialized: ndjson sends one JSON line per entry, json sends the usual document in chunks.",
+)
+
+
+def stream_or_return(
+    result,
+    stream: Optional[str],
+    expand=(),
+    depth: int = 1,
+    response: Optional[Response] = None,
+):
+    """
+    Streams a result when requested, otherwise returns it unchanged for fast_response to encode, without response model validation.
+
+    Headers already set on the endpoint response are copied to the streamed response.
+    """
+    if stream is None:
+        return result
+    headers = dict(response.headers) if response is not None else None
+    if stream == "ndjson":
+        return StreamingResponse(
+            chunked(iter_ndjson(result, expand)),
+            media_type=NDJSON_MEDIA_TYPE,
+            headers=headers,
+        )
+    return StreamingResponse(
+        chunked(iter_json(result, depth)),
+        media_type=JSON_MEDIA_TYPE,
+        headers=headers,
+    )
+
+
+async def use_cache_policy(
+    max_age: Optional[float] = Query(
+        None,
+        ge=0,
+        description="Maximum age in seconds of a cached result. 0 bypasses the cache.",
+    ),
+    cache_control: Optional[str] = Header(None),
+):
+    policy = request_cache_policy.get()
+    if policy is None:
+        return
+    header_max_age = max_age_from_cache_control(cache_control)
+    if header_max_age is not None:
+        policy.max_age = header_max_age
+    if max_age is not None:
+        policy.max_age = max_age
+
+
+async def snapshot_or_live(
+    source: str, device_name: str, func, response: Response
+):
+    """
+    Answers from the snapshot store when requested and available, otherwise queries the device.
+    """
+    if source == "snapshot":
+        snapshot = snapshot_store.get(device_name, func.__name__)
+        if snapshot is not None:
+            response.headers["X-Snapshot-Timestamp"] = snapshot.timestamp_iso
+            response.headers["Age"] = str(int(snapshot.age))
+            return snapshot.data
+    return await func(device_name)
 
 
 # Add a global exception handler for 5xx errors
@@ -84,48 +427,64 @@ async def generic_exception_handler(request: Request, exc: Exception):
 @app.get(
     "/health/memory",
     response_model=Dict,
-    summary=get_docstring_summary_and_description(health_memory)[0],
-    description=get_docstring_summary_and_description(health_memory)[1],
+    **route_docs(health_memory),
     operation_id="getHealthMemory",
 )
 @handle_exceptions
-async def get_health_memory(device_name: str = Query(...)):
-    return await health_memory(device_name)
+async def get_health_memory(
+    response: Response,
+    device_name: str = Query(...),
+    source: str = SOURCE_QUERY,
+):
+    return await snapshot_or_live(source, device_name, health_memory, response)
 
 
 @app.get(
     "/health/cpu",
     response_model=Dict,
-    summary=get_docstring_summary_and_description(health_cpu)[0],
-    description=get_docstring_summary_and_description(health_cpu)[1],
+    **route_docs(health_cpu),
     operation_id="getHealthCpu",
 )
 @handle_exceptions
-async def get_health_cpu(device_name: str = Query(...)):
-    return await health_cpu(device_name)
+async def get_health_cpu(
+    response: Response,
+    device_name: str = Query(...),
+    source: str = SOURCE_QUERY,
+    fields: Optional[str] = FIELDS_QUERY,
+    view: Optional[str] = view_query("health_cpu"),
+):
+    return project_fields(
+        await snapshot_or_live(source, device_name, health_cpu, response),
+        "health_cpu",
+        fields,
+        view,
+    )
 
 
 @app.get(
     "/health/logging",
     response_model=Dict,
-    summary=get_docstring_summary_and_description(health_logging)[0],
-    description=get_docstring_summary_and_description(health_logging)[1],
+    **route_docs(health_logging),
     operation_id="getHealthLogging",
 )
 @handle_exceptions
 async def get_health_logging(
-    device_name: str = Query(...), keywords: Optional[List[str]] = Query(None)
+    device_name: str = Query(...),
+    keywords: Optional[List[str]] = Query(None),
+    stream: Optional[str] = STREAM_QUERY,
 ):
-    return await health_logging(device_name, keywords)
+    return stream_or_return(
+        await health_logging(device_name, keywords),
+        stream,
+        expand=("health_data", "logs"),
+        depth=3,
+    )
 
 
 @app.get(
     "/interface/running-config",
     response_model=Dict,
-    summary=get_docstring_summary_and_description(interface_running_config)[0],
-    description=get_docstring_summary_and_description(
-        interface_running_config
-    )[1],
+    **route_docs(interface_running_config),
     operation_id="getInterfaceRunningConfig",
 )
 @handle_exceptions
@@ -138,56 +497,72 @@ async def get_interface_running_config(
 @app.get(
     "/interfaces/status-and-description",
     response_model=Dict,
-    summary=get_docstring_summary_and_description(
-        interfaces_status_and_description
-    )[0],
-    description=get_docstring_summary_and_description(
-        interfaces_status_and_description
-    )[1],
+    **route_docs(interfaces_status_and_description),
     operation_id="getInterfacesStatusAndDescription",
+    dependencies=[Depends(use_cache_policy)],
 )
 @handle_exceptions
-async def get_interfaces_status_and_description(device_name: str = Query(...)):
-    return await interfaces_status_and_description(device_name)
+async def get_interfaces_status_and_description(
+    response: Response,
+    device_name: str = Query(...),
+    source: str = SOURCE_QUERY,
+):
+    return await snapshot_or_live(source, device_name, interfaces_status_and_description, response)
 
 
 @app.get(
     "/interfaces/status",
     response_model=Dict,
-    summary=get_docstring_summary_and_description(interfaces_status)[0],
-    description=get_docstring_summary_and_description(interfaces_status)[1],
+    **route_docs(interfaces_status),
     operation_id="getInterfacesStatus",
+    dependencies=[Depends(use_cache_policy)],
 )
 @handle_exceptions
-async def get_interfaces_status(device_name: str = Query(...)):
-    return await interfaces_status(device_name)
+async def get_interfaces_status(
+    response: Response,
+    device_name: str = Query(...),
+    source: str = SOURCE_QUERY,
+    stream: Optional[str] = STREAM_QUERY,
+    fields: Optional[str] = FIELDS_QUERY,
+    view: Optional[str] = view_query("interfaces_status"),
+):
+    return stream_or_return(
+        project_fields(
+            await snapshot_or_live(source, device_name, interfaces_status, response),
+            "interfaces_status",
+            fields,
+            view,
+        ),
+        stream,
+        response=response,
+    )
 
 
 @app.get(
     "/interface/detailed-status",
     response_model=Dict,
-    summary=get_docstring_summary_and_description(interface_detailed_status)[
-        0
-    ],
-    description=get_docstring_summary_and_description(
-        interface_detailed_status
-    )[1],
+    **route_docs(interface_detailed_status),
     operation_id="getInterfaceDetailedStatus",
 )
 @handle_exceptions
 async def get_interface_detailed_status(
-    device_name: str = Query(...), interface_name: str = Query(...)
+    device_name: str = Query(...),
+    interface_name: str = Query(...),
+    fields: Optional[str] = FIELDS_QUERY,
+    view: Optional[str] = view_query("interface_detailed_status"),
 ):
-    return await interface_detailed_status(device_name, interface_name)
+    return project_fields(
+        await interface_detailed_status(device_name, interface_name),
+        "interface_detailed_status",
+        fields,
+        view,
+    )
 
 
 @app.get(
     "/interface/information",
     response_model=Dict,
-    summary=get_docstring_summary_and_description(interfaces_information)[0],
-    description=get_docstring_summary_and_description(interfaces_information)[
-        1
-    ],
+    **route_docs(interfaces_information),
     operation_id="getInterfaceInformation",
 )
 @handle_exceptions
@@ -195,20 +570,24 @@ async def get_interface_information(
     request: Request,
     device_name: str = Query(...),
     interfaces_name: Optional[List[str]] = Query(None),
+    fields: Optional[str] = FIELDS_QUERY,
+    view: Optional[str] = view_query("interfaces_information"),
 ):
     if interfaces_name is None:
         query_params = request.query_params
         interfaces_name = query_params.getlist("interfaces_name")
-    return await interfaces_information(device_name, interfaces_name)
+    return project_fields(
+        await interfaces_information(device_name, interfaces_name),
+        "interfaces_information",
+        fields,
+        view,
+    )
 
 
 @app.get(
     "/interface/admin-status",
     response_model=Dict,
-    summary=get_docstring_summary_and_description(interface_admin_status)[0],
-    description=get_docstring_summary_and_description(interface_admin_status)[
-        1
-    ],
+    **route_docs(interface_admin_status),
     operation_id="getInterfaceAdminStatus",
 )
 @handle_exceptions
@@ -221,8 +600,7 @@ async def get_interface_admin_status(
 @app.get(
     "/interface/verify-state-up",
     response_model=Dict,
-    summary=get_docstring_summary_and_description(verify_state_up)[0],
-    description=get_docstring_summary_and_description(verify_state_up)[1],
+    **route_docs(verify_state_up),
     operation_id="verifyInterfaceStateUp",
 )
 @handle_exceptions
@@ -235,26 +613,45 @@ async def verify_interface_state_up(
 @app.get(
     "/interface/events",
     response_model=Dict,
-    summary=get_docstring_summary_and_description(interface_events)[0],
-    description=get_docstring_summary_and_description(interface_events)[1],
+    **route_docs(interface_events),
     operation_id="getInterfaceEvents",
 )
 @handle_exceptions
 async def get_interface_events(
-    device_name: str = Query(...), interface_name: str = Query(...)
+    device_name: str = Query(...),
+    interface_name: str = Query(...),
+    stream: Optional[str] = STREAM_QUERY,
+):
+    return stream_or_return(
+        await interface_events(device_name, interface_name),
+        stream,
+        expand=("logs",),
+        depth=2,
+    )
+
+
+@app.get(
+    "/interfaces/events",
+    response_model=Dict,
+    **route_docs(interfaces_events),
+    operation_id="getInterfacesEvents",
+)
+@handle_exceptions
+async def get_interfaces_events(
+    request: Request,
+    device_name: str = Query(...),
+    interfaces_name: Optional[List[str]] = Query(None),
 ):
-    return await interface_events(device_name, interface_name)
+    if interfaces_name is None:
+        query_params = request.query_params
+        interfaces_name = query_params.getlist("interfaces_name")
+    return await interfaces_events(device_name, interfaces_name)
 
 
 @app.get(
     "/devices/list",
     response_model=List,
-    summary=get_docstring_summary_and_description(get_devices_from_inventory)[
-        0
-    ],
-    description=get_docstring_summary_and_description(
-        get_devices_from_inventory
-    )[1],
+    **route_docs(get_devices_from_inventory),
     operation_id="getDevicesList",
 )
 @handle_exceptions
@@ -265,22 +662,23 @@ async def get_devices_list_available():
 @app.get(
     "/isis/neighbors",
     response_model=Dict,
-    summary=get_docstring_summary_and_description(isis_neighbors)[0],
-    description=get_docstring_summary_and_description(isis_neighbors)[1],
+    **route_docs(isis_neighbors),
     operation_id="getIsisNeighbors",
+    dependencies=[Depends(use_cache_policy)],
 )
 @handle_exceptions
-async def verify_active_isis_neighbors(device_name: str = Query(...)):
-    return await isis_neighbors(device_name)
+async def verify_active_isis_neighbors(
+    response: Response,
+    device_name: str = Query(...),
+    source: str = SOURCE_QUERY,
+):
+    return await snapshot_or_live(source, device_name, isis_neighbors, response)
 
 
 @app.get(
     "/isis/interface-events",
     response_model=Dict,
-    summary=get_docstring_summary_and_description(isis_interface_events)[0],
-    description=get_docstring_summary_and_description(isis_interface_events)[
-        1
-    ],
+    **route_docs(isis_interface_events),
     operation_id="getIsisInterfaceEvents",
 )
 @handle_exceptions
@@ -291,8 +689,7 @@ async def get_isis_interface_events(device_name: str = Query(...)):
 @app.get(
     "/isis/interface-information",
     response_model=List,
-    summary=get_docstring_summary_and_description(isis_interfaces)[0],
-    description=get_docstring_summary_and_description(isis_interfaces)[1],
+    **route_docs(isis_interfaces),
     operation_id="getIsisInterfaceInformation",
 )
 @handle_exceptions
@@ -305,24 +702,23 @@ async def get_isis_interface_information(
 @app.get(
     "/vrf/present",
     response_model=List,
-    summary=get_docstring_summary_and_description(vrfs_present)[0],
-    description=get_docstring_summary_and_description(vrfs_present)[1],
+    **route_docs(vrfs_present),
     operation_id="getVrfPresent",
+    dependencies=[Depends(use_cache_policy)],
 )
 @handle_exceptions
-async def get_vrf_present(device_name: str = Query(...)):
-    return await vrfs_present(device_name)
+async def get_vrf_present(
+    response: Response,
+    device_name: str = Query(...),
+    source: str = SOURCE_QUERY,
+):
+    return await snapshot_or_live(source, device_name, vrfs_present, response)
 
 
 @app.get(
     "/interface/interfaces-under-vrf",
     response_model=List,
-    summary=get_docstring_summary_and_description(
-        interface_interfaces_under_vrf
-    )[0],
-    description=get_docstring_summary_and_description(
-        interface_interfaces_under_vrf
-    )[1],
+    **route_docs(interface_interfaces_under_vrf),
     operation_id="getInterfacesUnderVrf",
 )
 @handle_exceptions
@@ -335,24 +731,64 @@ async def get_interface_interfaces_under_vrf(
 @app.get(
     "/routing/routes",
     response_model=Dict,
-    summary=get_docstring_summary_and_description(route_entries)[0],
-    description=get_docstring_summary_and_description(route_entries)[1],
+    **route_docs(route_entries),
     operation_id="getRoutingRoutes",
+    dependencies=[Depends(use_cache_policy)],
 )
 @handle_exceptions
 async def get_routing_routes(
     device_name: str = Query(...),
     vrf_name: Optional[str] = Query(None),
     address_family: str = Query("ipv4"),
+    prefix: Optional[str] = Query(None),
+    ge: Optional[int] = Query(None, ge=0, le=128),
+    le: Optional[int] = Query(None, ge=0, le=128),
+    protocol: Optional[str] = Query(None),
+    next_hop: Optional[str] = Query(None),
+    outgoing_interface: Optional[str] = Query(None),
+    limit: Optional[int] = Query(None, ge=1, le=ROUTES_PAGE_MAX_SIZE),
+    cursor: Optional[str] = Query(None),
+    stream: Optional[str] = STREAM_QUERY,
+    fields: Optional[str] = FIELDS_QUERY,
+    view: Optional[str] = view_query("route_entries"),
 ):
-    return await route_entries(device_name, vrf_name, address_family)
+    routes = await route_entries(
+        device_name,
+        vrf_name,
+        address_family,
+        prefix=prefix,
+        ge=ge,
+        le=le,
+        protocol=protocol,
+        next_hop=next_hop,
+        outgoing_interface=outgoing_interface,
+        limit=limit,
+        cursor=cursor,
+    )
+    routes = project_fields(routes, "route_entries", fields, view)
+    return stream_or_return(routes, stream, expand=("routes",), depth=2)
+
+
+@app.get(
+    "/routing/lookup",
+    response_model=Dict,
+    **route_docs(route_lookup),
+    operation_id="getRoutingLookup",
+    dependencies=[Depends(use_cache_policy)],
+)
+@handle_exceptions
+async def get_routing_lookup(
+    device_name: str = Query(...),
+    ip: str = Query(...),
+    vrf_name: Optional[str] = Query(None),
+):
+    return await route_lookup(device_name, ip, vrf_name)
 
 
 @app.patch(
     "/interface/shut",
     response_model=None,
-    summary=get_docstring_summary_and_description(shut_interface)[0],
-    description=get_docstring_summary_and_description(shut_interface)[1],
+    **route_docs(shut_interface),
     status_code=status.HTTP_204_NO_CONTENT,
     operation_id="shutInterface",
 )
@@ -366,8 +802,7 @@ async def action_shut_interface(
 @app.patch(
     "/interface/unshut",
     response_model=None,
-    summary=get_docstring_summary_and_description(unshut_interface)[0],
-    description=get_docstring_summary_and_description(unshut_interface)[1],
+    **route_docs(unshut_interface),
     status_code=status.HTTP_204_NO_CONTENT,
     operation_id="unshutInterface",
 )
@@ -376,3 +811,533 @@ async def action_unshut_interface(
     device_name: str = Query(...), interface_name: str = Query(...)
 ):
     await unshut_interface(device_name, interface_name)
+
+
+@app.get(
+    "/pool/stats",
+    response_model=Dict,
+    **route_docs(connection_pool.stats),
+    operation_id="getPoolStats",
+)
+@handle_exceptions
+async def get_pool_stats():
+    return connection_pool.stats()
+
+
+@app.post(
+    "/testbed/reload",
+    response_model=Dict,
+    **route_docs(TestbedCache.reload),
+    operation_id="reloadTestbed",
+)
+@handle_exceptions
+async def reload_testbed():
+    testbed_info = await asyncio.to_thread(get_testbed_cache().reload)
+    # Idle sessions were opened with the previous device definitions.
+    await asyncio.to_thread(connection_pool.close_all)
+    circuit_breaker.reset()
+    return testbed_info
+
+
+@app.get(
+    "/cache/stats",
+    response_model=Dict,
+    **route_docs(result_cache.stats),
+    operation_id="getCacheStats",
+)
+@handle_exceptions
+async def get_cache_stats():
+    return result_cache.stats()
+
+
+@app.get(
+    "/coalescing/stats",
+    response_model=Dict,
+    **route_docs(single_flight.stats),
+    operation_id="getCoalescingStats",
+)
+@handle_exceptions
+async def get_coalescing_stats():
+    return single_flight.stats()
+
+
+async def request_devices(
+    device_names: Optional[List[str]], pattern: Optional[str]
+) -> List[str]:
+    """
+    Selects the devices of a request, answering 404 if a name is not in the testbed.
+    """
+    devices = await scheduler.run(None, resolve_devices, device_names, pattern)
+    unknown = await scheduler.run(None, unknown_devices, devices)
+    if unknown:
+        raise HTTPException(
+            status_code=404, detail=f"Devices not found in testbed: {unknown}"
+        )
+    return devices
+
+
+async def fleet_response(
+    operation, device_names, pattern, **kwargs
+) -> StreamingResponse:
+    """
+    Streams the per-device results of a fleet operation as NDJSON.
+    """
+    devices = await scheduler.run(None, resolve_devices, device_names, pattern)
+    results = fan_out(devices, operation, kwargs)
+
+    async def ndjson_lines():
+        async for entry in results:
+            yield dumps(entry) + b"\n"
+
+    return StreamingResponse(ndjson_lines(), media_type=NDJSON_MEDIA_TYPE)
+
+
+@app.get(
+    "/fleet/health/cpu",
+    response_class=StreamingResponse,
+    summary="Fleet-wide: "
+    + get_docstring_summary_and_description(health_cpu)[0],
+    description=get_docstring_summary_and_description(fan_out)[1],
+    operation_id="getFleetHealthCpu",
+)
+@handle_exceptions
+async def get_fleet_health_cpu(
+    device_names: Optional[List[str]] = Query(None),
+    pattern: Optional[str] = Query(None),
+):
+    return await fleet_response(health_cpu, device_names, pattern)
+
+
+@app.get(
+    "/fleet/health/memory",
+    response_class=StreamingResponse,
+    summary="Fleet-wide: "
+    + get_docstring_summary_and_description(health_memory)[0],
+    description=get_docstring_summary_and_description(fan_out)[1],
+    operation_id="getFleetHealthMemory",
+)
+@handle_exceptions
+async def get_fleet_health_memory(
+    device_names: Optional[List[str]] = Query(None),
+    pattern: Optional[str] = Query(None),
+):
+    return await fleet_response(health_memory, device_names, pattern)
+
+
+@app.get(
+    "/fleet/interfaces/status",
+    response_class=StreamingResponse,
+    summary="Fleet-wide: "
+    + get_docstring_summary_and_description(interfaces_status)[0],
+    description=get_docstring_summary_and_description(fan_out)[1],
+    operation_id="getFleetInterfacesStatus",
+    dependencies=[Depends(use_cache_policy)],
+)
+@handle_exceptions
+async def get_fleet_interfaces_status(
+    device_names: Optional[List[str]] = Query(None),
+    pattern: Optional[str] = Query(None),
+):
+    return await fleet_response(interfaces_status, device_names, pattern)
+
+
+@app.get(
+    "/fleet/isis/neighbors",
+    response_class=StreamingResponse,
+    summary="Fleet-wide: "
+    + get_docstring_summary_and_description(isis_neighbors)[0],
+    description=get_docstring_summary_and_description(fan_out)[1],
+    operation_id="getFleetIsisNeighbors",
+    dependencies=[Depends(use_cache_policy)],
+)
+@handle_exceptions
+async def get_fleet_isis_neighbors(
+    device_names: Optional[List[str]] = Query(None),
+    pattern: Optional[str] = Query(None),
+):
+    return await fleet_response(isis_neighbors, device_names, pattern)
+
+
+@app.get(
+    "/fleet/routing/lookup",
+    response_class=StreamingResponse,
+    summary="Fleet-wide: "
+    + get_docstring_summary_and_description(route_best_match)[0],
+    description=get_docstring_summary_and_description(fan_out)[1],
+    operation_id="getFleetRoutingLookup",
+    dependencies=[Depends(use_cache_policy)],
+)
+@handle_exceptions
+async def get_fleet_routing_lookup(
+    ip: str = Query(...),
+    vrf: Optional[str] = Query(None),
+    device_names: Optional[List[str]] = Query(None),
+    pattern: Optional[str] = Query(None),
+):
+    try:
+        ipaddress.ip_address(ip)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid IP address: {ip}")
+    return await fleet_response(
+        route_best_match, device_names, pattern, ip=ip, vrf_name=vrf
+    )
+
+
+@app.get(
+    "/routing/index/stats",
+    response_model=Dict,
+    **route_docs(route_index.stats),
+    operation_id="getRouteIndexStats",
+)
+@handle_exceptions
+async def get_route_index_stats():
+    return route_index.stats()
+
+
+@app.get(
+    "/interfaces/changes",
+    response_class=StreamingResponse,
+    summary="Stream interface state changes as Server-Sent Events.",
+    description="Polls the selected devices in the background, shared with every other subscriber, and sends an "
+    + "interface_change event with device, interface, attribute (status, protocol or description), old, new and "
+    + "timestamp whenever a value changes. Select devices with device_names or pattern, and interfaces with the "
+    + "interface glob. Reconnecting clients sending Last-Event-ID receive the recent events they missed.",
+    operation_id="getInterfacesChanges",
+)
+@handle_exceptions
+async def get_interfaces_changes(
+    request: Request,
+    device_names: Optional[List[str]] = Query(None),
+    pattern: Optional[str] = Query(None),
+    interface: Optional[str] = Query(None),
+    last_event_id: Optional[int] = Header(None),
+):
+    devices = await request_devices(device_names, pattern)
+    if not devices:
+        raise HTTPException(status_code=404, detail="No devices selected")
+    subscription = change_feed.subscribe(devices, interface, last_event_id)
+
+    async def events():
+        try:
+            yield ": subscribed\n\n"
+            while True:
+                try:
+                    event = await asyncio.wait_for(
+                        subscription.queue.get(), CHANGE_FEED_KEEPALIVE
+                    )
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        break
+                    yield ": keepalive\n\n"
+                    continue
+                yield sse_event(event, event="interface_change", event_id=event["id"])
+        finally:
+            change_feed.unsubscribe(subscription)
+
+    return StreamingResponse(
+        events(),
+        media_type=SSE_MEDIA_TYPE,
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get(
+    "/interfaces/changes/stats",
+    response_model=Dict,
+    **route_docs(change_feed.stats),
+    operation_id="getInterfacesChangesStats",
+)
+@handle_exceptions
+async def get_interfaces_changes_stats():
+    return change_feed.stats()
+
+
+@app.get(
+    "/metrics",
+    response_class=PlainTextResponse,
+    summary="Prometheus metrics.",
+    description="Latency histograms per phase (testbed_load, connect, execute, parse, api, serialize) labelled by "
+    + "endpoint, device and command, connection attempts and failures, scheduler queue depth and in-flight "
+    + "device operations, in the Prometheus text format.",
+    operation_id="getMetrics",
+)
+async def get_metrics():
+    return PlainTextResponse(
+        registry.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+@app.get(
+    "/scheduler/stats",
+    response_model=Dict,
+    **route_docs(scheduler.stats),
+    operation_id="getSchedulerStats",
+)
+@handle_exceptions
+async def get_scheduler_stats():
+    return scheduler.stats()
+
+
+@app.get(
+    "/logs/stats",
+    response_model=Dict,
+    **route_docs(log_collector.stats),
+    operation_id="getLogCollectorStats",
+)
+@handle_exceptions
+async def get_log_collector_stats():
+    return log_collector.stats()
+
+
+@app.get(
+    "/raw/captures",
+    response_model=List[Dict],
+    **route_docs(raw_output_store.list_captures),
+    operation_id="getRawCaptures",
+)
+@handle_exceptions
+async def get_raw_captures(device_name: Optional[str] = None):
+    return raw_output_store.list_captures(device_name)
+
+
+@app.get(
+    "/raw/output",
+    response_model=Dict,
+    summary="Raw output of a stored CLI capture.",
+    description="Returns the text of a command as captured from the device, with its capture time and duration. "
+    + "Defaults to the latest capture, use captured_at from /raw/captures for an older one.",
+    operation_id="getRawOutput",
+)
+@handle_exceptions
+async def get_raw_output(
+    device_name: str, command: str, captured_at: Optional[float] = None
+):
+    capture = raw_output_store.get(device_name, command, captured_at)
+    if capture is None:
+        raise HTTPException(
+            status_code=404,
+            detail=f"No capture of '{command}' stored for {device_name}",
+        )
+    return {**capture.info(), "output": capture.output}
+
+
+@app.get(
+    "/raw/reparse",
+    response_model=Dict,
+    **route_docs(reparse),
+    operation_id="getRawReparse",
+)
+@handle_exceptions
+async def get_raw_reparse(
+    device_name: str, command: str, captured_at: Optional[float] = None
+):
+    try:
+        return await asyncio.to_thread(reparse, device_name, command, captured_at)
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+
+@app.get(
+    "/raw/stats",
+    response_model=Dict,
+    **route_docs(raw_output_store.stats),
+    operation_id="getRawOutputStats",
+)
+@handle_exceptions
+async def get_raw_output_stats():
+    return raw_output_store.stats()
+
+
+@app.get(
+    "/parse-pool/stats",
+    response_model=Dict,
+    **route_docs(parse_pool.stats),
+    operation_id="getParsePoolStats",
+)
+@handle_exceptions
+async def get_parse_pool_stats():
+    return parse_pool.stats()
+
+
+@app.get(
+    "/async-sessions/stats",
+    response_model=Dict,
+    **route_docs(async_session_pool.stats),
+    operation_id="getAsyncSessionsStats",
+)
+@handle_exceptions
+async def get_async_sessions_stats():
+    return async_session_pool.stats()
+
+
+@app.get(
+    "/startup/report",
+    response_model=Dict,
+    **route_docs(startup_report.report),
+    operation_id="getStartupReport",
+)
+@handle_exceptions
+async def get_startup_report(
+    top: int = Query(15, ge=1, description="Number of packages listed by import time.")
+):
+    return startup_report.report(top)
+
+
+@app.get(
+    "/ready",
+    response_model=Dict,
+    **route_docs(session_warmup.status),
+    operation_id="getReady",
+    responses={503: {"description": "The session warm-up target is not met yet."}},
+)
+@handle_exceptions
+async def get_ready():
+    readiness = session_warmup.status()
+    if not readiness["ready"]:
+        return JSONResponse(status_code=503, content=readiness)
+    return readiness
+
+
+@app.get(
+    "/load-shedding/stats",
+    response_model=Dict,
+    **route_docs(load_shedder.stats),
+    operation_id="getLoadSheddingStats",
+)
+@handle_exceptions
+async def get_load_shedding_stats():
+    return load_shedder.stats()
+
+
+@app.get(
+    "/circuit-breakers",
+    response_model=Dict,
+    **route_docs(circuit_breaker.stats),
+    operation_id="getCircuitBreakers",
+)
+@handle_exceptions
+async def get_circuit_breakers():
+    return circuit_breaker.stats()
+
+
+@app.post(
+    "/circuit-breakers/reset",
+    response_model=Dict,
+    **route_docs(circuit_breaker.reset),
+    operation_id="resetCircuitBreakers",
+)
+@handle_exceptions
+async def reset_circuit_breakers(
+    device_name: Optional[str] = Query(
+        None, description="Device to reset. Every device when omitted."
+    )
+):
+    circuit_breaker.reset(device_name)
+    return circuit_breaker.stats()
+
+
+# Read-only operations that can be submitted as background jobs.
+JOB_OPERATIONS = {
+    "health_cpu": health_cpu,
+    "health_memory": health_memory,
+    "health_logging": health_logging,
+    "interface_running_config": interface_running_config,
+    "interfaces_status_and_description": interfaces_status_and_description,
+    "interfaces_status": interfaces_status,
+    "interface_detailed_status": interface_detailed_status,
+    "interfaces_information": interfaces_information,
+    "interface_admin_status": interface_admin_status,
+    "interface_events": interface_events,
+    "interfaces_events": interfaces_events,
+    "isis_neighbors": isis_neighbors,
+    "isis_interface_events": isis_interface_events,
+    "isis_interfaces": isis_interfaces,
+    "vrfs_present": vrfs_present,
+    "interface_interfaces_under_vrf": interface_interfaces_under_vrf,
+    "route_entries": route_entries,
+}
+
+
+class JobRequest(BaseModel):
+    operation: str
+    device_names: Optional[List[str]] = None
+    pattern: Optional[str] = None
+    params: Dict[str, Any] = {}
+
+
+@app.post(
+    "/jobs",
+    response_model=Dict,
+    summary=get_docstring_summary_and_description(JobManager.submit)[0],
+    description="Operations: "
+    + ", ".join(JOB_OPERATIONS)
+    + ". Devices are selected with device_names, a glob pattern, or default to the whole inventory. "
+    + "params are passed to the operation, for example {\"vrf_name\": \"default\"} for route_entries. "
+    + "Poll GET /jobs/{job_id} for progress and results.",
+    status_code=status.HTTP_202_ACCEPTED,
+    operation_id="submitJob",
+)
+@handle_exceptions
+async def submit_job(job_request: JobRequest):
+    func = JOB_OPERATIONS.get(job_request.operation)
+    if func is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown operation {job_request.operation}. Operations available are: {list(JOB_OPERATIONS)}",
+        )
+    device_names = await request_devices(
+        job_request.device_names, job_request.pattern
+    )
+    try:
+        job = job_manager.submit(
+            job_request.operation, func, device_names, job_request.params
+        )
+    except JobQueueFullError as e:
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": "30"}
+        )
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "devices": device_names,
+        "location": f"/jobs/{job.id}",
+    }
+
+
+@app.get(
+    "/jobs/{job_id}",
+    response_model=Dict,
+    **route_docs(JobManager.get),
+    operation_id="getJob",
+)
+@handle_exceptions
+async def get_job(job_id: str):
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job.to_dict()
+
+
+@app.get(
+    "/jobs",
+    response_model=Dict,
+    **route_docs(job_manager.stats),
+    operation_id="getJobsStats",
+)
+@handle_exceptions
+async def get_jobs_stats():
+    return job_manager.stats()
+
+
+@app.get(
+    "/poller/stats",
+    response_model=Dict,
+    **route_docs(snapshot_store.stats),
+    operation_id="getPollerStats",
+)
+@handle_exceptions
+async def get_poller_stats():
+    return snapshot_store.stats()
+
+
+startup_report.mark("app")
@@ -3,6 +3,7 @@ Script to retrieve the health state of a device using the pyATS framework.
 """
 
 from pyats_connector.connection_methods import api_connect
+from pyats_connector.log_collector import log_collector
 from utils.async_utils import asyncify
 
 
@@ -49,6 +50,8 @@ def health_logging(device_name: str, keywords: list[str] = None) -> dict:
     """
     Retrieves health logging information from a device.
 
+    Only log lines added since the previous call are read from the device; matching is case insensitive.
+
     Args:
       - device_name (str): This parameter must come from the REST GET endpoint /devices/list.
       - keywords (list[str], optional): List of keywords to filter the health logging information.
@@ -69,12 +72,8 @@ def health_logging(device_name: str, keywords: list[str] = None) -> dict:
             "ADJCHANGE",
         ]
 
-    result = api_connect(
-        device_name=device_name,
-        method="health_logging",
-        args={"keywords": keywords},
-    )
+    lines = log_collector.search(device_name=device_name, keywords=keywords)
 
-    if not result["health_data"]:
+    if not lines:
         return {"message": "No issues detected on the logs of the device"}
-    return result
+    return {"health_data": {"num_of_logs": len(lines), "logs": lines}}
@@ -3,6 +3,7 @@ Script to perform operations on a device interface using the pyATS framework.
 """
 
 from pyats_connector.connection_methods import api_connect
+from pyats_connector.result_cache import result_cache
 from utils.async_utils import asyncify
 
 
@@ -18,11 +19,13 @@ def shut_interface(device_name: str, interface_name: str) -> dict:
     Returns:
       - dict: A dictionary containing the result of the operation.
     """
-    return api_connect(
+    result = api_connect(
         device_name=device_name,
         method="shut_interface",
         args=interface_name,
     )
+    result_cache.invalidate(device_name, keyword="interface")
+    return result
 
 
 @asyncify
@@ -37,8 +40,10 @@ def unshut_interface(device_name: str, interface_name: str) -> dict:
     Returns:
       dict: A dictionary containing the result of the operation.
     """
-    return api_connect(
+    result = api_connect(
         device_name=device_name,
         method="unshut_interface",
         args=interface_name,
     )
+    result_cache.invalidate(device_name, keyword="interface")
+    return result
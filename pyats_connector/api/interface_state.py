@@ -3,7 +3,7 @@ Script to retrieve the status of a device interface using the pyATS framework.
 """
 
 from pyats_connector.connection_methods import api_connect, parse_connect
-from genie.metaparser.util.exceptions import SchemaEmptyParserError
+from pyats_connector.log_collector import log_collector
 from utils.async_utils import asyncify
 import logging
 
@@ -121,7 +121,7 @@ def verify_state_up(device_name: str, interface_name: str) -> bool:
 @asyncify
 def interface_events(device_name: str, interface_name: str) -> dict:
     """
-    Retrieves the events for single interface on a device. Multiple interfaces are not supported. Split the request for multiple interfaces into multiple requests.
+    Retrieves the events for single interface on a device. For multiple interfaces use the REST GET endpoint /interfaces/events.
 
     Args:
       - device_name (str): This parameter must come from the REST GET endpoint /devices/list.
@@ -134,27 +134,47 @@ def interface_events(device_name: str, interface_name: str) -> dict:
         logging.debug(
             f"Attempting to retrieve events for {interface_name} on {device_name}"
         )
-        result = parse_connect(
-            device_name=device_name,
-            string_to_parse=f"show logging | i {interface_name}",
+        result = log_collector.interface_lines(
+            device_name=device_name, interface_names=[interface_name]
         )
-        logging.debug(
-            f"Successfully retrieved events for {interface_name} on {device_name}"
-        )
-        logging.debug(f"Result: {result}")
-        logging.debug(f"Type of result: {type(result)}")
+        return _interface_logs(interface_name, result[interface_name])
+
+    except Exception as e:
+        logging.error(f"An error occurred: {str(e)}")
+        return {"error": [str(e)]}
+
+
+@asyncify
+def interfaces_events(device_name: str, interfaces_name: list[str]) -> dict:
+    """
+    Retrieves the events for a list of interfaces on a device. Interfaces must be in a single list.
 
-        # Check if the result contains a SchemaEmptyParserError
-        if (
-            isinstance(result, dict)
-            and "parse" in result
-            and isinstance(result["parse"], SchemaEmptyParserError)
-        ):
+    Args:
+      - device_name (str): This parameter must come from the REST GET endpoint /devices/list.
+      - interfaces_name (list[str]): A list of interface names.
 
-            return {"logs": [f"No logging entries found for {interface_name}"]}
+    Returns:
+      - dict: A dictionary with the events of each interface.
 
-        return result
+    Example:
+      Correct usage:
+      GET /interfaces/events?device_name=cat8000v-2&interfaces_name=GigabitEthernet3&interfaces_name=GigabitEthernet2
+    """
+    try:
+        result = log_collector.interface_lines(
+            device_name=device_name, interface_names=interfaces_name
+        )
+        return {
+            interface_name: _interface_logs(interface_name, lines)
+            for interface_name, lines in result.items()
+        }
 
     except Exception as e:
         logging.error(f"An error occurred: {str(e)}")
         return {"error": [str(e)]}
+
+
+def _interface_logs(interface_name: str, lines: list[str]) -> dict:
+    if not lines:
+        return {"logs": [f"No logging entries found for {interface_name}"]}
+    return {"logs": lines}
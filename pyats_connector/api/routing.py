@@ -2,7 +2,13 @@
 Script to retrieve routing information from a device using the pyATS framework.
 """
 
+import base64
+import binascii
+import ipaddress
+
+from config.global_settings import ROUTES_PAGE_DEFAULT_SIZE
 from pyats_connector.connection_methods import api_connect
+from pyats_connector.route_index import route_index
 from utils.async_utils import asyncify
 
 
@@ -23,7 +29,7 @@ def vrfs_present(device_name: str) -> list:
     )
     if not result:
         return [{"vrf": "NO_VRFs_FOUND", "device": device_name}]
-    return [{"vrf": result.keys(), "device": device_name}]
+    return [{"vrf": list(result), "device": device_name}]
 
 
 @asyncify
@@ -54,26 +60,153 @@ def interface_interfaces_under_vrf(
 
 @asyncify
 def route_entries(
-    device_name: str, vrf_name: str = None, address_family: str = "ipv4"
+    device_name: str,
+    vrf_name: str = None,
+    address_family: str = "ipv4",
+    prefix: str = None,
+    ge: int = None,
+    le: int = None,
+    protocol: str = None,
+    next_hop: str = None,
+    outgoing_interface: str = None,
+    limit: int = None,
+    cursor: str = None,
 ) -> dict:
     """
-    Execute 'show ip route vrf <vrf>' and retrieve the routes.
+    Execute 'show ip route vrf <vrf>' and retrieve the routes, optionally filtered and paged.
 
     Args:
       - device_name (str): This parameter must come from the REST GET endpoint /devices/list.
       - vrf_name (str, optional): The name of the VRF. Defaults to None.
       - address_family (str, optional): The address family name. Defaults to "ipv4".
+      - prefix (str, optional): Only routes within this prefix, e.g. "10.0.0.0/8".
+      - ge (int, optional): Only routes with a mask length greater than or equal to this value.
+      - le (int, optional): Only routes with a mask length less than or equal to this value.
+      - protocol (str, optional): Only routes from this source protocol, e.g. "isis", or with this protocol code, e.g. "C".
+      - next_hop (str, optional): Only routes using this next hop address.
+      - outgoing_interface (str, optional): Only routes using this outgoing interface.
+      - limit (int, optional): Maximum number of routes per page.
+      - cursor (str, optional): The next_cursor of the previous page.
 
-    TODO: Need to reduce the amount of inrormation returned
+    The routing table is reused for ROUTE_INDEX_TTL seconds, so paging through it does not pull it again.
 
     Returns:
-      - dict: A dictionary containing the received routes.
+      - dict: A dictionary containing the received routes, sorted by prefix. With limit or cursor, {"routes": {...}, "next_cursor": str or None}.
     """
-    result = api_connect(
-        device_name=device_name,
-        method="get_routing_routes",
-        args={"vrf": vrf_name, "address_family": address_family},
-    )
-    if not result:
+    try:
+        after = decode_route_cursor(cursor) if cursor else None
+        if prefix is not None:
+            ipaddress.ip_network(prefix, strict=False)
+    except ValueError as e:
+        return {"error": f"INVALID_ROUTE_FILTER: {e}"}
+
+    table = route_index.table(device_name, vrf_name, address_family)
+    if table is None:
         return {"error": f"NO_ROUTES_FOUND_FOR_VRF_{vrf_name}"}
-    return result
+
+    paged = limit is not None or cursor is not None
+    routes, last_prefix = table.select(
+        prefix=prefix,
+        ge=ge,
+        le=le,
+        protocol=protocol,
+        next_hop=next_hop,
+        outgoing_interface=outgoing_interface,
+        after=after,
+        limit=(limit or ROUTES_PAGE_DEFAULT_SIZE) if paged else None,
+    )
+    if not paged:
+        return routes
+    return {
+        "routes": routes,
+        "next_cursor": encode_route_cursor(last_prefix) if last_prefix else None,
+    }
+
+
+@asyncify
+def route_lookup(device_name: str, ip: str, vrf_name: str = None) -> dict:
+    """
+    Find the route used to reach an IP address (longest prefix match).
+
+    Args:
+      - device_name (str): This parameter must come from the REST GET endpoint /devices/list.
+      - ip (str): The IP address to look up.
+      - vrf_name (str, optional): The name of the VRF. Defaults to None.
+
+    The routing table is indexed once and reused for ROUTE_INDEX_TTL seconds.
+
+    Returns:
+      - dict: The matching prefix and its route entry.
+    """
+    try:
+        match = route_index.lookup(device_name, ip, vrf_name)
+    except ValueError:
+        return {"error": f"INVALID_IP_ADDRESS: {ip}"}
+    if match is None:
+        return {"error": f"NO_ROUTE_FOUND_FOR_{ip}_IN_VRF_{vrf_name}"}
+    prefix, route = match
+    return {
+        "device": device_name,
+        "vrf": vrf_name or "default",
+        "ip": ip,
+        "prefix": prefix,
+        "route": route,
+    }
+
+
+@asyncify
+def route_best_match(device_name: str, ip: str, vrf_name: str = None) -> dict:
+    """
+    Find the best route to an IP address, with its protocol and next hops.
+
+    Args:
+      - device_name (str): This parameter must come from the REST GET endpoint /devices/list.
+      - ip (str): The IP address to look up.
+      - vrf_name (str, optional): The name of the VRF. Defaults to None.
+
+    Returns:
+      - dict: The matching prefix, its source protocol and its next hops.
+    """
+    match = route_index.lookup(device_name, ip, vrf_name)
+    if match is None:
+        return {"error": f"NO_ROUTE_FOUND_FOR_{ip}_IN_VRF_{vrf_name}"}
+    prefix, route = match
+    hops = route.get("next_hop", {})
+    next_hops = [
+        {
+            "next_hop": hop.get("next_hop"),
+            "outgoing_interface": hop.get("outgoing_interface"),
+        }
+        for hop in hops.get("next_hop_list", {}).values()
+    ] + [
+        {"next_hop": None, "outgoing_interface": name}
+        for name in hops.get("outgoing_interface", {})
+    ]
+    return {
+        "prefix": prefix,
+        "protocol": route.get("source_protocol"),
+        "protocol_codes": route.get("source_protocol_codes"),
+        "next_hops": next_hops,
+    }
+
+
+def encode_route_cursor(prefix: str) -> str:
+    """
+    Returns the opaque cursor pointing after a prefix.
+    """
+    return base64.urlsafe_b64encode(prefix.encode()).decode().rstrip("=")
+
+
+def decode_route_cursor(cursor: str) -> str:
+    """
+    Returns the prefix a cursor points after.
+
+    Raises:
+      ValueError: If the cursor is not valid.
+    """
+    try:
+        prefix = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    except (binascii.Error, UnicodeDecodeError) as e:
+        raise ValueError(f"invalid cursor {cursor}") from e
+    ipaddress.ip_network(prefix, strict=False)
+    return prefix
@@ -0,0 +1,444 @@
+"""
+This module provides an asyncio-native SSH session layer for devices, built on asyncssh.
+
+Selected with DEVICE_SESSION_BACKEND=asyncssh. Sessions, reads and prompt
+matching run as coroutines on a single event loop owned by the session pool,
+so waiting for hundreds of devices does not take one OS thread per device.
+asyncssh is only imported when this backend is used.
+
+PyATSConnection registers an AsyncSSHConnection on the pyATS device instead of
+opening a unicon session. Genie parsers and pyATS APIs then run unchanged on
+the text returned by the pool, the calling thread only waits for it.
+"""
+
+import asyncio
+import re
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Union
+
+from config.global_settings import (
+    DEVICE_SESSION_BACKEND,
+    ASYNC_SSH_SESSIONS_PER_DEVICE,
+    ASYNC_SSH_MAX_CONCURRENCY,
+    ASYNC_SSH_CONNECT_TIMEOUT,
+    ASYNC_SSH_COMMAND_TIMEOUT,
+    ASYNC_SSH_IDLE_TIMEOUT,
+    ASYNC_SSH_KNOWN_HOSTS,
+    ASYNC_SSH_DISABLE_HOST_KEY_CHECK,
+)
+from pyats_connector.circuit_breaker import circuit_breaker
+from log_config.logger_setup import logger
+
+UNICON_BACKEND = "unicon"
+ASYNCSSH_BACKEND = "asyncssh"
+SESSION_BACKENDS = (UNICON_BACKEND, ASYNCSSH_BACKEND)
+
+# Any IOS-like prompt, used until the hostname is learned.
+GENERIC_PROMPT = re.compile(r"(?:^|\n)(?P<hostname>[\w.\-@/:]+)(?:\([\w\-]+\))?[>#]\s*$")
+READ_SIZE = 65536
+SESSION_SETUP_COMMANDS = ("terminal length 0", "terminal width 0")
+
+
+def _import_asyncssh():
+    try:
+        import asyncssh
+    except ImportError as e:
+        raise ImportError(
+            "DEVICE_SESSION_BACKEND=asyncssh requires the asyncssh package: pip install asyncssh"
+        ) from e
+    return asyncssh
+
+
+@dataclass
+class SessionTarget:
+    """
+    Where and how to log in to a device, read from the testbed.
+    """
+
+    host: str
+    port: int
+    username: str
+    password: str = field(repr=False)
+    enable_password: Optional[str] = field(default=None, repr=False)
+    known_hosts: Optional[str] = None
+
+    @classmethod
+    def from_device(cls, device) -> "SessionTarget":
+        from pyats.utils.secret_strings import to_plaintext
+
+        connection = device.connections["cli"]
+        credentials = device.credentials
+        enable = credentials.get("enable")
+        return cls(
+            host=str(connection.ip),
+            port=int(connection.get("port") or 22),
+            username=credentials.default.username,
+            password=to_plaintext(credentials.default.password),
+            enable_password=to_plaintext(enable.password) if enable else None,
+            known_hosts=connection.get("known_hosts") or ASYNC_SSH_KNOWN_HOSTS or None,
+        )
+
+    def host_key_options(self) -> dict:
+        """
+        Returns the asyncssh options checking the device host key.
+
+        Without a known_hosts file, asyncssh checks ~/.ssh/known_hosts.
+        """
+        if ASYNC_SSH_DISABLE_HOST_KEY_CHECK:
+            return {"known_hosts": None}
+        if self.known_hosts:
+            return {"known_hosts": self.known_hosts}
+        return {}
+
+
+class AsyncDeviceSession:
+    """
+    An interactive SSH shell on a device, running one command at a time.
+    """
+
+    def __init__(self, device_name: str, target: SessionTarget):
+        self.device_name = device_name
+        self.target = target
+        self.last_used = time.monotonic()
+        self._connection = None
+        self._process = None
+        self._prompt = GENERIC_PROMPT
+
+    async def open(self, timeout: float = ASYNC_SSH_CONNECT_TIMEOUT) -> None:
+        asyncssh = _import_asyncssh()
+        self._connection = await asyncio.wait_for(
+            asyncssh.connect(
+                self.target.host,
+                port=self.target.port,
+                username=self.target.username,
+                password=self.target.password,
+                **self.target.host_key_options(),
+            ),
+            timeout,
+        )
+        self._process = await self._connection.create_process(
+            term_type="vt100", term_size=(511, 24)
+        )
+        banner = await self._read_until_prompt(timeout)
+        match = GENERIC_PROMPT.search(banner)
+        hostname = match.group("hostname") if match else ""
+        self._prompt = re.compile(
+            r"(?:^|\n)" + re.escape(hostname) + r"(?:\([\w\-]+\))?[>#]\s*$"
+        )
+        if banner.rstrip().endswith(">") and self.target.enable_password:
+            await self._enable(timeout)
+        for command in SESSION_SETUP_COMMANDS:
+            await self.execute(command, timeout)
+
+    async def execute(self, command: str, timeout: float = ASYNC_SSH_COMMAND_TIMEOUT) -> str:
+        """
+        Sends a command and returns its output, without the echo and the prompt.
+        """
+        self._process.stdin.write(command + "\n")
+        output = await self._read_until_prompt(timeout)
+        self.last_used = time.monotonic()
+        return _strip_echo_and_prompt(output, command)
+
+    async def configure(self, lines: List[str], timeout: float = ASYNC_SSH_COMMAND_TIMEOUT) -> str:
+        """
+        Applies configuration lines in configuration mode.
+        """
+        outputs = [await self.execute("configure terminal", timeout)]
+        for line in lines:
+            outputs.append(await self.execute(line, timeout))
+        outputs.append(await self.execute("end", timeout))
+        return "\n".join(output for output in outputs if output)
+
+    async def close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            try:
+                await asyncio.wait_for(self._connection.wait_closed(), 5)
+            except (asyncio.TimeoutError, OSError):
+                pass
+            self._connection = None
+
+    async def _enable(self, timeout: float) -> None:
+        self._process.stdin.write("enable\n")
+        await self._read_until(re.compile(r"[Pp]assword:\s*$"), timeout)
+        self._process.stdin.write(self.target.enable_password + "\n")
+        await self._read_until_prompt(timeout)
+
+    async def _read_until_prompt(self, timeout: float) -> str:
+        return await self._read_until(self._prompt, timeout)
+
+    async def _read_until(self, pattern: re.Pattern, timeout: float) -> str:
+        buffer = []
+        tail = ""
+
+        async def read() -> None:
+            nonlocal tail
+            while True:
+                chunk = await self._process.stdout.read(READ_SIZE)
+                if not chunk:
+                    raise ConnectionError(f"{self.device_name} closed the session")
+                buffer.append(chunk)
+                # Only the end of the output can hold the prompt.
+                tail = (tail + chunk)[-1024:].replace("\r", "")
+                if pattern.search(tail):
+                    return
+
+        await asyncio.wait_for(read(), timeout)
+        return "".join(buffer).replace("\r\n", "\n").replace("\r", "")
+
+
+@dataclass
+class _DeviceSessions:
+    idle: Deque[AsyncDeviceSession] = field(default_factory=deque)
+    open: int = 0
+    condition: Optional[asyncio.Condition] = None
+
+
+class AsyncSessionPool:
+    """
+    SSH sessions per device, all served by one event loop running in a background thread.
+    """
+
+    def __init__(
+        self,
+        sessions_per_device: int = ASYNC_SSH_SESSIONS_PER_DEVICE,
+        max_concurrency: int = ASYNC_SSH_MAX_CONCURRENCY,
+        command_timeout: float = ASYNC_SSH_COMMAND_TIMEOUT,
+        idle_timeout: float = ASYNC_SSH_IDLE_TIMEOUT,
+    ):
+        self.sessions_per_device = max(1, sessions_per_device)
+        self.max_concurrency = max(1, max_concurrency)
+        self.command_timeout = command_timeout
+        self.idle_timeout = idle_timeout
+        self._devices: Dict[str, _DeviceSessions] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._start_lock = threading.Lock()
+        self._counters = {"commands": 0, "sessions_opened": 0, "failures": 0, "evictions": 0}
+
+    def execute(self, device_name: str, command: str) -> str:
+        """
+        Runs a command from a thread and waits for its output.
+        """
+        return self._submit(self._execute(device_name, command)).result()
+
+    def configure(self, device_name: str, lines: List[str]) -> str:
+        """
+        Applies configuration lines from a thread and waits for the output.
+        """
+        return self._submit(self._configure(device_name, lines)).result()
+
+    def warm(self, device_name: str) -> None:
+        """
+        Opens a session to the device, if none is open, and leaves it idle in the pool.
+        """
+        self._submit(self._warm(device_name)).result()
+
+    def close_all(self) -> None:
+        """
+        Closes every session and stops the session loop.
+        """
+        with self._start_lock:
+            loop, self._loop = self._loop, None
+        if loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._close_all(), loop).result(timeout=30)
+        loop.call_soon_threadsafe(loop.stop)
+
+    def stats(self) -> dict:
+        """
+        Returns the asyncssh session counters and open sessions per device.
+
+        Returns:
+          dict: Commands run, sessions opened, failures, idle evictions, and open and idle sessions per device.
+        """
+        return {
+            **self._counters,
+            "running": self._loop is not None,
+            "devices": {
+                name: {"open": sessions.open, "idle": len(sessions.idle)}
+                for name, sessions in list(self._devices.items())
+            },
+        }
+
+    def _submit(self, coroutine):
+        with self._start_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=self._run_loop, args=(self._loop,), name="async-ssh", daemon=True
+                ).start()
+            loop = self._loop
+        return asyncio.run_coroutine_threadsafe(coroutine, loop)
+
+    def _run_loop(self, loop: asyncio.AbstractEventLoop) -> None:
+        asyncio.set_event_loop(loop)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        loop.create_task(self._evict_idle())
+        loop.run_forever()
+
+    async def _execute(self, device_name: str, command: str) -> str:
+        async with self._semaphore:
+            session = await self._acquire(device_name)
+            try:
+                output = await session.execute(command, self.command_timeout)
+            except BaseException:
+                await self._discard(device_name, session)
+                raise
+            self._counters["commands"] += 1
+            await self._release(device_name, session)
+            return output
+
+    async def _warm(self, device_name: str) -> None:
+        async with self._semaphore:
+            session = await self._acquire(device_name)
+            await self._release(device_name, session)
+
+    async def _configure(self, device_name: str, lines: List[str]) -> str:
+        async with self._semaphore:
+            session = await self._acquire(device_name)
+            try:
+                output = await session.configure(lines, self.command_timeout)
+            except BaseException:
+                await self._discard(device_name, session)
+                raise
+            await self._release(device_name, session)
+            return output
+
+    async def _acquire(self, device_name: str) -> AsyncDeviceSession:
+        sessions = self._devices.get(device_name)
+        if sessions is None:
+            sessions = self._devices[device_name] = _DeviceSessions(
+                condition=asyncio.Condition()
+            )
+        async with sessions.condition:
+            while not sessions.idle and sessions.open >= self.sessions_per_device:
+                await sessions.condition.wait()
+            if sessions.idle:
+                return sessions.idle.pop()
+            sessions.open += 1
+        try:
+            session = await self._open(device_name)
+        except BaseException:
+            async with sessions.condition:
+                sessions.open -= 1
+                sessions.condition.notify()
+            self._counters["failures"] += 1
+            raise
+        self._counters["sessions_opened"] += 1
+        return session
+
+    async def _open(self, device_name: str) -> AsyncDeviceSession:
+        from pyats_connector.testbed_cache import get_testbed_cache
+
+        testbed = await asyncio.to_thread(get_testbed_cache().get)
+        device = testbed.devices[device_name]
+        session = AsyncDeviceSession(device_name, SessionTarget.from_device(device))
+        logger.debug("ASYNC SSH opening session to %s", device_name)
+        circuit_breaker.before_connect(device_name)
+        try:
+            await session.open()
+        except BaseException as e:
+            circuit_breaker.record_failure(device_name, e)
+            await session.close()
+            raise
+        circuit_breaker.record_success(device_name)
+        return session
+
+    async def _release(self, device_name: str, session: AsyncDeviceSession) -> None:
+        sessions = self._devices[device_name]
+        async with sessions.condition:
+            sessions.idle.append(session)
+            sessions.condition.notify()
+
+    async def _discard(self, device_name: str, session: AsyncDeviceSession) -> None:
+        self._counters["failures"] += 1
+        await session.close()
+        sessions = self._devices[device_name]
+        async with sessions.condition:
+            sessions.open -= 1
+            sessions.condition.notify()
+
+    async def _evict_idle(self) -> None:
+        while True:
+            await asyncio.sleep(max(1.0, self.idle_timeout / 2))
+            now = time.monotonic()
+            for device_name, sessions in list(self._devices.items()):
+                async with sessions.condition:
+                    expired = [
+                        session
+                        for session in sessions.idle
+                        if now - session.last_used > self.idle_timeout
+                    ]
+                    for session in expired:
+                        sessions.idle.remove(session)
+                        sessions.open -= 1
+                        self._counters["evictions"] += 1
+                    sessions.condition.notify(len(expired))
+                for session in expired:
+                    await session.close()
+
+    async def _close_all(self) -> None:
+        for sessions in self._devices.values():
+            while sessions.idle:
+                await sessions.idle.pop().close()
+        self._devices.clear()
+
+
+class AsyncSSHConnection:
+    """
+    Stands in for a unicon connection, running commands on the async session pool.
+    """
+
+    def __init__(self, device_name: str, pool: AsyncSessionPool):
+        self.device_name = device_name
+        self.pool = pool
+        self.connected = True
+        from unicon.settings import Settings
+
+        # Read through the device object, as with a unicon connection.
+        self.settings = Settings()
+
+    def is_connected(self) -> bool:
+        return self.connected
+
+    def disconnect(self) -> None:
+        # Sessions belong to the pool and are closed when idle.
+        self.connected = False
+
+    def execute(self, command: Union[str, List[str]], *args, **kwargs):
+        if not isinstance(command, str):
+            return {c: self.execute(c) for c in command}
+        return self.pool.execute(self.device_name, command)
+
+    def configure(self, config: Union[str, List[str]], *args, **kwargs) -> str:
+        lines = config.splitlines() if isinstance(config, str) else list(config)
+        return self.pool.configure(self.device_name, [line for line in lines if line.strip()])
+
+
+def async_connect(device, device_name: str, pool: Optional[AsyncSessionPool] = None) -> None:
+    """
+    Connects a device object to the async session pool instead of a unicon session.
+    """
+    connection = AsyncSSHConnection(device_name, pool or async_session_pool)
+    device.connectionmgr.connections[device.default_connection_alias] = connection
+
+
+def _strip_echo_and_prompt(output: str, command: str) -> str:
+    lines = output.split("\n")
+    if lines and command.strip() and command.strip() in lines[0]:
+        lines = lines[1:]
+    if lines and GENERIC_PROMPT.search("\n" + lines[-1]):
+        lines = lines[:-1]
+    return "\n".join(lines)
+
+
+if DEVICE_SESSION_BACKEND not in SESSION_BACKENDS:
+    raise ValueError(
+        f"DEVICE_SESSION_BACKEND must be one of {SESSION_BACKENDS}, got '{DEVICE_SESSION_BACKEND}'"
+    )
+
+async_session_pool = AsyncSessionPool()
@@ -0,0 +1,266 @@
+"""
+This module detects interface state changes and publishes them to subscribers.
+
+Devices with at least one subscriber are polled in the background. Successive
+snapshots of get_interfaces_status and "show interfaces description" are
+compared and only the differences are published, one event per interface and
+attribute. Subscribers of the same device share its polls.
+"""
+
+import asyncio
+import fnmatch
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from config.global_settings import (
+    CHANGE_FEED_INTERVALS,
+    CHANGE_FEED_QUEUE_SIZE,
+    CHANGE_FEED_HISTORY,
+)
+from log_config.logger_setup import logger
+from pyats_connector.api.interface_config import interfaces_status_and_description
+from pyats_connector.api.interface_state import interfaces_status
+from pyats_connector.poller import Snapshot, snapshot_store
+from pyats_connector.result_cache import request_cache_policy, CachePolicy
+
+# Dataset name to the function polling it and the interface attributes compared.
+CHANGE_FEED_DATASETS: Dict[str, Tuple[Callable[[str], Awaitable], Tuple[str, ...]]] = {
+    "interfaces_status": (interfaces_status, ("status",)),
+    "interfaces_status_and_description": (
+        interfaces_status_and_description,
+        ("protocol", "description"),
+    ),
+}
+
+
+class Subscription:
+    """
+    The events of a set of devices and interfaces, queued for one subscriber.
+    """
+
+    def __init__(
+        self,
+        device_names: Iterable[str],
+        interface_pattern: Optional[str] = None,
+        queue_size: int = CHANGE_FEED_QUEUE_SIZE,
+    ):
+        self.device_names: Set[str] = set(device_names)
+        self.interface_pattern = interface_pattern
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, queue_size))
+        self.dropped = 0
+
+    def matches(self, event: dict) -> bool:
+        """
+        Returns whether the event is for a device and interface of this subscription.
+        """
+        return event["device"] in self.device_names and (
+            not self.interface_pattern
+            or fnmatch.fnmatch(event["interface"], self.interface_pattern)
+        )
+
+    def offer(self, event: dict) -> None:
+        """
+        Queues an event, dropping the oldest one if the subscriber is not keeping up.
+        """
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(event)
+
+
+class ChangeFeed:
+    """
+    Polls subscribed devices and publishes interface changes.
+    """
+
+    def __init__(
+        self,
+        intervals: Dict[str, float] = CHANGE_FEED_INTERVALS,
+        history: int = CHANGE_FEED_HISTORY,
+    ):
+        self.intervals = intervals
+        self._subscriptions: List[Subscription] = []
+        self._device_refs: Dict[str, int] = {}
+        self._device_tasks: Dict[str, List[asyncio.Task]] = {}
+        self._last: Dict[Tuple[str, str], Dict[str, dict]] = {}
+        self._history: deque = deque(maxlen=max(0, history))
+        self._next_id = 1
+        self._counters = {"polls": 0, "poll_errors": 0, "events": 0}
+
+    def subscribe(
+        self,
+        device_names: List[str],
+        interface_pattern: Optional[str] = None,
+        last_event_id: Optional[int] = None,
+    ) -> Subscription:
+        """
+        Subscribes to the changes of devices, starting their polls if needed.
+
+        Args:
+          device_names (list[str]): The devices to follow.
+          interface_pattern (str, optional): Glob pattern of the interfaces to follow, e.g. "GigabitEthernet*".
+          last_event_id (int, optional): Replay the recent events after this id.
+
+        Returns:
+          Subscription: The subscription. Pass it to unsubscribe when done.
+        """
+        subscription = Subscription(device_names, interface_pattern)
+        if last_event_id is not None:
+            for event in self._history:
+                if event["id"] > last_event_id and subscription.matches(event):
+                    subscription.offer(event)
+        self._subscriptions.append(subscription)
+        for device_name in subscription.device_names:
+            self._device_refs[device_name] = self._device_refs.get(device_name, 0) + 1
+            if device_name not in self._device_tasks:
+                self._start_device(device_name)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """
+        Removes a subscription, stopping the polls of devices nobody follows anymore.
+
+        Args:
+          subscription (Subscription): The subscription returned by subscribe.
+        """
+        if subscription not in self._subscriptions:
+            return
+        self._subscriptions.remove(subscription)
+        for device_name in subscription.device_names:
+            self._device_refs[device_name] -= 1
+            if self._device_refs[device_name] == 0:
+                del self._device_refs[device_name]
+                self._stop_device(device_name)
+
+    async def stop(self) -> None:
+        """
+        Stops all polls.
+        """
+        tasks = [task for tasks in self._device_tasks.values() for task in tasks]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._device_tasks = {}
+
+    def stats(self) -> dict:
+        """
+        Returns the subscribers, the devices polled and the events published.
+
+        Returns:
+          dict: Change feed statistics.
+        """
+        return {
+            **self._counters,
+            "subscribers": len(self._subscriptions),
+            "dropped": sum(s.dropped for s in self._subscriptions),
+            "devices": dict(self._device_refs),
+        }
+
+    def observe(self, device_name: str, dataset: str, data: any) -> List[dict]:
+        """
+        Compares a new snapshot with the previous one and publishes the differences.
+
+        The first snapshot of a device only sets the baseline.
+
+        Args:
+          device_name (str): The name of the device.
+          dataset (str): The dataset of the snapshot.
+          data: The polled result.
+
+        Returns:
+          list: The events published.
+        """
+        attributes = CHANGE_FEED_DATASETS[dataset][1]
+        current = _interface_attributes(data, attributes)
+        previous = self._last.get((device_name, dataset))
+        self._last[(device_name, dataset)] = current
+        if previous is None:
+            return []
+
+        timestamp = datetime.now(timezone.utc).isoformat()
+        events = []
+        for interface_name in sorted(previous.keys() | current.keys()):
+            old = previous.get(interface_name, {})
+            new = current.get(interface_name, {})
+            for attribute in attributes:
+                if old.get(attribute) == new.get(attribute):
+                    continue
+                event = {
+                    "id": self._next_id,
+                    "device": device_name,
+                    "interface": interface_name,
+                    "attribute": attribute,
+                    "old": old.get(attribute),
+                    "new": new.get(attribute),
+                    "timestamp": timestamp,
+                }
+                self._next_id += 1
+                events.append(event)
+
+        for event in events:
+            self._history.append(event)
+            for subscription in self._subscriptions:
+                if subscription.matches(event):
+                    subscription.offer(event)
+        self._counters["events"] += len(events)
+        return events
+
+    def _start_device(self, device_name: str) -> None:
+        self._device_tasks[device_name] = [
+            asyncio.create_task(self._poll_loop(device_name, dataset, interval))
+            for dataset, interval in self.intervals.items()
+            if interval and dataset in CHANGE_FEED_DATASETS
+        ]
+        logger.info("CHANGE FEED polling %s", device_name)
+
+    def _stop_device(self, device_name: str) -> None:
+        for task in self._device_tasks.pop(device_name, []):
+            task.cancel()
+        for dataset in CHANGE_FEED_DATASETS:
+            self._last.pop((device_name, dataset), None)
+        logger.info("CHANGE FEED stopped polling %s", device_name)
+
+    async def _poll_loop(self, device_name: str, dataset: str, interval: float) -> None:
+        # Changes must come from the device, not from a cached result.
+        request_cache_policy.set(CachePolicy(max_age=0))
+        func = CHANGE_FEED_DATASETS[dataset][0]
+        while True:
+            started = time.perf_counter()
+            try:
+                data = await func(device_name)
+                if not _is_valid(data):
+                    raise ValueError(f"unexpected result {data}")
+            except Exception as e:
+                self._counters["poll_errors"] += 1
+                logger.error("CHANGE FEED %s on %s failed: %s", dataset, device_name, e)
+            else:
+                self._counters["polls"] += 1
+                duration = time.perf_counter() - started
+                snapshot_store.put(
+                    device_name, dataset, Snapshot(data, time.time(), duration)
+                )
+                self.observe(device_name, dataset, data)
+            await asyncio.sleep(max(0.0, interval - (time.perf_counter() - started)))
+
+
+def _is_valid(data: any) -> bool:
+    # api_connect reports failures as {method: exception}.
+    return isinstance(data, dict) and not any(
+        isinstance(value, Exception) for value in data.values()
+    )
+
+
+def _interface_attributes(data: dict, attributes: Tuple[str, ...]) -> Dict[str, dict]:
+    result = {}
+    for interface_name, value in data.items():
+        if isinstance(value, dict):
+            result[interface_name] = {a: value.get(a) for a in attributes}
+        else:
+            # get_interfaces_status maps each interface to its status string.
+            result[interface_name] = {attributes[0]: value}
+    return result
+
+
+change_feed = ChangeFeed()
@@ -0,0 +1,169 @@
+"""
+This module provides a per-device circuit breaker for device connections.
+
+After CIRCUIT_BREAKER_FAILURE_THRESHOLD consecutive failed connections to a
+device, its circuit opens and connections to it fail at once with
+CircuitOpenError, instead of holding a worker thread until they time out.
+After CIRCUIT_BREAKER_COOLDOWN seconds the circuit is half-open: one probe
+connection is let through, closing the circuit if it succeeds and opening it
+again for another cooldown if it fails.
+"""
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional
+
+from config.global_settings import (
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+    CIRCUIT_BREAKER_COOLDOWN,
+)
+from log_config.logger_setup import logger
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(ConnectionError):
+    """
+    Raised instead of connecting to a device whose circuit is open.
+    """
+
+    def __init__(self, device_name: str, retry_after: float):
+        self.device_name = device_name
+        self.retry_after = retry_after
+        super().__init__(
+            f"Connections to {device_name} are suspended after repeated failures, "
+            f"retry in {retry_after:.0f}s"
+        )
+
+
+@dataclass
+class _Circuit:
+    state: str = CLOSED
+    failures: int = 0
+    opened_at: float = 0.0
+    probing: bool = False
+    trips: int = 0
+    rejected: int = 0
+    last_error: Optional[str] = None
+
+
+class CircuitBreaker:
+    """
+    Tracks consecutive connection failures per device and suspends connections to failing devices.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+        cooldown: float = CIRCUIT_BREAKER_COOLDOWN,
+    ):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._circuits: Dict[str, _Circuit] = {}
+        self._lock = threading.Lock()
+
+    def before_connect(self, device_name: str) -> None:
+        """
+        Lets a connection to the device through, or rejects it if the circuit is open.
+
+        Raises:
+          CircuitOpenError: If the circuit is open, or half-open with a probe already running.
+        """
+        if self.failure_threshold <= 0:
+            return
+        with self._lock:
+            circuit = self._circuits.setdefault(device_name, _Circuit())
+            if circuit.state == CLOSED:
+                return
+            remaining = circuit.opened_at + self.cooldown - time.monotonic()
+            if circuit.state == OPEN and remaining <= 0:
+                circuit.state = HALF_OPEN
+            if circuit.state == HALF_OPEN and not circuit.probing:
+                circuit.probing = True
+                logger.info("CIRCUIT %s half-open, probing", device_name)
+                return
+            circuit.rejected += 1
+        raise CircuitOpenError(device_name, max(remaining, 1.0))
+
+    def record_success(self, device_name: str) -> None:
+        """
+        Closes the circuit of the device after a successful connection.
+        """
+        with self._lock:
+            circuit = self._circuits.get(device_name)
+            if circuit is None:
+                return
+            if circuit.state != CLOSED:
+                logger.info("CIRCUIT %s closed", device_name)
+            circuit.state = CLOSED
+            circuit.failures = 0
+            circuit.probing = False
+
+    def record_failure(self, device_name: str, error: BaseException) -> None:
+        """
+        Counts a failed connection, opening the circuit once the threshold is reached.
+        """
+        if self.failure_threshold <= 0:
+            return
+        with self._lock:
+            circuit = self._circuits.setdefault(device_name, _Circuit())
+            circuit.failures += 1
+            circuit.last_error = f"{type(error).__name__}: {error}"
+            if circuit.state == HALF_OPEN or circuit.failures >= self.failure_threshold:
+                if circuit.state != OPEN:
+                    circuit.trips += 1
+                    logger.warning(
+                        "CIRCUIT %s open for %ss after %s failures: %s",
+                        device_name,
+                        self.cooldown,
+                        circuit.failures,
+                        circuit.last_error,
+                    )
+                circuit.state = OPEN
+                circuit.opened_at = time.monotonic()
+                circuit.probing = False
+
+    def reset(self, device_name: Optional[str] = None) -> None:
+        """
+        Closes the circuit of a device, or of every device.
+        """
+        with self._lock:
+            if device_name is None:
+                self._circuits.clear()
+            else:
+                self._circuits.pop(device_name, None)
+
+    def stats(self) -> dict:
+        """
+        Returns the circuit breaker settings and the circuit state per device.
+
+        Returns:
+          dict: Failure threshold, cooldown, and per device the state, consecutive failures, seconds until a probe is allowed, times opened, connections rejected and last error.
+        """
+        now = time.monotonic()
+        with self._lock:
+            return {
+                "failure_threshold": self.failure_threshold,
+                "cooldown": self.cooldown,
+                "devices": {
+                    name: {
+                        "state": circuit.state,
+                        "failures": circuit.failures,
+                        "retry_after": round(
+                            max(0.0, circuit.opened_at + self.cooldown - now), 1
+                        )
+                        if circuit.state == OPEN
+                        else 0.0,
+                        "trips": circuit.trips,
+                        "rejected": circuit.rejected,
+                        "last_error": circuit.last_error,
+                    }
+                    for name, circuit in self._circuits.items()
+                },
+            }
+
+
+circuit_breaker = CircuitBreaker()
@@ -3,18 +3,65 @@ This module provides a class for managing pyATS connections.
 """
 
 import logging
-from dataclasses import dataclass
-from typing import Optional
-
-
-from pyats.topology import loader, Device
-
-from pyats_connector.inventory import get_devices_from_inventory
-from config.global_settings import TESTBED_FILE
+import random
+import time
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional, Tuple
+
+if TYPE_CHECKING:
+    from pyats.topology import Device
+
+from pyats_connector.testbed_cache import get_testbed_cache
+from pyats_connector.connection_pool import connection_pool, PooledSession
+from pyats_connector.async_sessions import ASYNCSSH_BACKEND, async_connect
+from pyats_connector.circuit_breaker import circuit_breaker
+from pyats_connector.device_driver import (
+    RECORD_MODE,
+    REPLAY_MODE,
+    record_outputs,
+    replay_connect,
+)
+from pyats_connector.instrumentation import (
+    observe_phase,
+    CONNECTION_ATTEMPTS,
+    CONNECTION_FAILURES,
+    IN_FLIGHT,
+)
+from config.global_settings import (
+    TESTBED_FILE,
+    CONNECTION_POOL_ENABLED,
+    DEVICE_DRIVER_MODE,
+    DEVICE_SESSION_BACKEND,
+    CONNECT_MAX_ATTEMPTS,
+    CONNECT_BACKOFF_BASE,
+    CONNECT_BACKOFF_MAX,
+    CONNECT_TIMEOUT,
+)
 from log_config.logger_setup import logger
 
 
-NUMBER_OF_TRIES_TO_CONNECT = 10
+@lru_cache(maxsize=None)
+def broken_session_errors() -> Tuple[type, ...]:
+    """
+    Returns the errors after which a pooled session is not trusted anymore.
+
+    Built on first use, so unicon is not imported with the server.
+    """
+    from unicon.core.errors import (
+        ConnectionError as UniconConnectionError,
+        EOF,
+        TimeoutError as UniconTimeoutError,
+    )
+
+    return (
+        ConnectionError,
+        TimeoutError,
+        EOFError,
+        UniconConnectionError,
+        EOF,
+        UniconTimeoutError,
+    )
 
 
 @dataclass
@@ -25,34 +72,50 @@ class PyATSConnection:
 
     device_name: str
     testbed_file: str = TESTBED_FILE
-    device_pyats: Optional[Device] = None
+    device_pyats: Optional["Device"] = None
+    use_pool: bool = CONNECTION_POOL_ENABLED
+    _session: Optional[PooledSession] = field(
+        default=None, init=False, repr=False
+    )
 
     def __enter__(self):
         logger.debug("CREATING INSTANCE")
-        self._establish_connection()
+        if self.use_pool:
+            self._session = connection_pool.acquire(
+                self.device_name, self._establish_connection
+            )
+            self.device_pyats = self._session.device
+        else:
+            self._establish_connection()
+        IN_FLIGHT.inc(device=self.device_name)
         return self.device_pyats
 
-    def _establish_connection(self) -> Device:
+    def _establish_connection(self) -> "Device":
         """
         Establish a connection to a device using pyATS.
         """
 
         logger.debug("LOADING DEVICES")
-        self._load_devices_from_testbed()
+        with observe_phase("testbed_load", self.device_name):
+            self._load_devices_from_testbed()
         self._connection_handler()
         self._set_device_settings()
+        if DEVICE_DRIVER_MODE == RECORD_MODE:
+            record_outputs(self.device_pyats, self.device_name)
+        self._instrument_execute()
+        return self.device_pyats
 
     def _load_devices_from_testbed(self) -> None:
-        testbed = loader.load(self.testbed_file)
+        testbed_cache = get_testbed_cache(self.testbed_file)
         try:
-            self.device_pyats = testbed.devices[self.device_name]
+            self.device_pyats = testbed_cache.new_device(self.device_name)
         except KeyError as exc:
             logger.error(
                 "_load_devices_from_testbed error: device not found in testbed %s, error: %s",
                 self.device_name,
                 exc,
             )
-            devices_available = get_devices_from_inventory()
+            devices_available = testbed_cache.device_names()
             raise KeyError(
                 f"Device {self.device_name} not found in testbed. Devices available are: {devices_available}"
             ) from exc
@@ -62,26 +125,75 @@ class PyATSConnection:
         self.device_pyats.settings.GRACEFUL_DISCONNECT_WAIT_SEC = 0
         self.device_pyats.settings.POST_DISCONNECT_WAIT_SEC = 0
 
+    def _instrument_execute(self) -> None:
+        # Genie parsers and pyATS APIs run commands on the connection object,
+        # device.execute is delegated to it too. Wrapping it times every command.
+        device_name = self.device_name
+        for connection in self.device_pyats.connectionmgr.connections.values():
+            execute = connection.execute
+
+            def timed_execute(command, *args, _execute=execute, **kwargs):
+                with observe_phase("execute", device_name, command):
+                    return _execute(command, *args, **kwargs)
+
+            connection.execute = timed_execute
+
     def _connection_handler(self) -> None:
-        for _ in range(NUMBER_OF_TRIES_TO_CONNECT):
+        # Fails at once while the device's circuit is open.
+        circuit_breaker.before_connect(self.device_name)
+        try:
+            self._connect_with_retries()
+        except BaseException as e:
+            circuit_breaker.record_failure(self.device_name, e)
+            raise
+        circuit_breaker.record_success(self.device_name)
+
+    def _connect_with_retries(self) -> None:
+        attempts = max(1, CONNECT_MAX_ATTEMPTS)
+        for attempt in range(1, attempts + 1):
             try:
-                self._connect_to_device()
-                break
-            except ConnectionError as e:
-                logger.error("PyATSConnection connection failed: %s", e)
-                raise ConnectionError(
-                    f"PyATSConnection connection failed: {str(e)}"
-                ) from e
+                CONNECTION_ATTEMPTS.inc(device=self.device_name)
+                with observe_phase("connect", self.device_name):
+                    self._connect_to_device()
+                return
+            except broken_session_errors() as e:
+                CONNECTION_FAILURES.inc(device=self.device_name)
+                logger.error(
+                    "PyATSConnection connection to %s failed, attempt %s of %s: %s",
+                    self.device_name,
+                    attempt,
+                    attempts,
+                    e,
+                )
+                if attempt == attempts:
+                    raise ConnectionError(
+                        f"PyATSConnection connection failed: {str(e)}"
+                    ) from e
+                self._disconnect_quietly()
+                time.sleep(_backoff(attempt))
+
+    def _disconnect_quietly(self) -> None:
+        # A failed attempt can leave a half-open spawn behind.
+        try:
+            self.device_pyats.disconnect()
+        except Exception as e:
+            logger.debug("PyATSConnection disconnect after failure: %s", e)
 
     def _connect_to_device(self) -> None:
         # connection api
         # https://pubhub.devnetcloud.com/media/unicon/docs/user_guide/connection.html#python-apis
         logger.debug("ESTABLISHING CONNECTION to %s", self.device_name)
+        if DEVICE_DRIVER_MODE == REPLAY_MODE:
+            replay_connect(self.device_pyats, self.device_name)
+            return
+        if DEVICE_SESSION_BACKEND == ASYNCSSH_BACKEND:
+            async_connect(self.device_pyats, self.device_name)
+            return
         self.device_pyats.connect(
             mit=True,
             via="cli",
             learn_hostname=True,
-            connection_timeout=10,
+            connection_timeout=CONNECT_TIMEOUT,
             log_stdout=self._get_logging_level(),
         )
 
@@ -89,12 +201,27 @@ class PyATSConnection:
         return logger.getEffectiveLevel() == logging.DEBUG
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        logger.debug("CLOSING CONNECTION")
+        IN_FLIGHT.dec(device=self.device_name)
         if exc_type is not None:
             logger.error(
                 "PyATSConnection while exiting an error occurred: %s", exc_val
             )
+        if self._session is not None:
+            logger.debug("RELEASING CONNECTION")
+            connection_pool.release(
+                self._session,
+                discard=isinstance(exc_val, broken_session_errors()),
+            )
+            self._session = None
+            return False
+
+        logger.debug("CLOSING CONNECTION")
         self.device_pyats.disconnect()
         logger.debug("CONNECTION CLOSED")
 
         return False
+
+
+def _backoff(attempt: int) -> float:
+    # Full jitter, so clients retrying the same device do not reconnect in lockstep.
+    return random.uniform(0, min(CONNECT_BACKOFF_MAX, CONNECT_BACKOFF_BASE * 2 ** (attempt - 1)))
@@ -6,6 +6,15 @@ from typing import Optional, Union, Dict
 
 from log_config.logger_setup import logger
 from pyats_connector.connection_handler import PyATSConnection
+from pyats_connector.instrumentation import observe_phase
+from pyats_connector.parse_pool import parse_pool
+from pyats_connector.raw_output_store import raw_output_store
+from pyats_connector.result_cache import result_cache, freeze_args
+from pyats_connector.single_flight import single_flight
+from pyats_connector.testbed_cache import get_testbed_cache
+
+# Methods that change the device are never coalesced with concurrent calls.
+MUTATING_METHODS = {"shut_interface", "unshut_interface"}
 
 
 def api_connect(
@@ -24,22 +33,41 @@ def api_connect(
     Returns:
       dict: A dictionary containing the result of the method execution or an exception if an error occurs.
     """
+    if method in MUTATING_METHODS:
+        return _api_connect(device_name, method, args)
+    return result_cache.get_or_run(
+        device_name,
+        method,
+        args,
+        lambda: single_flight.do(
+            (device_name, method, freeze_args(args)),
+            lambda: _api_connect(device_name, method, args),
+        ),
+    )
+
+
+def _api_connect(
+    device_name: str,
+    method: str,
+    args: Optional[Union[str, Dict[str, str]]] = None,
+) -> any:
     logger.info("EXECUTING METHOD: %s, DEVICE: %s", method, device_name)
     logger.debug("ARGS: %s", args)
     with PyATSConnection(device_name=device_name) as device_connection:
         method_to_call = getattr(device_connection.api, method)
         try:
-            if isinstance(args, dict):
-                return method_to_call(**args)
-            elif isinstance(args, str):
-                return method_to_call(args)
-            elif isinstance(args, list):
-                return method_to_call(args)
-            else:
-                return method_to_call()
+            with observe_phase("api", device_name, method):
+                if isinstance(args, dict):
+                    return method_to_call(**args)
+                elif isinstance(args, str):
+                    return method_to_call(args)
+                elif isinstance(args, list):
+                    return method_to_call(args)
+                else:
+                    return method_to_call()
         except Exception as e:
             logger.error("api_connect error executing method: %s", e)
-            return {method.__name__: e}
+            return {method: e}
 
 
 def parse_connect(device_name: str, string_to_parse: str) -> any:
@@ -54,11 +82,96 @@ def parse_connect(device_name: str, string_to_parse: str) -> any:
     Returns:
       dict: A dictionary containing the result of the method execution or an exception if an error occurs.
     """
+    return result_cache.get_or_run(
+        device_name,
+        string_to_parse,
+        None,
+        lambda: single_flight.do(
+            (device_name, string_to_parse),
+            lambda: _parse_connect(device_name, string_to_parse),
+        ),
+    )
+
+
+def _parse_connect(device_name: str, string_to_parse: str) -> any:
     logger.info("Parsing: %s, DEVICE: %s", string_to_parse, device_name)
+    try:
+        capture = raw_output_store.capture(
+            device_name,
+            string_to_parse,
+            lambda: execute_connect(device_name, string_to_parse),
+        )
+        return parse_output(device_name, string_to_parse, capture.output)
+    except Exception as e:
+        logger.error("parse_connect error executing method: %s", e)
+        return {"parse": e}
+
+
+def parse_output(device_name: str, command: str, output: str) -> dict:
+    """
+    Parses the raw output of a CLI command with Genie, without connecting to the device.
+
+    Args:
+      device_name (str): The name of the device the output comes from. Selects the parser by OS.
+      command (str): The CLI command that produced the output.
+      output (str): The raw output.
+
+    Returns:
+      dict: The parsed output.
+    """
+    device = get_testbed_cache().get().devices[device_name]
+    with observe_phase("parse", device_name, command):
+        return parse_pool.parse(device, command, output)
+
+
+def reparse(
+    device_name: str, command: str, captured_at: Optional[float] = None
+) -> dict:
+    """
+    Parses a stored raw capture again, without executing the command on the device.
+
+    Args:
+      device_name (str): The name of the device.
+      command (str): The CLI command, as captured.
+      captured_at (float, optional): Capture time as listed by /raw/captures. Defaults to the latest capture.
+
+    Returns:
+      dict: The capture details and the parsed output.
+
+    Raises:
+      LookupError: If the capture is not stored.
+    """
+    capture = raw_output_store.get(device_name, command, captured_at)
+    if capture is None:
+        raise LookupError(f"No capture of '{command}' stored for {device_name}")
+    return {
+        **capture.info(),
+        "parsed": parse_output(device_name, command, capture.output),
+    }
+
+
+def execute_connect(device_name: str, command: str) -> str:
+    """
+    Connects to a device using PyATSConnection and returns the raw output of a CLI command.
+
+    Args:
+      device_name (str): The name of the device to connect to.
+      command (str): The CLI command to execute.
+
+    Returns:
+      str: The raw command output.
+
+    Raises:
+      Exception: Any error raised while executing the command.
+    """
+    return single_flight.do(
+        (device_name, "execute", command),
+        lambda: _execute_connect(device_name, command),
+    )
+
+
+def _execute_connect(device_name: str, command: str) -> str:
+    logger.info("Executing: %s, DEVICE: %s", command, device_name)
     with PyATSConnection(device_name=device_name) as device_connection:
-        method = getattr(device_connection, "parse")
-        try:
-            return method(string_to_parse)
-        except Exception as e:
-            logger.error("parse_connect error executing method: %s", e)
-            return {method.__name__: e}
+        return device_connection.execute(command)
+
@@ -0,0 +1,269 @@
+"""
+This module provides a pool of warm pyATS device sessions shared between requests.
+
+Sessions are keyed by device name. A session is handed to one caller at a time,
+checked before reuse, reconnected when broken and disconnected once idle for too long.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List
+
+from config.global_settings import (
+    CONNECTION_POOL_MAX_SESSIONS_PER_DEVICE,
+    CONNECTION_POOL_IDLE_TIMEOUT,
+    CONNECTION_POOL_ACQUIRE_TIMEOUT,
+    CONNECTION_POOL_PROBE_AFTER,
+)
+from log_config.logger_setup import logger
+
+
+@dataclass
+class PooledSession:
+    """
+    A connected device handed out by the pool.
+    """
+
+    device_name: str
+    device: any
+    created_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class PoolStats:
+    """
+    Counters describing how the pool has been used.
+    """
+
+    hits: int = 0
+    misses: int = 0
+    reconnects: int = 0
+    evictions: int = 0
+    timeouts: int = 0
+    acquisitions: int = 0
+    wait_time_total: float = 0.0
+    wait_time_max: float = 0.0
+
+
+@dataclass
+class _DevicePool:
+    idle: Deque[PooledSession] = field(default_factory=deque)
+    in_use: int = 0
+
+
+class ConnectionPool:
+    """
+    A pool of device sessions keyed by device name.
+    """
+
+    def __init__(
+        self,
+        max_sessions_per_device: int = CONNECTION_POOL_MAX_SESSIONS_PER_DEVICE,
+        idle_timeout: float = CONNECTION_POOL_IDLE_TIMEOUT,
+        acquire_timeout: float = CONNECTION_POOL_ACQUIRE_TIMEOUT,
+        probe_after: float = CONNECTION_POOL_PROBE_AFTER,
+    ):
+        self.max_sessions_per_device = max(1, max_sessions_per_device)
+        self.idle_timeout = idle_timeout
+        self.acquire_timeout = acquire_timeout
+        self.probe_after = probe_after
+        self._pools: Dict[str, _DevicePool] = {}
+        self._stats = PoolStats()
+        self._condition = threading.Condition()
+
+    def acquire(
+        self, device_name: str, connect: Callable[[], any]
+    ) -> PooledSession:
+        """
+        Hands out a healthy session for a device, connecting when none is idle.
+
+        Args:
+          device_name (str): The name of the device.
+          connect (callable): Returns a newly connected device object.
+
+        Returns:
+          PooledSession: A session reserved for the caller until release() is called.
+
+        Raises:
+          TimeoutError: If no session becomes available within the acquire timeout.
+        """
+        start = time.monotonic()
+        deadline = start + self.acquire_timeout
+        with self._condition:
+            pool = self._pools.setdefault(device_name, _DevicePool())
+            while True:
+                if pool.idle:
+                    session = pool.idle.pop()
+                    break
+                if pool.in_use < self.max_sessions_per_device:
+                    session = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats.timeouts += 1
+                    raise TimeoutError(
+                        f"No session available for {device_name} after {self.acquire_timeout}s"
+                    )
+                self._condition.wait(remaining)
+            pool.in_use += 1
+            self._record_wait(time.monotonic() - start, hit=session is not None)
+
+        try:
+            if session is None:
+                logger.debug("POOL MISS: opening session to %s", device_name)
+                session = PooledSession(device_name, connect())
+            elif not self._is_healthy(session):
+                logger.info("POOL RECONNECT: session to %s is broken", device_name)
+                self._disconnect(session)
+                session = PooledSession(device_name, connect())
+                with self._condition:
+                    self._stats.reconnects += 1
+        except BaseException:
+            with self._condition:
+                pool.in_use -= 1
+                self._condition.notify_all()
+            raise
+
+        session.last_used = time.monotonic()
+        return session
+
+    def release(self, session: PooledSession, discard: bool = False) -> None:
+        """
+        Returns a session to the pool.
+
+        Args:
+          session (PooledSession): The session obtained from acquire().
+          discard (bool, optional): Disconnect the session instead of keeping it. Defaults to False.
+        """
+        keep = not discard and self._is_connected(session)
+        with self._condition:
+            pool = self._pools.setdefault(session.device_name, _DevicePool())
+            pool.in_use -= 1
+            if keep:
+                session.last_used = time.monotonic()
+                pool.idle.append(session)
+            self._condition.notify_all()
+        if not keep:
+            self._disconnect(session)
+
+    def evict_idle(self) -> int:
+        """
+        Disconnects sessions idle for longer than the idle timeout.
+
+        Returns:
+          int: The number of sessions evicted.
+        """
+        expired: List[PooledSession] = []
+        now = time.monotonic()
+        with self._condition:
+            for pool in self._pools.values():
+                fresh = deque()
+                for session in pool.idle:
+                    if now - session.last_used < self.idle_timeout:
+                        fresh.append(session)
+                    else:
+                        expired.append(session)
+                pool.idle = fresh
+            self._stats.evictions += len(expired)
+        for session in expired:
+            logger.debug("POOL EVICT: idle session to %s", session.device_name)
+            self._disconnect(session)
+        return len(expired)
+
+    def close_all(self) -> None:
+        """
+        Disconnects every idle session. Sessions in use are closed on release.
+        """
+        with self._condition:
+            sessions = [s for pool in self._pools.values() for s in pool.idle]
+            for pool in self._pools.values():
+                pool.idle.clear()
+        for session in sessions:
+            self._disconnect(session)
+
+    def stats(self) -> dict:
+        """
+        Returns the pool counters and the sessions held per device.
+
+        Returns:
+          dict: Pool statistics.
+        """
+        with self._condition:
+            stats = self._stats
+            return {
+                "hits": stats.hits,
+                "misses": stats.misses,
+                "reconnects": stats.reconnects,
+                "evictions": stats.evictions,
+                "timeouts": stats.timeouts,
+                "acquisitions": stats.acquisitions,
+                "wait_time_total_sec": round(stats.wait_time_total, 6),
+                "wait_time_avg_sec": (
+                    round(stats.wait_time_total / stats.acquisitions, 6)
+                    if stats.acquisitions
+                    else 0.0
+                ),
+                "wait_time_max_sec": round(stats.wait_time_max, 6),
+                "max_sessions_per_device": self.max_sessions_per_device,
+                "devices": {
+                    name: {"idle": len(pool.idle), "in_use": pool.in_use}
+                    for name, pool in self._pools.items()
+                },
+            }
+
+    def _record_wait(self, waited: float, hit: bool) -> None:
+        self._stats.acquisitions += 1
+        if hit:
+            self._stats.hits += 1
+        else:
+            self._stats.misses += 1
+        self._stats.wait_time_total += waited
+        self._stats.wait_time_max = max(self._stats.wait_time_max, waited)
+
+    def _is_healthy(self, session: PooledSession) -> bool:
+        if not self._is_connected(session):
+            return False
+        if time.monotonic() - session.last_used < self.probe_after:
+            return True
+        try:
+            session.device.execute("", timeout=10)
+            return True
+        except Exception as e:
+            logger.debug("POOL PROBE failed for %s: %s", session.device_name, e)
+            return False
+
+    @staticmethod
+    def _is_connected(session: PooledSession) -> bool:
+        try:
+            return bool(session.device.is_connected())
+        except Exception:
+            return False
+
+    @staticmethod
+    def _disconnect(session: PooledSession) -> None:
+        try:
+            session.device.disconnect()
+        except Exception as e:
+            logger.debug(
+                "POOL disconnect error for %s: %s", session.device_name, e
+            )
+
+
+connection_pool = ConnectionPool()
+
+
+async def run_idle_eviction(pool: ConnectionPool, interval: float) -> None:
+    """
+    Periodically evicts idle sessions from the pool. Runs until cancelled.
+
+    Args:
+      pool (ConnectionPool): The pool to clean up.
+      interval (float): Seconds between eviction runs.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        await asyncio.to_thread(pool.evict_idle)
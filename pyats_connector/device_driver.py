@@ -0,0 +1,292 @@
+"""
+This module lets PyATSConnection run without real routers, by recording CLI outputs
+of live sessions into a corpus and replaying them later.
+
+DEVICE_DRIVER_MODE selects the driver:
+  - live: commands are sent to the device.
+  - record: commands are sent to the device and their raw output and latency
+    are saved to the corpus.
+  - replay: no session is opened, outputs are served from the corpus after a
+    delay mimicking the recorded latency.
+
+The corpus holds one JSON file per device and command:
+  <DEVICE_CORPUS_DIR>/<device>/<command>-<hash>.json
+with the keys "command", "output", "latency" and "recorded_at". Files can be
+written by hand or copied between devices.
+
+Genie parsers and pyATS APIs run commands on the connection registered under
+the device's connection alias, so replay registers a ReplayConnection there and
+the whole parse and API path runs unchanged.
+"""
+
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional, Tuple
+
+from config.global_settings import (
+    DEVICE_DRIVER_MODE,
+    DEVICE_CORPUS_DIR,
+    REPLAY_DEFAULT_LATENCY,
+    REPLAY_LATENCIES,
+    REPLAY_LATENCY_SCALE,
+    REPLAY_JITTER,
+    REPLAY_CONNECT_LATENCY,
+)
+from log_config.logger_setup import logger
+
+LIVE_MODE = "live"
+RECORD_MODE = "record"
+REPLAY_MODE = "replay"
+DRIVER_MODES = (LIVE_MODE, RECORD_MODE, REPLAY_MODE)
+
+# IOS output modifiers applied to a recorded output when the full command was not recorded.
+OUTPUT_MODIFIERS = {
+    "include": "include",
+    "i": "include",
+    "exclude": "exclude",
+    "e": "exclude",
+    "begin": "begin",
+    "b": "begin",
+}
+
+
+class CommandNotRecordedError(LookupError):
+    """
+    Raised in replay mode for a command missing from the corpus.
+    """
+
+
+@dataclass
+class Recording:
+    """
+    The raw output of a command as captured from a device.
+    """
+
+    command: str
+    output: str
+    latency: Optional[float] = None
+    recorded_at: Optional[str] = None
+
+
+@dataclass
+class Corpus:
+    """
+    Recorded outputs stored as JSON files, one per device and command.
+    """
+
+    directory: str = DEVICE_CORPUS_DIR
+    _cache: Dict[Tuple[str, str], Recording] = field(
+        default_factory=dict, init=False, repr=False
+    )
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False
+    )
+
+    def path(self, device_name: str, command: str) -> str:
+        """
+        Returns the file holding the output of a command on a device.
+        """
+        normalized = _normalize(command)
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", normalized).strip("_")[:60]
+        digest = hashlib.sha1(normalized.encode("utf-8")).hexdigest()[:10]
+        return os.path.join(self.directory, device_name, f"{slug}-{digest}.json")
+
+    def get(self, device_name: str, command: str) -> Optional[Recording]:
+        """
+        Returns the recording of a command, or None if it was never recorded.
+        """
+        key = (device_name, _normalize(command))
+        with self._lock:
+            if key in self._cache:
+                return self._cache[key]
+        try:
+            with open(self.path(device_name, command), encoding="utf-8") as f:
+                recording = Recording(**json.load(f))
+        except FileNotFoundError:
+            # Not cached, so recordings added while the server runs are picked up.
+            return None
+        with self._lock:
+            self._cache[key] = recording
+        return recording
+
+    def put(self, device_name: str, recording: Recording) -> None:
+        """
+        Saves a recording, replacing the previous one of the same command.
+        """
+        path = self.path(device_name, recording.command)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temporary = f"{path}.{threading.get_ident()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(recording.__dict__, f, indent=2)
+            f.write("\n")
+        os.replace(temporary, path)
+        with self._lock:
+            self._cache[(device_name, _normalize(recording.command))] = recording
+
+    def lookup(self, device_name: str, command: str) -> str:
+        """
+        Returns the output of a command, applying IOS output modifiers to the
+        recorded output of the base command when the full command was not recorded.
+
+        Raises:
+          CommandNotRecordedError: If neither the command nor its base command was recorded.
+        """
+        recording = self.get(device_name, command)
+        if recording is not None:
+            return recording.output
+        base, _, modifier = command.partition("|")
+        if modifier:
+            recording = self.get(device_name, base)
+            if recording is not None:
+                return _apply_modifier(recording.output, modifier)
+        raise CommandNotRecordedError(
+            f"Command '{command}' not recorded for {device_name} in {self.directory}"
+        )
+
+    def latency(self, device_name: str, command: str) -> float:
+        """
+        Returns the delay before the output of a command is served.
+
+        REPLAY_LATENCIES overrides the recorded latency per command. Without
+        either, REPLAY_DEFAULT_LATENCY is used. The result is multiplied by
+        REPLAY_LATENCY_SCALE and varied by REPLAY_JITTER.
+        """
+        base = _normalize(command.partition("|")[0])
+        latency = REPLAY_LATENCIES.get(base)
+        if latency is None:
+            recording = self.get(device_name, command) or self.get(device_name, base)
+            if recording is not None:
+                latency = recording.latency
+        if latency is None:
+            latency = REPLAY_DEFAULT_LATENCY
+        return _jittered(latency * REPLAY_LATENCY_SCALE)
+
+
+class ReplayConnection:
+    """
+    Stands in for a unicon connection, serving outputs from the corpus.
+    """
+
+    def __init__(self, device_name: str, corpus: Corpus):
+        self.device_name = device_name
+        self.corpus = corpus
+        self.connected = False
+        from unicon.settings import Settings
+
+        # Read through the device object, as with a unicon connection.
+        self.settings = Settings()
+
+    def connect(self) -> None:
+        time.sleep(_jittered(REPLAY_CONNECT_LATENCY * REPLAY_LATENCY_SCALE))
+        self.connected = True
+
+    def is_connected(self) -> bool:
+        return self.connected
+
+    def disconnect(self) -> None:
+        self.connected = False
+
+    def execute(self, command, *args, **kwargs):
+        if not isinstance(command, str):
+            return {c: self.execute(c, *args, **kwargs) for c in command}
+        if not command.strip():
+            return ""
+        output = self.corpus.lookup(self.device_name, command)
+        time.sleep(self.corpus.latency(self.device_name, command))
+        return output
+
+    def configure(self, config, *args, **kwargs) -> str:
+        logger.info("REPLAY %s ignoring configuration: %s", self.device_name, config)
+        return ""
+
+
+def replay_connect(device, device_name: str, corpus: Optional[Corpus] = None) -> None:
+    """
+    Connects a device object to the corpus instead of the real device.
+    """
+    connection = ReplayConnection(device_name, corpus or corpus_store)
+    connection.connect()
+    device.connectionmgr.connections[device.default_connection_alias] = connection
+    logger.debug("REPLAY %s served from %s", device_name, connection.corpus.directory)
+
+
+def record_outputs(device, device_name: str, corpus: Optional[Corpus] = None) -> None:
+    """
+    Saves the output of every command run on the connections of a connected device.
+    """
+    corpus = corpus or corpus_store
+    for connection in device.connectionmgr.connections.values():
+        connection.execute = _recording(connection.execute, device_name, corpus)
+
+
+def _recording(execute: Callable, device_name: str, corpus: Corpus) -> Callable:
+    def recording_execute(command, *args, **kwargs):
+        started = time.perf_counter()
+        output = execute(command, *args, **kwargs)
+        latency = round(time.perf_counter() - started, 4)
+        if isinstance(command, str):
+            outputs = {command: output}
+        elif isinstance(output, dict):
+            outputs = output
+        else:
+            outputs = {}
+        for recorded_command, recorded_output in outputs.items():
+            if not recorded_command.strip() or not isinstance(recorded_output, str):
+                continue
+            try:
+                corpus.put(
+                    device_name,
+                    Recording(
+                        command=recorded_command,
+                        output=recorded_output,
+                        latency=latency if isinstance(command, str) else None,
+                        recorded_at=datetime.now(timezone.utc).isoformat(),
+                    ),
+                )
+            except OSError as e:
+                logger.error("RECORD %s failed to save '%s': %s", device_name, recorded_command, e)
+        return output
+
+    return recording_execute
+
+
+def _normalize(command: str) -> str:
+    return " ".join(command.split())
+
+
+def _apply_modifier(output: str, modifier: str) -> str:
+    keyword, _, pattern = modifier.strip().partition(" ")
+    kind = OUTPUT_MODIFIERS.get(keyword)
+    if kind is None:
+        raise CommandNotRecordedError(f"Output modifier '| {modifier.strip()}' not supported")
+    regex = re.compile(pattern.strip())
+    lines = output.splitlines(keepends=True)
+    if kind == "include":
+        return "".join(line for line in lines if regex.search(line))
+    if kind == "exclude":
+        return "".join(line for line in lines if not regex.search(line))
+    for index, line in enumerate(lines):
+        if regex.search(line):
+            return "".join(lines[index:])
+    return ""
+
+
+def _jittered(latency: float) -> float:
+    if latency <= 0:
+        return 0.0
+    return max(0.0, latency * (1 + random.uniform(-REPLAY_JITTER, REPLAY_JITTER)))
+
+
+if DEVICE_DRIVER_MODE not in DRIVER_MODES:
+    raise ValueError(
+        f"DEVICE_DRIVER_MODE must be one of {DRIVER_MODES}, got '{DEVICE_DRIVER_MODE}'"
+    )
+
+corpus_store = Corpus()
@@ -0,0 +1,142 @@
+"""
+This module runs device operations across many devices concurrently.
+
+Devices are selected by name, by glob pattern or from the whole inventory.
+Concurrency is bounded globally and per site, and results are yielded as each
+device finishes so a slow device does not hold back the others.
+"""
+
+import asyncio
+import fnmatch
+import time
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from config.global_settings import (
+    FLEET_MAX_CONCURRENCY,
+    FLEET_MAX_CONCURRENCY_PER_SITE,
+    FLEET_DEVICE_TIMEOUT,
+    FLEET_SITE_ATTRIBUTE,
+)
+from log_config.logger_setup import logger
+from pyats_connector.testbed_cache import get_testbed_cache
+from utils.scheduler import scheduler
+
+DEFAULT_SITE = "default"
+
+
+def resolve_devices(
+    device_names: Optional[List[str]] = None, pattern: Optional[str] = None
+) -> List[str]:
+    """
+    Selects the devices a fleet operation runs on.
+
+    Args:
+      device_names (list[str], optional): Explicit device names. Take precedence over the pattern.
+      pattern (str, optional): Glob pattern matched against the inventory, for example "cat8000v-*".
+
+    Returns:
+      list: The selected device names. All devices of the inventory if no selector is given.
+    """
+    if device_names:
+        return list(dict.fromkeys(device_names))
+    inventory = get_testbed_cache().device_names()
+    if pattern:
+        return fnmatch.filter(inventory, pattern)
+    return inventory
+
+
+def unknown_devices(device_names: List[str]) -> List[str]:
+    """
+    Returns the device names not defined in the testbed.
+
+    Args:
+      device_names (list[str]): The device names to check.
+
+    Returns:
+      list: The unknown names, in the given order.
+    """
+    inventory = set(get_testbed_cache().device_names())
+    return [name for name in device_names if name not in inventory]
+
+
+def get_device_site(device_name: str) -> str:
+    """
+    Returns the site of a device, read from the "custom" section of the testbed.
+
+    Args:
+      device_name (str): The name of the device.
+
+    Returns:
+      str: The site name, or "default" if the device has none.
+    """
+    try:
+        device = get_testbed_cache().get().devices[device_name]
+    except KeyError:
+        return DEFAULT_SITE
+    return str(device.custom.get(FLEET_SITE_ATTRIBUTE) or DEFAULT_SITE)
+
+
+async def fan_out(
+    device_names: List[str],
+    operation: Callable[..., Awaitable],
+    kwargs: Optional[Dict] = None,
+    max_concurrency: int = FLEET_MAX_CONCURRENCY,
+    max_concurrency_per_site: int = FLEET_MAX_CONCURRENCY_PER_SITE,
+    timeout: float = FLEET_DEVICE_TIMEOUT,
+) -> AsyncIterator[dict]:
+    """
+    Runs an operation on every device and yields one result per device as it finishes.
+
+    Each result contains the device, its site, whether it succeeded, the elapsed
+    time in milliseconds and either the result or the error.
+
+    Args:
+      device_names (list[str]): The devices to run the operation on.
+      operation (callable): Async function called as operation(device_name, **kwargs).
+      kwargs (dict, optional): Extra arguments for the operation.
+      max_concurrency (int, optional): Devices processed at the same time.
+      max_concurrency_per_site (int, optional): Devices of the same site processed at the same time.
+      timeout (float, optional): Seconds before a device is reported as timed out.
+
+    Returns:
+      AsyncIterator[dict]: The per-device results, in completion order.
+    """
+    kwargs = kwargs or {}
+    # Read off the event loop, the testbed may be reloaded from disk.
+    sites = await scheduler.run(
+        None, lambda: {name: get_device_site(name) for name in device_names}
+    )
+    global_slots = asyncio.Semaphore(max(1, max_concurrency))
+    site_slots: Dict[str, asyncio.Semaphore] = {}
+
+    async def run_on_device(device_name: str) -> dict:
+        site = sites[device_name]
+        slots = site_slots.setdefault(
+            site, asyncio.Semaphore(max(1, max_concurrency_per_site))
+        )
+        queued = time.perf_counter()
+        async with slots, global_slots:
+            started = time.perf_counter()
+            entry = {"device": device_name, "site": site}
+            try:
+                result = await asyncio.wait_for(
+                    operation(device_name, **kwargs), timeout
+                )
+                entry.update(ok=True, result=result)
+            except asyncio.TimeoutError:
+                entry.update(ok=False, error=f"TIMEOUT after {timeout}s")
+            except Exception as e:
+                logger.error("fan_out error on %s: %s", device_name, e)
+                entry.update(ok=False, error=f"{type(e).__name__}: {e}")
+            finished = time.perf_counter()
+        entry["queued_ms"] = round((started - queued) * 1000, 3)
+        entry["elapsed_ms"] = round((finished - started) * 1000, 3)
+        return entry
+
+    tasks = [asyncio.create_task(run_on_device(name)) for name in device_names]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,164 @@
+"""
+This module defines the metrics of device operations and the labels of the current request.
+
+PyATSConnection and connection_methods record their phases here, so every
+API module is measured without changes. Phases are:
+  - testbed_load: building the device object from the testbed.
+  - connect: opening the SSH session.
+  - execute: running a CLI command, including the ones run by pyATS APIs and parsers.
+  - parse: parsing CLI output with Genie.
+  - api: a whole pyATS API call, which executes and parses internally.
+  - serialize: rendering the JSON response.
+"""
+
+import re
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, Iterator, Set, Tuple
+
+from config.global_settings import METRICS_BUCKETS, METRICS_MAX_COMMANDS
+from pyats_connector.testbed_cache import get_testbed_cache
+from utils.metrics import Counter, Gauge, Histogram, registry
+from utils.scheduler import scheduler
+from utils.text_utils import INTERFACE_PATTERN
+
+# Endpoint label of device operations not started by an HTTP request.
+BACKGROUND_ENDPOINT = "background"
+# Device label of names not defined in the testbed.
+UNKNOWN_DEVICE = "unknown"
+# Command label of commands beyond METRICS_MAX_COMMANDS templates.
+OTHER_COMMAND = "other"
+# Command arguments replaced by a placeholder, in order, to turn commands into templates.
+COMMAND_ARGUMENTS = (
+    (re.compile(r"\bvrf\s+\S+", re.IGNORECASE), "vrf <vrf>"),
+    (re.compile(r"\b\d{1,3}(?:\.\d{1,3}){3}(?:/\d{1,2})?\b"), "<address>"),
+    (re.compile(r"(?<![\w:])[0-9A-Fa-f]{0,4}(?::[0-9A-Fa-f]{0,4}){2,7}(?:/\d{1,3})?"), "<address>"),
+    (INTERFACE_PATTERN, "<interface>"),
+    (re.compile(r"\b\d+\b"), "<number>"),
+)
+
+_command_templates: Set[str] = set()
+_command_templates_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class RequestLabels:
+    """
+    Labels identifying the HTTP request a device operation runs for.
+    """
+
+    endpoint: str = BACKGROUND_ENDPOINT
+    device: str = ""
+
+
+request_labels: ContextVar[RequestLabels] = ContextVar(
+    "request_labels", default=RequestLabels()
+)
+
+
+def _scheduler_queue_depth() -> Dict[Tuple[str, ...], float]:
+    depths: Dict[Tuple[str, ...], float] = {}
+    for device, lane in scheduler.stats()["devices"].items():
+        key = (device if device == "_global" else device_label(device),)
+        depths[key] = depths.get(key, 0.0) + lane["queued"]
+    return depths
+
+
+PHASE_SECONDS = registry.register(
+    Histogram(
+        "pyats_phase_duration_seconds",
+        "Time spent per phase of a request.",
+        ("phase", "endpoint", "device", "command"),
+        buckets=METRICS_BUCKETS,
+    )
+)
+CONNECTION_ATTEMPTS = registry.register(
+    Counter(
+        "pyats_connection_attempts_total",
+        "Attempts to open a device session.",
+        ("device",),
+    )
+)
+CONNECTION_FAILURES = registry.register(
+    Counter(
+        "pyats_connection_failures_total",
+        "Failed attempts to open a device session.",
+        ("device",),
+    )
+)
+IN_FLIGHT = registry.register(
+    Gauge(
+        "pyats_in_flight_operations",
+        "Device operations currently holding a session, per device.",
+        ("device",),
+    )
+)
+SCHEDULER_QUEUE_DEPTH = registry.register(
+    Gauge(
+        "pyats_scheduler_queue_depth",
+        "Blocking device calls waiting for a worker, per device.",
+        ("device",),
+        collect=_scheduler_queue_depth,
+    )
+)
+
+
+def device_label(device_name: str) -> str:
+    """
+    Returns the label of a device name, "unknown" if it is not in the testbed.
+
+    Device names come from request parameters; only testbed devices become
+    labels, so made-up names cannot add series without bound.
+    """
+    if not device_name or get_testbed_cache().is_known_device(device_name):
+        return device_name
+    return UNKNOWN_DEVICE
+
+
+def command_label(command) -> str:
+    """
+    Returns the command label of a CLI command or pyATS API method.
+
+    Commands come from request parameters, so output modifiers such as
+    "| begin" are dropped and arguments such as interface names, addresses,
+    VRFs and numbers are replaced by placeholders. Past METRICS_MAX_COMMANDS
+    distinct templates, new ones are labelled "other".
+    """
+    if not isinstance(command, str):
+        command = " ; ".join(str(c).split("|", 1)[0] for c in command)
+    template = " ".join(command.split("|", 1)[0].split())
+    for pattern, placeholder in COMMAND_ARGUMENTS:
+        template = pattern.sub(placeholder, template)
+    if template in _command_templates:
+        return template
+    with _command_templates_lock:
+        if len(_command_templates) >= METRICS_MAX_COMMANDS:
+            return OTHER_COMMAND
+        _command_templates.add(template)
+    return template
+
+
+@contextmanager
+def observe_phase(phase: str, device: str, command: str = "") -> Iterator[None]:
+    """
+    Records the time spent in the block as one phase of the current request.
+
+    Args:
+      phase (str): The phase, e.g. "connect" or "parse".
+      device (str): The name of the device.
+      command (str, optional): The CLI command or pyATS API method, labelled with command_label. Defaults to "".
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        PHASE_SECONDS.observe(
+            time.perf_counter() - started,
+            phase=phase,
+            endpoint=request_labels.get().endpoint,
+            device=device_label(device),
+            command=command_label(command) if command else "",
+        )
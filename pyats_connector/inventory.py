@@ -2,9 +2,8 @@
 Script to retrieve the devices from the inventory using the pyATS framework.
 """
 
-from pyats.topology import loader
+from pyats_connector.testbed_cache import get_testbed_cache
 from utils.async_utils import asyncify
-from config.global_settings import TESTBED_FILE
 
 
 @asyncify
@@ -18,5 +17,4 @@ def get_devices_from_inventory() -> list:
     Returns:
       - list: A list of device names.
     """
-    topology = loader.load(TESTBED_FILE)
-    return list(topology.devices.names)
+    return get_testbed_cache().device_names()
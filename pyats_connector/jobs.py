@@ -0,0 +1,217 @@
+"""
+This module runs long device operations as background jobs.
+
+Jobs are queued on a bounded queue and executed by a fixed number of workers,
+using the same connector functions as the HTTP endpoints. Finished jobs and
+their results are kept for a retention period so clients can poll for them.
+"""
+
+import asyncio
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from config.global_settings import (
+    JOB_WORKERS,
+    JOB_QUEUE_MAX_SIZE,
+    JOB_DEVICE_TIMEOUT,
+    JOB_RETENTION,
+)
+from log_config.logger_setup import logger
+from pyats_connector.fleet import fan_out
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_PARTIALLY_FAILED = "partially_failed"
+JOB_FAILED = "failed"
+
+
+class JobQueueFullError(Exception):
+    """
+    Raised when a job is submitted while the job queue is full.
+    """
+
+
+@dataclass
+class Job:
+    """
+    A device operation submitted to run in the background.
+    """
+
+    operation: str
+    func: Callable[..., Awaitable]
+    device_names: List[str]
+    params: Dict = field(default_factory=dict)
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = JOB_QUEUED
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    results: Dict[str, any] = field(default_factory=dict)
+    errors: Dict[str, str] = field(default_factory=dict)
+
+    def to_dict(self) -> dict:
+        """
+        Returns the job status, progress and the results collected so far.
+        """
+        return {
+            "job_id": self.id,
+            "operation": self.operation,
+            "params": self.params,
+            "status": self.status,
+            "progress": {
+                "completed": len(self.results) + len(self.errors),
+                "failed": len(self.errors),
+                "total": len(self.device_names),
+            },
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "results": self.results,
+            "errors": self.errors,
+        }
+
+
+class JobManager:
+    """
+    Queues jobs and runs them on a bounded pool of asyncio workers.
+    """
+
+    def __init__(
+        self,
+        workers: int = JOB_WORKERS,
+        max_queue_size: int = JOB_QUEUE_MAX_SIZE,
+        retention: float = JOB_RETENTION,
+    ):
+        self.workers = max(1, workers)
+        self.max_queue_size = max_queue_size
+        self.retention = retention
+        self._jobs: Dict[str, Job] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        """
+        Starts the job workers. Must be called from the running event loop.
+        """
+        self._queue = asyncio.Queue(maxsize=self.max_queue_size)
+        self._tasks = [
+            asyncio.create_task(self._worker()) for _ in range(self.workers)
+        ]
+
+    async def stop(self) -> None:
+        """
+        Cancels the job workers. Queued jobs are not executed.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(
+        self,
+        operation: str,
+        func: Callable[..., Awaitable],
+        device_names: List[str],
+        params: Optional[Dict] = None,
+    ) -> Job:
+        """
+        Queues a job running an operation on one or more devices.
+
+        Args:
+          operation (str): The name of the operation, reported back to the client.
+          func (callable): Async function called as func(device_name, **params).
+          device_names (list[str]): The devices the operation runs on.
+          params (dict, optional): Extra arguments for the operation.
+
+        Returns:
+          Job: The queued job.
+
+        Raises:
+          JobQueueFullError: If the job queue is full.
+        """
+        self._prune()
+        job = Job(operation, func, device_names, params or {})
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull as exc:
+            raise JobQueueFullError(
+                f"Job queue is full ({self.max_queue_size} jobs)"
+            ) from exc
+        self._jobs[job.id] = job
+        logger.info("JOB %s queued: %s on %s", job.id, operation, device_names)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """
+        Returns a job by id, or None if it is unknown or expired.
+        """
+        self._prune()
+        return self._jobs.get(job_id)
+
+    def stats(self) -> dict:
+        """
+        Returns the number of jobs per status and the queue usage.
+
+        Returns:
+          dict: Job statistics.
+        """
+        by_status: Dict[str, int] = {}
+        for job in self._jobs.values():
+            by_status[job.status] = by_status.get(job.status, 0) + 1
+        return {
+            "jobs": by_status,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "max_queue_size": self.max_queue_size,
+            "workers": self.workers,
+        }
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job) -> None:
+        job.status = JOB_RUNNING
+        job.started_at = time.time()
+        logger.info("JOB %s started", job.id)
+        try:
+            async for entry in fan_out(
+                job.device_names,
+                job.func,
+                job.params,
+                timeout=JOB_DEVICE_TIMEOUT,
+            ):
+                if entry["ok"]:
+                    job.results[entry["device"]] = entry["result"]
+                else:
+                    job.errors[entry["device"]] = entry["error"]
+            if not job.errors:
+                job.status = JOB_SUCCEEDED
+            elif job.results:
+                job.status = JOB_PARTIALLY_FAILED
+            else:
+                job.status = JOB_FAILED
+        except Exception as e:
+            logger.error("JOB %s failed: %s", job.id, e)
+            job.errors["job"] = f"{type(e).__name__}: {e}"
+            job.status = JOB_FAILED
+        job.finished_at = time.time()
+        logger.info("JOB %s finished: %s", job.id, job.status)
+
+    def _prune(self) -> None:
+        expiry = time.time() - self.retention
+        for job_id in [
+            job.id
+            for job in self._jobs.values()
+            if job.finished_at is not None and job.finished_at < expiry
+        ]:
+            del self._jobs[job_id]
+
+
+job_manager = JobManager()
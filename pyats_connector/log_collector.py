@@ -0,0 +1,266 @@
+"""
+This module collects device log buffers incrementally and indexes the lines.
+
+The first collection reads the whole buffer. Later collections ask the device
+only for the lines starting at the last line already seen, using
+"show logging | begin <timestamp>". Lines are kept in a bounded buffer per
+device and indexed by interface name and by the health keywords, so log
+queries don't pull the full buffer from the device again.
+"""
+
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional
+
+from config.global_settings import (
+    LOG_COLLECTOR_MAX_LINES,
+    LOG_COLLECTOR_MIN_REFRESH_INTERVAL,
+    LOG_COLLECTOR_INDEXED_KEYWORDS,
+)
+from log_config.logger_setup import logger
+from pyats_connector.connection_methods import execute_connect
+from utils.text_utils import INTERFACE_PATTERN
+
+TIMESTAMP_PATTERN = re.compile(
+    r"^[*.]?(?P<timestamp>[A-Z][a-z]{2}\s+\d{1,2}\s+(?:\d{4}\s+)?\d{1,2}:\d{2}:\d{2}(?:\.\d+)?)"
+)
+LOG_BUFFER_HEADER = "Log Buffer"
+# Characters with a special meaning in IOS regular expressions.
+IOS_REGEX_SPECIAL_CHARACTERS = set(".*+^$[]()|\\_")
+# Longest anchor used when a log line has no timestamp.
+ANCHOR_MAX_LENGTH = 60
+
+
+@dataclass
+class _DeviceLog:
+    lines: "OrderedDict[int, str]" = field(default_factory=OrderedDict)
+    next_seq: int = 0
+    interfaces: Dict[str, List[int]] = field(default_factory=dict)
+    keywords: Dict[str, List[int]] = field(default_factory=dict)
+    index_size: int = 0
+    last_fetch: Optional[float] = None
+    fetches: int = 0
+    full_fetches: int = 0
+    lines_collected: int = 0
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class LogCollector:
+    """
+    Collects and indexes the log buffer of devices.
+    """
+
+    def __init__(
+        self,
+        execute: Callable[[str, str], str] = execute_connect,
+        max_lines: int = LOG_COLLECTOR_MAX_LINES,
+        min_refresh_interval: float = LOG_COLLECTOR_MIN_REFRESH_INTERVAL,
+        indexed_keywords: Iterable[str] = LOG_COLLECTOR_INDEXED_KEYWORDS,
+    ):
+        self._execute = execute
+        self.max_lines = max(1, max_lines)
+        self.min_refresh_interval = min_refresh_interval
+        # Indexed lowercase, keyword searches are case insensitive.
+        self.indexed_keywords = list(
+            dict.fromkeys(keyword.lower() for keyword in indexed_keywords)
+        )
+        self._logs: Dict[str, _DeviceLog] = {}
+        self._logs_lock = threading.Lock()
+
+    def refresh(self, device_name: str, force: bool = False) -> int:
+        """
+        Collects the log lines added on the device since the last collection.
+
+        Args:
+          device_name (str): The name of the device.
+          force (bool, optional): Ask the device even if the last collection is recent. Defaults to False.
+
+        Returns:
+          int: The number of new lines.
+        """
+        log = self._get_log(device_name)
+        with log.lock:
+            now = time.monotonic()
+            if (
+                not force
+                and log.last_fetch is not None
+                and now - log.last_fetch < self.min_refresh_interval
+            ):
+                return 0
+            new_lines = self._fetch_new_lines(device_name, log)
+            self._append(log, new_lines)
+            log.last_fetch = now
+        logger.debug("LOG COLLECTOR %s new lines on %s", len(new_lines), device_name)
+        return len(new_lines)
+
+    def search(self, device_name: str, keywords: List[str]) -> List[str]:
+        """
+        Returns the collected lines containing any of the keywords. Matching is case insensitive.
+
+        Args:
+          device_name (str): The name of the device.
+          keywords (list[str]): Keywords to look for.
+
+        Returns:
+          list: The matching log lines, oldest first.
+        """
+        self.refresh(device_name)
+        log = self._get_log(device_name)
+        with log.lock:
+            seqs = set()
+            for keyword in keywords:
+                keyword = keyword.lower()
+                if keyword in log.keywords:
+                    seqs.update(log.keywords[keyword])
+                else:
+                    seqs.update(
+                        seq
+                        for seq, line in log.lines.items()
+                        if keyword in line.lower()
+                    )
+            return self._lines(log, seqs)
+
+    def interface_lines(
+        self, device_name: str, interface_names: List[str]
+    ) -> Dict[str, List[str]]:
+        """
+        Returns the collected lines mentioning each interface.
+
+        Args:
+          device_name (str): The name of the device.
+          interface_names (list[str]): The interfaces to look for.
+
+        Returns:
+          dict: Interface name to its log lines, oldest first.
+        """
+        self.refresh(device_name)
+        log = self._get_log(device_name)
+        result = {}
+        with log.lock:
+            for interface_name in interface_names:
+                if interface_name in log.interfaces:
+                    seqs = log.interfaces[interface_name]
+                else:
+                    seqs = [
+                        seq
+                        for seq, line in log.lines.items()
+                        if interface_name in line
+                    ]
+                result[interface_name] = self._lines(log, seqs)
+        return result
+
+    def stats(self) -> dict:
+        """
+        Returns the lines held and the collections made per device.
+
+        Returns:
+          dict: Log collector statistics.
+        """
+        with self._logs_lock:
+            logs = dict(self._logs)
+        return {
+            "max_lines": self.max_lines,
+            "devices": {
+                device_name: {
+                    "lines": len(log.lines),
+                    "lines_collected": log.lines_collected,
+                    "fetches": log.fetches,
+                    "full_fetches": log.full_fetches,
+                    "interfaces_indexed": len(log.interfaces),
+                }
+                for device_name, log in logs.items()
+            },
+        }
+
+    def _get_log(self, device_name: str) -> _DeviceLog:
+        with self._logs_lock:
+            return self._logs.setdefault(device_name, _DeviceLog())
+
+    def _fetch_new_lines(self, device_name: str, log: _DeviceLog) -> List[str]:
+        anchor = next(reversed(log.lines.values())) if log.lines else None
+        log.fetches += 1
+        if anchor is not None:
+            output = self._execute(
+                device_name, f"show logging | begin {_begin_pattern(anchor)}"
+            )
+            new_lines = _after_anchor(_log_lines(output), anchor)
+            if new_lines is not None:
+                return new_lines
+
+        # First collection, or the last line seen left the device buffer.
+        log.full_fetches += 1
+        lines = _log_lines(self._execute(device_name, "show logging"))
+        if anchor is not None:
+            new_lines = _after_anchor(lines, anchor)
+            if new_lines is not None:
+                return new_lines
+            known = set(log.lines.values())
+            return [line for line in lines if line not in known]
+        return lines
+
+    def _append(self, log: _DeviceLog, new_lines: List[str]) -> None:
+        for line in new_lines:
+            seq = log.next_seq
+            log.next_seq += 1
+            log.lines[seq] = line
+            self._index(log, seq, line)
+        log.lines_collected += len(new_lines)
+        while len(log.lines) > self.max_lines:
+            log.lines.popitem(last=False)
+        if log.index_size > 2 * self.max_lines:
+            self._rebuild_index(log)
+
+    def _index(self, log: _DeviceLog, seq: int, line: str) -> None:
+        for interface_name in set(INTERFACE_PATTERN.findall(line)):
+            log.interfaces.setdefault(interface_name, []).append(seq)
+            log.index_size += 1
+        lowered = line.lower()
+        for keyword in self.indexed_keywords:
+            if keyword in lowered:
+                log.keywords.setdefault(keyword, []).append(seq)
+                log.index_size += 1
+
+    def _rebuild_index(self, log: _DeviceLog) -> None:
+        log.interfaces = {}
+        log.keywords = {}
+        log.index_size = 0
+        for seq, line in log.lines.items():
+            self._index(log, seq, line)
+
+    @staticmethod
+    def _lines(log: _DeviceLog, seqs: Iterable[int]) -> List[str]:
+        return [log.lines[seq] for seq in sorted(seqs) if seq in log.lines]
+
+
+def _log_lines(output: str) -> List[str]:
+    lines = (output or "").splitlines()
+    for index in range(len(lines) - 1, -1, -1):
+        if lines[index].startswith(LOG_BUFFER_HEADER):
+            lines = lines[index + 1 :]
+            break
+    return [line.rstrip() for line in lines if line.strip()]
+
+
+def _after_anchor(lines: List[str], anchor: str) -> Optional[List[str]]:
+    for index in range(len(lines) - 1, -1, -1):
+        if lines[index] == anchor:
+            return lines[index + 1 :]
+    return None
+
+
+def _begin_pattern(line: str) -> str:
+    match = TIMESTAMP_PATTERN.match(line)
+    text = match.group("timestamp") if match else line[:ANCHOR_MAX_LENGTH]
+    # "?" would open the CLI context help, match any character instead.
+    return "".join(
+        "." if char == "?"
+        else "\\" + char if char in IOS_REGEX_SPECIAL_CHARACTERS
+        else char
+        for char in text
+    )
+
+
+log_collector = LogCollector()
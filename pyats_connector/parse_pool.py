@@ -0,0 +1,307 @@
+"""
+This module parses large CLI outputs with Genie in worker processes instead of threads.
+
+Genie parsing is pure Python, so parses running in threads hold the GIL and are
+serialized across every concurrent request. When PARSE_POOL_ENABLED is set,
+outputs of at least PARSE_POOL_MIN_OUTPUT_SIZE characters are sent to a pool of
+PARSE_POOL_WORKERS processes and the parsed dict is sent back. Smaller outputs
+are parsed in the calling thread, where sending them would cost more than parsing.
+
+Workers are started with the server and import the parsers of
+PARSE_POOL_PREWARM_COMMANDS for every OS in the testbed beforehand, so the
+first request does not pay for it. A parse taking longer than
+PARSE_POOL_TIMEOUT seconds fails with TimeoutError. A running worker cannot be
+interrupted, so new parses go to a new pool at once, while the old pool is
+terminated only after the other parses it was running have finished or
+reached their own timeout.
+"""
+
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import CancelledError, Future, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from concurrent.futures import FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from config.global_settings import (
+    PARSE_POOL_ENABLED,
+    PARSE_POOL_WORKERS,
+    PARSE_POOL_MIN_OUTPUT_SIZE,
+    PARSE_POOL_TIMEOUT,
+    PARSE_POOL_PREWARM_COMMANDS,
+)
+from log_config.logger_setup import logger
+
+# Device attributes Genie uses to select a parser.
+DeviceProfile = Tuple[Tuple[str, str], ...]
+PROFILE_ATTRIBUTES = ("os", "platform", "model")
+
+# Unconnected devices per profile, in each worker process.
+_worker_devices: Dict[DeviceProfile, object] = {}
+
+
+def device_profile(device) -> DeviceProfile:
+    """
+    Returns the attributes selecting the parsers of a device, as sent to the workers.
+    """
+    return tuple(
+        (attribute, getattr(device, attribute))
+        for attribute in PROFILE_ATTRIBUTES
+        if getattr(device, attribute, None)
+    )
+
+
+def _worker_device(profile: DeviceProfile):
+    device = _worker_devices.get(profile)
+    if device is None:
+        from pyats.topology import loader
+
+        # Never connected, the loader only requires a connection to be defined.
+        definition = {
+            "type": "router",
+            "connections": {"cli": {"protocol": "ssh", "ip": "127.0.0.1"}},
+            **dict(profile),
+        }
+        device = loader.load({"devices": {"parser": definition}}).devices["parser"]
+        _worker_devices[profile] = device
+    return device
+
+
+def _warm_worker(profiles: List[DeviceProfile], commands: List[str]) -> None:
+    from genie.libs.parser.utils import get_parser
+
+    for profile in profiles:
+        for command in commands:
+            try:
+                get_parser(command, _worker_device(profile))
+            except Exception:
+                # Commands without a parser for this OS are imported on first use, if ever.
+                pass
+
+
+def _parse_in_worker(profile: DeviceProfile, command: str, output: str) -> dict:
+    return _worker_device(profile).parse(command, output=output)
+
+
+def _ready() -> int:
+    return os.getpid()
+
+
+class ParsePool:
+    """
+    A pool of pre-warmed processes parsing large CLI outputs.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = PARSE_POOL_ENABLED,
+        workers: int = PARSE_POOL_WORKERS,
+        min_output_size: int = PARSE_POOL_MIN_OUTPUT_SIZE,
+        timeout: float = PARSE_POOL_TIMEOUT,
+        prewarm_commands: Iterable[str] = PARSE_POOL_PREWARM_COMMANDS,
+    ):
+        self.enabled = enabled
+        self.workers = max(1, workers)
+        self.min_output_size = min_output_size
+        self.timeout = timeout
+        self.prewarm_commands = list(prewarm_commands)
+        self._profiles: List[DeviceProfile] = []
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # Parses submitted and not finished yet, per pool, with the time their caller gives up.
+        self._in_flight: Dict[ProcessPoolExecutor, Dict[Future, float]] = {}
+        self._lock = threading.Lock()
+        self._counters = {
+            "offloaded": 0,
+            "inline": 0,
+            "timeouts": 0,
+            "failures": 0,
+            "restarts": 0,
+        }
+
+    def start(self, devices: Iterable = ()) -> None:
+        """
+        Starts the worker processes and waits until they are warm.
+
+        Args:
+          devices (Iterable, optional): Devices whose parsers are imported in advance. Defaults to none.
+        """
+        if not self.enabled:
+            return
+        profiles = {device_profile(device) for device in devices}
+        with self._lock:
+            self._profiles = sorted(profiles)
+            executor = self._executor_locked()
+        # One call per worker so every process is spawned and initialized now.
+        futures = [executor.submit(_ready) for _ in range(self.workers)]
+        try:
+            pids = {future.result() for future in futures}
+        except BrokenProcessPool as e:
+            logger.error("PARSE POOL failed to start, parsing in threads: %s", e)
+            self.shutdown()
+            self.enabled = False
+            return
+        logger.info(
+            "PARSE POOL started %s workers, warmed for %s", len(pids), self._profiles
+        )
+
+    def parse(self, device, command: str, output: str) -> dict:
+        """
+        Parses the output of a command, in a worker process if it is large enough.
+
+        Args:
+          device: The pyATS device the output comes from.
+          command (str): The CLI command.
+          output (str): The raw output.
+
+        Returns:
+          dict: The parsed output.
+
+        Raises:
+          TimeoutError: If a worker takes longer than the pool timeout.
+        """
+        if not self.enabled or len(output) < self.min_output_size:
+            self._count("inline")
+            return device.parse(command, output=output)
+        try:
+            return self._parse_in_pool(device, command, output)
+        except CancelledError:
+            # Still queued when its pool was retired, the new pool takes it.
+            return self._parse_in_pool(device, command, output)
+
+    def _parse_in_pool(self, device, command: str, output: str) -> dict:
+        profile = device_profile(device)
+        # Submitted and registered together, so a retired pool is never given new parses.
+        with self._lock:
+            executor = self._executor_locked()
+            try:
+                future = executor.submit(_parse_in_worker, profile, command, output)
+            except (BrokenProcessPool, RuntimeError) as e:
+                future = None
+                error = e
+            else:
+                deadline = time.monotonic() + self.timeout
+                self._in_flight.setdefault(executor, {})[future] = deadline
+        if future is None:
+            logger.error("PARSE POOL unavailable, parsing in thread: %s", error)
+            self._count("failures")
+            self._retire(executor)
+            return device.parse(command, output=output)
+
+        try:
+            result = future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeoutError as e:
+            self._count("timeouts")
+            self._retire(executor, stuck=future)
+            raise TimeoutError(
+                f"Parsing '{command}' took longer than {self.timeout} seconds"
+            ) from e
+        except BrokenProcessPool as e:
+            logger.error("PARSE POOL worker died, parsing in thread: %s", e)
+            self._count("failures")
+            self._retire(executor)
+            return device.parse(command, output=output)
+        finally:
+            with self._lock:
+                self._in_flight.get(executor, {}).pop(future, None)
+        self._count("offloaded")
+        return result
+
+    def shutdown(self) -> None:
+        """
+        Stops the worker processes.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> dict:
+        """
+        Returns the parse pool settings and counters.
+
+        Returns:
+          dict: Whether the pool is enabled, its size, the size threshold, and the parses offloaded, run inline, timed out or failed.
+        """
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "workers": self.workers,
+                "min_output_size": self.min_output_size,
+                "timeout": self.timeout,
+                "running": self._executor is not None,
+                **self._counters,
+            }
+
+    def _executor_locked(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Spawned, not forked: the server runs threads that must not be copied mid-operation.
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_warm_worker,
+                initargs=(self._profiles, self.prewarm_commands),
+            )
+        return self._executor
+
+    def _retire(
+        self, executor: ProcessPoolExecutor, stuck: Optional[Future] = None
+    ) -> None:
+        with self._lock:
+            if self._executor is not executor:
+                return
+            self._executor = None
+            self._counters["restarts"] += 1
+            others = set(self._in_flight.get(executor, {})) - {stuck}
+        # Parses not started yet are sent to the new pool by their caller.
+        for future in others:
+            future.cancel()
+        threading.Thread(
+            target=self._drain,
+            args=(executor, stuck),
+            name="parse-pool-drain",
+            daemon=True,
+        ).start()
+        logger.warning(
+            "PARSE POOL replaced, %s parses left to finish on the old pool",
+            sum(not future.done() for future in others),
+        )
+
+    def _drain(self, executor: ProcessPoolExecutor, stuck: Optional[Future]) -> None:
+        # Wait for each parse still running to finish or reach its own deadline.
+        while True:
+            with self._lock:
+                running = {
+                    future: deadline
+                    for future, deadline in self._in_flight.get(executor, {}).items()
+                    if future is not stuck and not future.done()
+                }
+            now = time.monotonic()
+            running = {
+                future: deadline
+                for future, deadline in running.items()
+                if deadline > now
+            }
+            if not running:
+                break
+            wait(
+                running,
+                timeout=min(running.values()) - now,
+                return_when=FIRST_COMPLETED,
+            )
+        # A stuck worker is not interrupted by shutdown, terminate the processes.
+        for process in list((getattr(executor, "_processes", None) or {}).values()):
+            process.terminate()
+        executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            self._in_flight.pop(executor, None)
+        logger.info("PARSE POOL old pool terminated")
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+
+
+parse_pool = ParsePool()
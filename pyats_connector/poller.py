@@ -0,0 +1,212 @@
+"""
+This module polls devices in the background and keeps the latest results in memory.
+
+Each dataset is refreshed per device at its own interval, with jitter so polls
+do not line up, and under a global concurrency cap. Endpoints can then answer
+from the snapshot store instead of opening a device session.
+"""
+
+import asyncio
+import fnmatch
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from config.global_settings import (
+    POLLER_INTERVALS,
+    POLLER_JITTER,
+    POLLER_MAX_CONCURRENCY,
+)
+from log_config.logger_setup import logger
+from pyats_connector.result_cache import request_cache_policy, CachePolicy
+
+
+@dataclass
+class Snapshot:
+    """
+    The result of one dataset poll on one device.
+    """
+
+    data: any
+    timestamp: float
+    duration: float
+
+    @property
+    def age(self) -> float:
+        """
+        Seconds since the snapshot was taken.
+        """
+        return max(0.0, time.time() - self.timestamp)
+
+    @property
+    def timestamp_iso(self) -> str:
+        """
+        The time the snapshot was taken, in ISO 8601 UTC.
+        """
+        return datetime.fromtimestamp(self.timestamp, tz=timezone.utc).isoformat()
+
+
+class SnapshotStore:
+    """
+    Latest snapshot per device and dataset.
+    """
+
+    def __init__(self):
+        self._snapshots: Dict[Tuple[str, str], Snapshot] = {}
+        self._errors: Dict[Tuple[str, str], str] = {}
+
+    def put(self, device_name: str, dataset: str, snapshot: Snapshot) -> None:
+        """
+        Stores the latest snapshot of a dataset for a device.
+        """
+        self._snapshots[(device_name, dataset)] = snapshot
+        self._errors.pop((device_name, dataset), None)
+
+    def put_error(self, device_name: str, dataset: str, error: str) -> None:
+        """
+        Records a failed poll. The previous snapshot, if any, is kept.
+        """
+        self._errors[(device_name, dataset)] = error
+
+    def get(self, device_name: str, dataset: str) -> Optional[Snapshot]:
+        """
+        Returns the latest snapshot of a dataset for a device, or None.
+        """
+        return self._snapshots.get((device_name, dataset))
+
+    def stats(self) -> dict:
+        """
+        Returns the age of every snapshot and the last poll error per device and dataset.
+
+        Returns:
+          dict: Snapshot store statistics.
+        """
+        devices: Dict[str, dict] = {}
+        for (device_name, dataset), snapshot in self._snapshots.items():
+            devices.setdefault(device_name, {})[dataset] = {
+                "timestamp": snapshot.timestamp_iso,
+                "age_sec": round(snapshot.age, 3),
+                "duration_sec": round(snapshot.duration, 3),
+            }
+        for (device_name, dataset), error in self._errors.items():
+            devices.setdefault(device_name, {}).setdefault(dataset, {})[
+                "error"
+            ] = error
+        return {"snapshots": len(self._snapshots), "devices": devices}
+
+
+class Poller:
+    """
+    Refreshes datasets on devices at configured intervals.
+    """
+
+    def __init__(
+        self,
+        store: SnapshotStore,
+        intervals: Dict[str, float] = POLLER_INTERVALS,
+        jitter: float = POLLER_JITTER,
+        max_concurrency: int = POLLER_MAX_CONCURRENCY,
+    ):
+        self.store = store
+        self.intervals = intervals
+        self.jitter = jitter
+        self.max_concurrency = max(1, max_concurrency)
+        self._tasks: List[asyncio.Task] = []
+
+    def start(
+        self,
+        device_names: List[str],
+        datasets: Dict[str, Callable[[str], Awaitable]],
+    ) -> None:
+        """
+        Starts polling every dataset with a configured interval on every device.
+
+        Args:
+          device_names (list[str]): The devices to poll.
+          datasets (dict): Dataset name to async function called as func(device_name).
+        """
+        slots = asyncio.Semaphore(self.max_concurrency)
+        for dataset, func in datasets.items():
+            interval = self.intervals.get(dataset)
+            if not interval:
+                continue
+            for device_name in device_names:
+                self._tasks.append(
+                    asyncio.create_task(
+                        self._poll_loop(device_name, dataset, func, interval, slots)
+                    )
+                )
+        logger.info(
+            "POLLER started %s tasks on %s devices", len(self._tasks), len(device_names)
+        )
+
+    async def stop(self) -> None:
+        """
+        Stops all polling tasks.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _poll_loop(
+        self,
+        device_name: str,
+        dataset: str,
+        func: Callable[[str], Awaitable],
+        interval: float,
+        slots: asyncio.Semaphore,
+    ) -> None:
+        # Polls always read the device, refreshing the result cache on the way.
+        request_cache_policy.set(CachePolicy(max_age=0))
+        # Spread the first polls over one interval.
+        await asyncio.sleep(random.uniform(0, interval))
+        while True:
+            async with slots:
+                await self._poll(device_name, dataset, func)
+            await asyncio.sleep(
+                interval * (1 + random.uniform(-self.jitter, self.jitter))
+            )
+
+    async def _poll(
+        self, device_name: str, dataset: str, func: Callable[[str], Awaitable]
+    ) -> None:
+        started = time.perf_counter()
+        try:
+            data = await func(device_name)
+        except Exception as e:
+            logger.error("POLLER %s on %s failed: %s", dataset, device_name, e)
+            self.store.put_error(device_name, dataset, f"{type(e).__name__}: {e}")
+            return
+        self.store.put(
+            device_name,
+            dataset,
+            Snapshot(data, time.time(), time.perf_counter() - started),
+        )
+
+
+snapshot_store = SnapshotStore()
+poller = Poller(snapshot_store)
+
+
+def select_devices(selectors: str, inventory: List[str]) -> List[str]:
+    """
+    Selects the devices to poll.
+
+    Args:
+      selectors (str): Comma separated device names or glob patterns. Empty selects every device.
+      inventory (list[str]): The devices of the inventory.
+
+    Returns:
+      list: The devices to poll.
+    """
+    patterns = [s.strip() for s in selectors.split(",") if s.strip()]
+    if not patterns:
+        return inventory
+    return [
+        name
+        for name in inventory
+        if any(fnmatch.fnmatch(name, pattern) for pattern in patterns)
+    ]
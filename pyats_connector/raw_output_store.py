@@ -0,0 +1,229 @@
+"""
+This module keeps the raw text of CLI commands captured from devices, keyed by device,
+command and capture time.
+
+Parsers run on the stored text instead of executing the command themselves, so
+endpoints and parsers needing the same command within RAW_OUTPUT_MAX_AGE
+seconds share one capture, and stored captures can be parsed again, e.g. after
+a Genie upgrade, without touching the device.
+
+The last RAW_OUTPUT_HISTORY captures are kept per device and command, up to
+RAW_OUTPUT_MAX_BYTES of text in total. Least recently used commands are dropped first.
+"""
+
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from typing import Callable, Deque, List, Optional, Tuple
+
+from config.global_settings import (
+    RAW_OUTPUT_MAX_AGE,
+    RAW_OUTPUT_HISTORY,
+    RAW_OUTPUT_MAX_BYTES,
+)
+from pyats_connector.result_cache import request_cache_policy
+from pyats_connector.single_flight import single_flight
+from log_config.logger_setup import logger
+
+
+@dataclass(frozen=True)
+class RawCapture:
+    """
+    The raw output of a CLI command as returned by the device.
+    """
+
+    device_name: str
+    command: str
+    output: str
+    captured_at: float
+    duration: float
+
+    def info(self) -> dict:
+        """
+        Returns the capture without its output.
+        """
+        return {
+            "device_name": self.device_name,
+            "command": self.command,
+            "captured_at": self.captured_at,
+            "duration": round(self.duration, 4),
+            "size": len(self.output),
+        }
+
+
+class RawOutputStore:
+    """
+    Recent raw CLI captures per device and command.
+    """
+
+    def __init__(
+        self,
+        max_age: float = RAW_OUTPUT_MAX_AGE,
+        history: int = RAW_OUTPUT_HISTORY,
+        max_bytes: int = RAW_OUTPUT_MAX_BYTES,
+    ):
+        self.max_age = max_age
+        self.history = history
+        self.max_bytes = max_bytes
+        self._captures: "OrderedDict[Tuple[str, str], Deque[RawCapture]]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._counters = {"captures": 0, "shared": 0, "evictions": 0}
+
+    def capture(
+        self, device_name: str, command: str, execute: Callable[[], str]
+    ) -> RawCapture:
+        """
+        Returns a capture of the command, reusing the latest one if recent enough.
+
+        The request cache policy can lower the accepted age, max-age=0 always
+        executes the command. Concurrent captures of the same command are coalesced.
+
+        Args:
+          device_name (str): The name of the device.
+          command (str): The CLI command.
+          execute (callable): Runs the command on the device and returns its output.
+
+        Returns:
+          RawCapture: The capture of the command.
+        """
+        shared = self.shared(device_name, command)
+        if shared is not None:
+            return shared
+        return single_flight.do(
+            ("raw_output", device_name, command),
+            lambda: self._run(device_name, command, execute),
+        )
+
+    def shared(self, device_name: str, command: str) -> Optional[RawCapture]:
+        """
+        Returns the latest capture of the command if the current request accepts its age, or None.
+        """
+        max_age = self.max_age
+        policy = request_cache_policy.get()
+        if policy is not None and policy.max_age is not None:
+            max_age = min(max_age, policy.max_age)
+        latest = self.latest(device_name, command)
+        if latest is None or max_age <= 0 or time.time() - latest.captured_at > max_age:
+            return None
+        with self._lock:
+            self._counters["shared"] += 1
+        return latest
+
+    def record(
+        self,
+        device_name: str,
+        command: str,
+        output: str,
+        captured_at: float,
+        duration: float,
+    ) -> RawCapture:
+        """
+        Stores the output of a command executed by the caller.
+        """
+        capture = RawCapture(
+            device_name=device_name,
+            command=command,
+            output=output if isinstance(output, str) else str(output),
+            captured_at=captured_at,
+            duration=duration,
+        )
+        self._store(capture)
+        return capture
+
+    def latest(self, device_name: str, command: str) -> Optional[RawCapture]:
+        """
+        Returns the most recent capture of a command, or None.
+        """
+        with self._lock:
+            captures = self._captures.get((device_name, command))
+            return captures[-1] if captures else None
+
+    def get(
+        self, device_name: str, command: str, captured_at: Optional[float] = None
+    ) -> Optional[RawCapture]:
+        """
+        Returns a stored capture of a command.
+
+        Args:
+          device_name (str): The name of the device.
+          command (str): The CLI command.
+          captured_at (float, optional): Capture time as returned by list_captures. Defaults to the latest capture.
+
+        Returns:
+          RawCapture: The capture, or None if it is not stored.
+        """
+        if captured_at is None:
+            return self.latest(device_name, command)
+        with self._lock:
+            for capture in self._captures.get((device_name, command), ()):
+                if capture.captured_at == captured_at:
+                    return capture
+        return None
+
+    def list_captures(self, device_name: Optional[str] = None) -> List[dict]:
+        """
+        Lists the stored raw CLI captures, without their output.
+
+        Args:
+          device_name (str, optional): Only list captures of this device. Defaults to every device.
+
+        Returns:
+          list: Device, command, capture time, duration and size of every stored capture.
+        """
+        with self._lock:
+            return [
+                capture.info()
+                for (name, _), captures in self._captures.items()
+                if device_name is None or name == device_name
+                for capture in captures
+            ]
+
+    def stats(self) -> dict:
+        """
+        Returns the raw output store counters and size.
+
+        Returns:
+          dict: Captures made, captures shared between requests, evictions, commands and bytes stored.
+        """
+        with self._lock:
+            return {
+                **self._counters,
+                "commands": len(self._captures),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "max_age": self.max_age,
+            }
+
+    def _run(self, device_name: str, command: str, execute: Callable[[], str]) -> RawCapture:
+        captured_at = time.time()
+        started = time.perf_counter()
+        output = execute()
+        return self.record(
+            device_name, command, output, captured_at, time.perf_counter() - started
+        )
+
+    def _store(self, capture: RawCapture) -> None:
+        key = (capture.device_name, capture.command)
+        with self._lock:
+            self._counters["captures"] += 1
+            captures = self._captures.get(key)
+            if captures is None:
+                captures = self._captures[key] = deque()
+            captures.append(capture)
+            self._captures.move_to_end(key)
+            self._size += len(capture.output)
+            while len(captures) > self.history:
+                self._size -= len(captures.popleft().output)
+            while self._size > self.max_bytes and len(self._captures) > 1:
+                evicted_key, evicted = self._captures.popitem(last=False)
+                if evicted_key == key:
+                    self._captures[key] = evicted
+                    break
+                self._size -= sum(len(c.output) for c in evicted)
+                self._counters["evictions"] += 1
+                logger.debug("RAW OUTPUT evicted %s", evicted_key)
+
+
+raw_output_store = RawOutputStore()
@@ -0,0 +1,280 @@
+"""
+This module provides a TTL cache for the output of read-only device operations.
+
+Entries are keyed by device, pyATS API method or CLI command, and arguments.
+Expired entries are still served for a grace period while a single background
+refresh replaces them (stale-while-revalidate). Refreshes are queued on the
+device scheduler, so they count against the per-device concurrency limit.
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+from config.global_settings import (
+    RESULT_CACHE_ENABLED,
+    RESULT_CACHE_TTLS,
+    RESULT_CACHE_STALE_WHILE_REVALIDATE,
+    RESULT_CACHE_MAX_ENTRIES,
+)
+from log_config.logger_setup import logger
+from utils.scheduler import scheduler, SchedulerOverloadedError
+
+
+@dataclass
+class CachePolicy:
+    """
+    Cache preferences of the current request and what the cache did for it.
+
+    A max_age of None uses the configured TTL, 0 bypasses the cache.
+    """
+
+    max_age: Optional[float] = None
+    status: Optional[str] = None
+    age: Optional[float] = None
+
+    def record(self, status: str, age: float) -> None:
+        """
+        Records a cache outcome, keeping the oldest age served to the request.
+        """
+        if self.age is None or age >= self.age:
+            self.status = status
+            self.age = age
+
+
+request_cache_policy: ContextVar[Optional[CachePolicy]] = ContextVar(
+    "request_cache_policy", default=None
+)
+
+
+_MISSING = object()
+
+
+@dataclass
+class _CacheEntry:
+    value: any
+    stored_at: float
+    refreshing: bool = False
+
+
+class ResultCache:
+    """
+    A TTL cache with stale-while-revalidate for device operation results.
+    """
+
+    def __init__(
+        self,
+        ttls: Dict[str, float],
+        stale_while_revalidate: float = RESULT_CACHE_STALE_WHILE_REVALIDATE,
+        max_entries: int = RESULT_CACHE_MAX_ENTRIES,
+        enabled: bool = RESULT_CACHE_ENABLED,
+    ):
+        self.ttls = ttls
+        self.stale_while_revalidate = stale_while_revalidate
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._entries: "OrderedDict[Tuple, _CacheEntry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {
+            "hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "bypasses": 0,
+            "refreshes": 0,
+            "invalidations": 0,
+        }
+
+    def get_or_run(
+        self,
+        device_name: str,
+        operation: str,
+        args: any,
+        run: Callable[[], any],
+    ) -> any:
+        """
+        Returns the cached result of an operation, running it when needed.
+
+        Args:
+          device_name (str): The name of the device.
+          operation (str): The pyATS API method or the CLI command.
+          args: The arguments of the operation.
+          run (callable): Executes the operation against the device.
+
+        Returns:
+          The result of the operation, possibly served from the cache.
+        """
+        ttl = self.ttls.get(operation, 0)
+        if not self.enabled or ttl <= 0:
+            return run()
+
+        policy = request_cache_policy.get()
+        max_age = ttl
+        allow_stale = True
+        if policy is not None and policy.max_age is not None:
+            max_age = min(ttl, policy.max_age)
+            allow_stale = False
+
+        key = (device_name, operation, freeze_args(args))
+        now = time.monotonic()
+        stale_value = _MISSING
+        start_refresh = False
+        with self._lock:
+            entry = self._entries.get(key)
+            age = now - entry.stored_at if entry is not None else None
+            if entry is not None and max_age > 0 and age <= max_age:
+                self._entries.move_to_end(key)
+                self._counters["hits"] += 1
+                _record(policy, "HIT", age)
+                return entry.value
+            if (
+                entry is not None
+                and allow_stale
+                and age <= ttl + self.stale_while_revalidate
+            ):
+                self._counters["stale_hits"] += 1
+                _record(policy, "STALE", age)
+                start_refresh = not entry.refreshing
+                entry.refreshing = True
+                stale_value = entry.value
+            elif max_age <= 0:
+                self._counters["bypasses"] += 1
+            else:
+                self._counters["misses"] += 1
+
+        if stale_value is not _MISSING:
+            if start_refresh:
+                self._start_refresh(key, run)
+            return stale_value
+
+        value = run()
+        self._store(key, value)
+        _record(policy, "MISS" if max_age > 0 else "BYPASS", 0.0)
+        return value
+
+    def invalidate(self, device_name: str, keyword: Optional[str] = None) -> int:
+        """
+        Drops cached results of a device.
+
+        Args:
+          device_name (str): The name of the device.
+          keyword (str, optional): Only drop operations containing this keyword. Defaults to None.
+
+        Returns:
+          int: The number of entries dropped.
+        """
+        with self._lock:
+            keys = [
+                key
+                for key in self._entries
+                if key[0] == device_name
+                and (keyword is None or keyword.lower() in key[1].lower())
+            ]
+            for key in keys:
+                del self._entries[key]
+            self._counters["invalidations"] += len(keys)
+        if keys:
+            logger.debug(
+                "RESULT CACHE invalidated %s entries for %s", len(keys), device_name
+            )
+        return len(keys)
+
+    def stats(self) -> dict:
+        """
+        Returns the result cache counters and size.
+
+        Returns:
+          dict: Result cache statistics.
+        """
+        with self._lock:
+            return {
+                **self._counters,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+            }
+
+    def _start_refresh(self, key: Tuple, run: Callable[[], any]) -> None:
+        try:
+            scheduler.submit(key[0], self._refresh, key, run)
+        except SchedulerOverloadedError as e:
+            logger.warning("RESULT CACHE refresh of %s not queued: %s", key, e)
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None:
+                    entry.refreshing = False
+
+    def _refresh(self, key: Tuple, run: Callable[[], any]) -> None:
+        logger.debug("RESULT CACHE refreshing %s", key)
+        try:
+            value = run()
+        except Exception as e:
+            logger.error("RESULT CACHE refresh failed for %s: %s", key, e)
+            value = None
+        with self._lock:
+            self._counters["refreshes"] += 1
+            entry = self._entries.get(key)
+            if entry is not None:
+                entry.refreshing = False
+        self._store(key, value)
+
+    def _store(self, key: Tuple, value: any) -> None:
+        if not _is_cacheable(value):
+            return
+        with self._lock:
+            self._entries[key] = _CacheEntry(value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+def _record(policy: Optional[CachePolicy], status: str, age: float) -> None:
+    if policy is not None:
+        policy.record(status, age)
+
+
+def freeze_args(args: any) -> str:
+    """
+    Returns a stable, hashable representation of operation arguments.
+    """
+    return json.dumps(args, sort_keys=True, default=str)
+
+
+def _is_cacheable(value: any) -> bool:
+    if value is None:
+        return False
+    # api_connect and parse_connect report failures as {name: exception}.
+    if isinstance(value, dict) and any(
+        isinstance(v, Exception) for v in value.values()
+    ):
+        return False
+    return True
+
+
+result_cache = ResultCache(RESULT_CACHE_TTLS)
+
+
+def max_age_from_cache_control(cache_control: Optional[str]) -> Optional[float]:
+    """
+    Extracts the maximum accepted age from a Cache-Control request header.
+
+    Args:
+      cache_control (str): The Cache-Control header value.
+
+    Returns:
+      float: 0 for no-cache/no-store, the max-age value, or None if not present.
+    """
+    if not cache_control:
+        return None
+    for directive in cache_control.lower().split(","):
+        directive = directive.strip()
+        if directive in ("no-cache", "no-store"):
+            return 0.0
+        if directive.startswith("max-age="):
+            try:
+                return max(0.0, float(directive.split("=", 1)[1]))
+            except ValueError:
+                return None
+    return None
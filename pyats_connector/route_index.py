@@ -0,0 +1,364 @@
+"""
+This module keeps parsed routing tables in memory, indexed for range scans and lookups.
+
+A table is pulled from the device once per ROUTE_INDEX_TTL seconds and per
+device, VRF and address family. Routes are kept sorted by prefix, so filtered
+and paged reads are range scans, and in a radix trie for longest-prefix-match.
+Each table is refreshed on its own, so the index spans the fleet while only
+devices whose table expired are asked again.
+"""
+
+import bisect
+import ipaddress
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+from config.global_settings import ROUTE_INDEX_TTL, ROUTE_INDEX_MAX_ROUTES
+from log_config.logger_setup import logger
+from pyats_connector.connection_methods import api_connect
+from pyats_connector.result_cache import request_cache_policy
+from pyats_connector.single_flight import single_flight
+from utils.radix_trie import RadixTrie
+
+
+@dataclass
+class RouteTable:
+    """
+    A parsed routing table, sorted by prefix and indexed in a radix trie.
+
+    The sorted keys and the trie only depend on the set of prefixes, so they can
+    be passed in from the previous table of the device when the set did not change.
+    """
+
+    routes: Dict[str, dict]
+    built_at: float = field(default_factory=time.monotonic)
+    build_duration: float = 0.0
+    keys: List[Tuple[int, int]] = field(default=None, repr=False)
+    prefixes: List[str] = field(default=None, repr=False)
+    trie: RadixTrie = field(default=None, repr=False)
+
+    def __post_init__(self):
+        if self.trie is not None:
+            return
+        entries = []
+        self.trie = RadixTrie()
+        for prefix in self.routes:
+            try:
+                network = ipaddress.ip_network(prefix, strict=False)
+            except ValueError:
+                logger.debug("ROUTE INDEX skipping unparsable prefix %s", prefix)
+                continue
+            entries.append(
+                ((int(network.network_address), network.prefixlen), prefix)
+            )
+            self.trie.insert(network, prefix)
+        entries.sort()
+        self.keys = [key for key, _ in entries]
+        self.prefixes = [prefix for _, prefix in entries]
+
+    @classmethod
+    def refreshed(
+        cls, previous: Optional["RouteTable"], routes: Dict[str, dict]
+    ) -> Tuple["RouteTable", bool]:
+        """
+        Builds the table for new routes, reusing the index of the previous table if the prefixes are the same.
+
+        Args:
+          previous (RouteTable, optional): The table being replaced.
+          routes (dict): The new routes.
+
+        Returns:
+          tuple: The new table, and whether the previous index was reused.
+        """
+        if previous is not None and routes.keys() == previous.routes.keys():
+            return (
+                cls(
+                    routes,
+                    keys=previous.keys,
+                    prefixes=previous.prefixes,
+                    trie=previous.trie,
+                ),
+                True,
+            )
+        return cls(routes), False
+
+    @property
+    def age(self) -> float:
+        """
+        Seconds since the table was pulled from the device.
+        """
+        return time.monotonic() - self.built_at
+
+    def lookup(self, ip: str) -> Optional[Tuple[str, dict]]:
+        """
+        Finds the most specific route to an address.
+
+        Args:
+          ip (str): The address to look up.
+
+        Returns:
+          tuple: The prefix and its route entry, or None if no route matches.
+        """
+        match = self.trie.longest_match(ip)
+        if match is None:
+            return None
+        prefix = match[1]
+        return prefix, self.routes[prefix]
+
+    def select(
+        self,
+        prefix: Optional[str] = None,
+        ge: Optional[int] = None,
+        le: Optional[int] = None,
+        protocol: Optional[str] = None,
+        next_hop: Optional[str] = None,
+        outgoing_interface: Optional[str] = None,
+        after: Optional[str] = None,
+        limit: Optional[int] = None,
+    ) -> Tuple[Dict[str, dict], Optional[str]]:
+        """
+        Returns the routes matching all the given filters, in prefix order.
+
+        Args:
+          prefix (str, optional): Only routes within this prefix, e.g. "10.0.0.0/8".
+          ge (int, optional): Minimum mask length.
+          le (int, optional): Maximum mask length.
+          protocol (str, optional): Source protocol (e.g. "isis") or protocol code (e.g. "C").
+          next_hop (str, optional): Next hop address.
+          outgoing_interface (str, optional): Outgoing interface name.
+          after (str, optional): Only routes sorted after this prefix.
+          limit (int, optional): Maximum number of routes returned.
+
+        Returns:
+          tuple: The matching routes, and the last prefix returned if more routes may follow, otherwise None.
+        """
+        start, end = 0, len(self.keys)
+        min_length = ge or 0
+        if prefix is not None:
+            network = ipaddress.ip_network(prefix, strict=False)
+            start = bisect.bisect_left(
+                self.keys, (int(network.network_address), network.prefixlen)
+            )
+            end = bisect.bisect_right(
+                self.keys, (int(network.broadcast_address), network.max_prefixlen)
+            )
+            min_length = max(min_length, network.prefixlen)
+        if after is not None:
+            last = ipaddress.ip_network(after, strict=False)
+            start = max(
+                start,
+                bisect.bisect_right(
+                    self.keys, (int(last.network_address), last.prefixlen)
+                ),
+            )
+
+        selected = {}
+        for index in range(start, end):
+            length = self.keys[index][1]
+            if length < min_length or (le is not None and length > le):
+                continue
+            route_prefix = self.prefixes[index]
+            route = self.routes[route_prefix]
+            if not _route_matches(route, protocol, next_hop, outgoing_interface):
+                continue
+            if limit is not None and len(selected) == limit:
+                return selected, next(reversed(selected))
+            selected[route_prefix] = route
+        return selected, None
+
+
+class RouteIndex:
+    """
+    Caches routing tables per device, VRF and address family.
+
+    Memory is bounded by the total number of routes held. The least recently
+    used tables are dropped first when a new table exceeds max_routes.
+    """
+
+    def __init__(
+        self, ttl: float = ROUTE_INDEX_TTL, max_routes: int = ROUTE_INDEX_MAX_ROUTES
+    ):
+        self.ttl = ttl
+        self.max_routes = max_routes
+        self._tables: "OrderedDict[Tuple[str, str, str], RouteTable]" = OrderedDict()
+        self._routes_held = 0
+        self._lock = threading.Lock()
+        self._counters = {"builds": 0, "index_reused": 0, "evictions": 0}
+
+    def table(
+        self,
+        device_name: str,
+        vrf_name: Optional[str] = None,
+        address_family: str = "ipv4",
+    ) -> Optional[RouteTable]:
+        """
+        Returns the routing table of a device, pulling it if missing or expired.
+
+        Honours the cache preferences of the current request, if any.
+
+        Args:
+          device_name (str): The name of the device.
+          vrf_name (str, optional): The name of the VRF. Defaults to None, the global table.
+          address_family (str, optional): The address family name. Defaults to "ipv4".
+
+        Returns:
+          RouteTable: The routing table, or None if the device returned no routes.
+        """
+        key = (device_name, vrf_name or "default", address_family)
+        policy = request_cache_policy.get()
+        max_age = self.ttl
+        if policy is not None and policy.max_age is not None:
+            max_age = min(max_age, policy.max_age)
+
+        with self._lock:
+            table = self._tables.get(key)
+            if table is not None:
+                self._tables.move_to_end(key)
+        if table is not None and table.age <= max_age:
+            if policy is not None:
+                policy.record("HIT", table.age)
+            return table
+
+        table = single_flight.do(
+            ("route_index",) + key,
+            lambda: self._refresh(key, vrf_name),
+        )
+        if policy is not None:
+            policy.record("MISS", 0.0)
+        return table
+
+    def lookup(
+        self, device_name: str, ip: str, vrf_name: Optional[str] = None
+    ) -> Optional[Tuple[str, dict]]:
+        """
+        Finds the most specific route to an address in the table of its address family.
+
+        Args:
+          device_name (str): The name of the device.
+          ip (str): The address to look up.
+          vrf_name (str, optional): The name of the VRF. Defaults to None, the global table.
+
+        Returns:
+          tuple: The prefix and its route entry, or None if no route matches.
+        """
+        address_family = f"ipv{ipaddress.ip_address(ip).version}"
+        table = self.table(device_name, vrf_name, address_family)
+        if table is None:
+            return None
+        return table.lookup(ip)
+
+    def invalidate(self, device_name: str) -> None:
+        """
+        Drops the cached tables of a device.
+
+        Args:
+          device_name (str): The name of the device.
+        """
+        with self._lock:
+            for key in [key for key in self._tables if key[0] == device_name]:
+                self._routes_held -= len(self._tables.pop(key).routes)
+
+    def stats(self) -> dict:
+        """
+        Returns the size, age and build time of every table held.
+
+        Returns:
+          dict: Route index statistics.
+        """
+        with self._lock:
+            tables = list(self._tables.items())
+            totals = {
+                **self._counters,
+                "tables": len(tables),
+                "routes": self._routes_held,
+                "max_routes": self.max_routes,
+            }
+        return {
+            **totals,
+            "entries": [
+                {
+                    "device": device_name,
+                    "vrf": vrf_name,
+                    "address_family": address_family,
+                    "routes": len(table.routes),
+                    "age": round(table.age, 3),
+                    "build_seconds": round(table.build_duration, 3),
+                }
+                for (device_name, vrf_name, address_family), table in tables
+            ],
+        }
+
+    def _refresh(
+        self, key: Tuple[str, str, str], vrf_name: Optional[str]
+    ) -> Optional[RouteTable]:
+        device_name, _, address_family = key
+        started = time.monotonic()
+        result = api_connect(
+            device_name=device_name,
+            method="get_routing_routes",
+            args={"vrf": vrf_name, "address_family": address_family},
+        )
+        if not result or isinstance(result.get("get_routing_routes"), Exception):
+            return None
+
+        with self._lock:
+            previous = self._tables.get(key)
+        table, reused = RouteTable.refreshed(previous, result)
+        table.build_duration = time.monotonic() - started
+        self._store(key, table, reused)
+        logger.info(
+            "ROUTE INDEX %s %s routes for %s vrf %s in %.2fs",
+            "refreshed" if reused else "built",
+            len(table.routes),
+            device_name,
+            key[1],
+            table.build_duration,
+        )
+        return table
+
+    def _store(self, key: Tuple[str, str, str], table: RouteTable, reused: bool) -> None:
+        with self._lock:
+            previous = self._tables.pop(key, None)
+            if previous is not None:
+                self._routes_held -= len(previous.routes)
+            self._tables[key] = table
+            self._routes_held += len(table.routes)
+            self._counters["builds"] += 1
+            self._counters["index_reused"] += int(reused)
+            while self._routes_held > self.max_routes and len(self._tables) > 1:
+                evicted_key, evicted = self._tables.popitem(last=False)
+                self._routes_held -= len(evicted.routes)
+                self._counters["evictions"] += 1
+                logger.info("ROUTE INDEX evicted %s", evicted_key)
+
+
+def _route_matches(
+    route: dict,
+    protocol: Optional[str],
+    next_hop: Optional[str],
+    outgoing_interface: Optional[str],
+) -> bool:
+    if protocol is not None and protocol.lower() != str(
+        route.get("source_protocol", "")
+    ).lower() and protocol != route.get("source_protocol_codes"):
+        return False
+    if next_hop is None and outgoing_interface is None:
+        return True
+
+    hops = route.get("next_hop", {})
+    next_hops = set()
+    interfaces = set(hops.get("outgoing_interface", {}))
+    for hop in hops.get("next_hop_list", {}).values():
+        next_hops.add(hop.get("next_hop"))
+        interfaces.add(hop.get("outgoing_interface"))
+    if next_hop is not None and next_hop not in next_hops:
+        return False
+    if outgoing_interface is not None and outgoing_interface not in interfaces:
+        return False
+    return True
+
+
+route_index = RouteIndex()
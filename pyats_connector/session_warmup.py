@@ -0,0 +1,155 @@
+"""
+This module connects to devices when the server starts, so the first requests
+after a deploy do not all pay for an SSH login at once.
+
+The devices selected by SESSION_WARMUP_DEVICES are connected in the background,
+at most SESSION_WARMUP_CONCURRENCY at a time, and their sessions are left idle
+in the connection pool. The server reports ready once
+SESSION_WARMUP_READY_RATIO of them are connected, or once SESSION_WARMUP_TIMEOUT
+seconds have passed if set.
+"""
+
+import asyncio
+import math
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from config.global_settings import (
+    SESSION_WARMUP_ENABLED,
+    SESSION_WARMUP_DEVICES,
+    SESSION_WARMUP_CONCURRENCY,
+    SESSION_WARMUP_READY_RATIO,
+    SESSION_WARMUP_TIMEOUT,
+    CONNECTION_POOL_ENABLED,
+    DEVICE_DRIVER_MODE,
+    DEVICE_SESSION_BACKEND,
+)
+from pyats_connector.async_sessions import ASYNCSSH_BACKEND, async_session_pool
+from pyats_connector.connection_handler import PyATSConnection
+from pyats_connector.device_driver import LIVE_MODE
+from pyats_connector.poller import select_devices
+from log_config.logger_setup import logger
+from utils.scheduler import scheduler
+
+
+def warm_session(device_name: str) -> None:
+    """
+    Opens a session to the device and leaves it idle in its pool.
+    """
+    if DEVICE_SESSION_BACKEND == ASYNCSSH_BACKEND and DEVICE_DRIVER_MODE == LIVE_MODE:
+        async_session_pool.warm(device_name)
+        return
+    with PyATSConnection(device_name=device_name):
+        pass
+
+
+@dataclass
+class SessionWarmup:
+    """
+    Connects to a set of devices at startup and tracks whether the server is ready.
+    """
+
+    enabled: bool = SESSION_WARMUP_ENABLED
+    selectors: str = SESSION_WARMUP_DEVICES
+    concurrency: int = SESSION_WARMUP_CONCURRENCY
+    ready_ratio: float = SESSION_WARMUP_READY_RATIO
+    timeout: float = SESSION_WARMUP_TIMEOUT
+    targets: List[str] = field(default_factory=list, init=False)
+    connected: Dict[str, float] = field(default_factory=dict, init=False)
+    failed: Dict[str, str] = field(default_factory=dict, init=False)
+    started_at: Optional[float] = field(default=None, init=False)
+    finished_at: Optional[float] = field(default=None, init=False)
+    _task: Optional[asyncio.Task] = field(default=None, init=False, repr=False)
+
+    def start(self, inventory: List[str]) -> None:
+        """
+        Starts connecting to the selected devices in the background.
+
+        Args:
+          inventory (list[str]): The devices of the inventory.
+        """
+        if not self.enabled:
+            return
+        if not CONNECTION_POOL_ENABLED and DEVICE_SESSION_BACKEND != ASYNCSSH_BACKEND:
+            logger.warning("SESSION WARMUP skipped, the connection pool is disabled")
+            self.enabled = False
+            return
+        self.targets = select_devices(self.selectors, inventory)
+        self.started_at = time.monotonic()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """
+        Stops the warm-up if it is still running.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def is_ready(self) -> bool:
+        """
+        Whether enough devices are connected, or the warm-up timed out.
+        """
+        if not self.enabled:
+            return True
+        if len(self.connected) >= self.required():
+            return True
+        return bool(self.timeout) and time.monotonic() - self.started_at >= self.timeout
+
+    def required(self) -> int:
+        """
+        Number of connected devices needed to be ready.
+        """
+        ratio = min(max(self.ready_ratio, 0.0), 1.0)
+        return math.ceil(len(self.targets) * ratio)
+
+    def status(self) -> dict:
+        """
+        Returns the readiness of the server and the progress of the session warm-up.
+
+        Returns:
+          dict: Whether the server is ready, the devices selected, connected and failed, the number of connected devices required, and the warm-up duration.
+        """
+        end = self.finished_at or time.monotonic()
+        return {
+            "ready": self.is_ready(),
+            "warmup_enabled": self.enabled,
+            "running": self._task is not None and not self._task.done(),
+            "targets": len(self.targets),
+            "required": self.required() if self.enabled else 0,
+            "connected": dict(self.connected),
+            "failed": dict(self.failed),
+            "elapsed": round(end - self.started_at, 3) if self.started_at else 0.0,
+        }
+
+    async def _run(self) -> None:
+        slots = asyncio.Semaphore(max(1, self.concurrency))
+        logger.info(
+            "SESSION WARMUP connecting to %s devices, %s at a time",
+            len(self.targets),
+            self.concurrency,
+        )
+        await asyncio.gather(*(self._warm(name, slots) for name in self.targets))
+        self.finished_at = time.monotonic()
+        logger.info(
+            "SESSION WARMUP done in %.1fs: %s connected, %s failed",
+            self.finished_at - self.started_at,
+            len(self.connected),
+            len(self.failed),
+        )
+
+    async def _warm(self, device_name: str, slots: asyncio.Semaphore) -> None:
+        async with slots:
+            started = time.perf_counter()
+            try:
+                await scheduler.run(device_name, warm_session, device_name)
+            except Exception as e:
+                logger.error("SESSION WARMUP %s failed: %s", device_name, e)
+                self.failed[device_name] = f"{type(e).__name__}: {e}"
+                return
+            self.connected[device_name] = round(time.perf_counter() - started, 3)
+
+
+session_warmup = SessionWarmup()
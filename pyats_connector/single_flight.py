@@ -0,0 +1,72 @@
+"""
+This module coalesces identical device operations that are in flight at the same time.
+
+The first caller for a key runs the operation. Callers arriving while it runs
+wait for the same future and receive the same result object, or the same exception.
+"""
+
+import threading
+from concurrent.futures import Future
+from typing import Callable, Dict, Hashable
+
+from log_config.logger_setup import logger
+
+
+class SingleFlight:
+    """
+    Runs at most one operation per key at a time and shares its outcome.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Hashable, Future] = {}
+        self._lock = threading.Lock()
+        self._counters = {"executions": 0, "coalesced": 0}
+
+    def do(self, key: Hashable, run: Callable[[], any]) -> any:
+        """
+        Runs an operation, or waits for the identical one already running.
+
+        Args:
+          key (Hashable): Identifies identical operations.
+          run (callable): Executes the operation.
+
+        Returns:
+          The result of the operation.
+        """
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._calls[key] = future
+                self._counters["executions"] += 1
+            else:
+                self._counters["coalesced"] += 1
+
+        if not leader:
+            logger.debug("SINGLE FLIGHT coalesced %s", key)
+            return future.result()
+
+        try:
+            result = run()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+    def stats(self) -> dict:
+        """
+        Returns how many device operations ran and how many requests were coalesced into them.
+
+        Returns:
+          dict: Request coalescing statistics.
+        """
+        with self._lock:
+            return {**self._counters, "in_flight": len(self._calls)}
+
+
+single_flight = SingleFlight()
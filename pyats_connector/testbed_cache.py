@@ -0,0 +1,183 @@
+"""
+This module provides a process-wide cache of the parsed pyATS testbed.
+
+The testbed file is parsed once and reloaded only when its modification time
+and content hash change, or when a reload is requested explicitly.
+"""
+
+import copy
+import hashlib
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+
+if TYPE_CHECKING:
+    from pyats.topology import Device, Testbed
+
+from config.global_settings import TESTBED_FILE
+from log_config.logger_setup import logger
+
+
+class TestbedCache:
+    """
+    Keeps the parsed testbed of a single testbed file in memory.
+    """
+
+    def __init__(self, testbed_file: str):
+        self.testbed_file = testbed_file
+        self._lock = threading.Lock()
+        self._testbed: Optional["Testbed"] = None
+        # One-device testbed definitions, with extends and markups such as %ENV{} already resolved.
+        self._device_definitions: Dict[str, dict] = {}
+        self._stat_key: Optional[tuple] = None
+        self._sha256: Optional[str] = None
+        self._loaded_at: Optional[float] = None
+        self._reloads = 0
+
+    def get(self) -> "Testbed":
+        """
+        Returns the parsed testbed, reloading it if the file changed on disk.
+
+        Returns:
+          Testbed: The cached pyATS testbed.
+        """
+        stat_key = self._get_stat_key()
+        if self._testbed is not None and stat_key == self._stat_key:
+            return self._testbed
+        with self._lock:
+            if self._testbed is None or stat_key != self._stat_key:
+                self._load(stat_key, force=False)
+            return self._testbed
+
+    def reload(self) -> dict:
+        """
+        Reloads the testbed file from disk, even if it did not change.
+
+        Returns:
+          dict: Information about the loaded testbed.
+        """
+        with self._lock:
+            self._load(self._get_stat_key(), force=True)
+        return self.info()
+
+    def device_names(self) -> List[str]:
+        """
+        Returns the names of the devices defined in the testbed.
+
+        Returns:
+          list: A list of device names.
+        """
+        return list(self.get().devices.names)
+
+    def is_known_device(self, device_name: str) -> bool:
+        """
+        Whether the device is defined in the testbed loaded last.
+
+        The file is not checked for changes, so it is safe to call from the event loop.
+
+        Args:
+          device_name (str): The name of the device.
+
+        Returns:
+          bool: False if the device is not defined, or the testbed is not loaded yet.
+        """
+        testbed = self._testbed
+        return testbed is not None and device_name in testbed.devices
+
+    def new_device(self, device_name: str) -> "Device":
+        """
+        Builds a standalone device object from the cached testbed.
+
+        Each connected session needs its own device object, so the device is
+        built from the definition the loader resolved when the file was
+        parsed, instead of sharing the cached one. The file is not parsed again.
+
+        Args:
+          device_name (str): The name of the device.
+
+        Returns:
+          Device: A new, not connected, pyATS device.
+
+        Raises:
+          KeyError: If the device is not defined in the testbed.
+        """
+        self.get()
+        with self._lock:
+            definition = copy.deepcopy(self._device_definitions[device_name])
+        from pyats.topology import loader
+
+        return loader.load(definition).devices[device_name]
+
+    def info(self) -> dict:
+        """
+        Returns information about the cached testbed.
+
+        Returns:
+          dict: The testbed file, content hash, load time and number of devices.
+        """
+        testbed = self._testbed
+        return {
+            "testbed_file": self.testbed_file,
+            "sha256": self._sha256,
+            "loaded_at": self._loaded_at,
+            "reloads": self._reloads,
+            "devices": len(testbed.devices) if testbed is not None else 0,
+        }
+
+    def _get_stat_key(self) -> tuple:
+        stat = os.stat(self.testbed_file)
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _load(self, stat_key: tuple, force: bool) -> None:
+        with open(self.testbed_file, "rb") as f:
+            content = f.read()
+        sha256 = hashlib.sha256(content).hexdigest()
+        if not force and self._testbed is not None and sha256 == self._sha256:
+            logger.debug("TESTBED %s touched but unchanged", self.testbed_file)
+            self._stat_key = stat_key
+            return
+
+        logger.info("LOADING TESTBED %s", self.testbed_file)
+        # Imported here: pyats takes a large share of the server start time.
+        from pyats.topology import loader
+
+        self._testbed = loader.load(self.testbed_file)
+        self._device_definitions = _device_definitions(self._testbed.raw_config)
+        self._stat_key = stat_key
+        self._sha256 = sha256
+        self._loaded_at = time.time()
+        self._reloads += 1
+
+
+def _device_definitions(raw_config: dict) -> Dict[str, dict]:
+    shared = {
+        key: value
+        for key, value in raw_config.items()
+        if key not in ("devices", "topology")
+    }
+    return {
+        name: {**shared, "devices": {name: definition}}
+        for name, definition in raw_config.get("devices", {}).items()
+    }
+
+
+_caches: Dict[str, TestbedCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_testbed_cache(testbed_file: str = TESTBED_FILE) -> TestbedCache:
+    """
+    Returns the process-wide cache for a testbed file.
+
+    Args:
+      testbed_file (str, optional): Path of the testbed file. Defaults to TESTBED_FILE.
+
+    Returns:
+      TestbedCache: The cache of the testbed file.
+    """
+    with _caches_lock:
+        if testbed_file not in _caches:
+            _caches[testbed_file] = TestbedCache(testbed_file)
+        return _caches[testbed_file]
@@ -0,0 +1,82 @@
+"""
+This script is used to test that POST /jobs answers 202 Accepted, and 404 for devices not in the testbed.
+
+The requests go through the FastAPI layer, called directly as an ASGI app.
+Devices are replayed from an empty corpus, so no device is contacted.
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+
+import setup as setup
+
+os.environ["DEVICE_DRIVER_MODE"] = "replay"
+os.environ["DEVICE_CORPUS_DIR"] = tempfile.mkdtemp()
+
+from load_test_settings import DEVICE_NAME
+from main import app
+
+
+async def request(method: str, path: str, body: dict) -> tuple:
+    """
+    Sends one request to the app and returns the status code and the decoded body.
+    """
+    content = json.dumps(body).encode()
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    messages = [{"type": "http.request", "body": content, "more_body": False}]
+    response = {"body": b""}
+
+    async def receive():
+        if messages:
+            return messages.pop(0)
+        await asyncio.Event().wait()
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+        elif message["type"] == "http.response.body":
+            response["body"] += message.get("body", b"")
+
+    await app(scope, receive, send)
+    return response["status"], json.loads(response["body"])
+
+
+async def main():
+    async with app.router.lifespan_context(app):
+        status, body = await request(
+            "POST",
+            "/jobs",
+            {"operation": "health_cpu", "device_names": [DEVICE_NAME]},
+        )
+        print(status, body)
+        assert status == 202, status
+        assert body["location"] == f"/jobs/{body['job_id']}"
+
+        status, body = await request(
+            "POST",
+            "/jobs",
+            {"operation": "health_cpu", "device_names": ["not-in-testbed"]},
+        )
+        print(status, body)
+        assert status == 404, status
+    print("OK")
+
+
+if __name__ == "__main__":
+    # Run the main function using asyncio
+    asyncio.run(main())
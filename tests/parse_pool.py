@@ -0,0 +1,84 @@
+"""
+This script is used to test that a parse timing out in the parse pool does not fail the other parses in flight.
+
+Two large outputs are parsed at the same time: the first takes longer than the
+pool timeout, the second is still running in the pool when the first times out.
+No device is needed.
+"""
+
+import threading
+import time
+
+import setup as setup
+
+from pyats.topology import loader
+
+from benchmarks.cli_outputs import show_ip_route
+from pyats_connector.parse_pool import ParsePool
+
+COMMAND = "show ip route"
+TIMEOUT = 3.0
+# About 18 seconds to parse, well beyond the timeout.
+SLOW_OUTPUT = show_ip_route(20000)
+# About half a second to parse, started shortly before the slow parse times out.
+OUTPUT = show_ip_route(800)
+
+
+def main():
+    device = loader.load(
+        {
+            "devices": {
+                "parser": {
+                    "type": "router",
+                    "os": "iosxe",
+                    "connections": {"cli": {"protocol": "ssh", "ip": "127.0.0.1"}},
+                }
+            }
+        }
+    ).devices["parser"]
+    pool = ParsePool(
+        enabled=True,
+        workers=2,
+        min_output_size=0,
+        timeout=TIMEOUT,
+        prewarm_commands=[COMMAND],
+    )
+    pool.start([device])
+
+    results = {}
+    finished = {}
+
+    def parse(name, output):
+        try:
+            results[name] = pool.parse(device, COMMAND, output)
+        except Exception as e:
+            results[name] = e
+        finished[name] = time.monotonic()
+
+    slow = threading.Thread(target=parse, args=("slow", SLOW_OUTPUT))
+    slow.start()
+    time.sleep(TIMEOUT - 0.4)
+    other = threading.Thread(target=parse, args=("other", OUTPUT))
+    other.start()
+    slow.join()
+    other.join()
+
+    stats = pool.stats()
+    print(stats)
+    assert isinstance(results["slow"], TimeoutError), results["slow"]
+    assert finished["other"] > finished["slow"], "the parses did not overlap"
+    assert isinstance(results["other"], dict), results["other"]
+    assert results["other"]["vrf"]
+    assert stats["timeouts"] == 1
+    assert stats["failures"] == 0, "the other parse fell back to the calling thread"
+    assert stats["offloaded"] == 1
+
+    # New parses go to the new pool.
+    assert pool.parse(device, COMMAND, show_ip_route(50))["vrf"]
+    assert pool.stats()["offloaded"] == 2
+    pool.shutdown()
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,34 @@
-import asyncio
+import inspect
 from functools import wraps
 
+from utils.scheduler import scheduler
+
+DEVICE_ARGUMENT = "device_name"
+
 
 def asyncify(func):
+    device_index = _get_device_argument_index(func)
+
     @wraps(func)
     async def wrapper(*args, **kwargs):
-        return await asyncio.to_thread(func, *args, **kwargs)
+        device_key = _get_device_key(device_index, args, kwargs)
+        return await scheduler.run(device_key, func, *args, **kwargs)
 
     return wrapper
+
+
+def _get_device_argument_index(func):
+    parameters = list(inspect.signature(func).parameters)
+    if DEVICE_ARGUMENT in parameters:
+        return parameters.index(DEVICE_ARGUMENT)
+    return None
+
+
+def _get_device_key(device_index, args, kwargs):
+    if device_index is None:
+        return None
+    if DEVICE_ARGUMENT in kwargs:
+        return kwargs[DEVICE_ARGUMENT]
+    if device_index < len(args):
+        return args[device_index]
+    return None
@@ -0,0 +1,38 @@
+"""
+JSON encoding of responses.
+
+orjson is used when installed, it encodes large Genie results several times
+faster than the json module. Without it, or for values orjson rejects, the
+json module is used with the same output format. Values JSON has no type for,
+such as dict views, sets and exceptions, are converted by json_default either way.
+"""
+
+import json
+from typing import Any
+
+from utils.text_utils import json_default
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Genie results use integer keys, e.g. next_hop_list {1: {...}}.
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS if orjson is not None else 0
+
+ENCODER = "orjson" if orjson is not None else "json"
+
+
+def dumps(content: Any) -> bytes:
+    """
+    Encodes a value as compact UTF-8 JSON.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(content, default=json_default, option=_ORJSON_OPTIONS)
+        except TypeError:
+            # Integers beyond 64 bits or nesting deeper than orjson supports.
+            pass
+    return json.dumps(
+        content, default=json_default, ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
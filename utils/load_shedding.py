@@ -0,0 +1,135 @@
+"""
+Load shedding in front of the device endpoints.
+
+The event loop lag is sampled in the background. While it is above
+LOAD_SHED_MAX_LOOP_LAG seconds, or while LOAD_SHED_QUEUE_DEPTH calls or more
+wait in the device scheduler, requests to endpoints outside
+LOAD_SHED_PROTECTED_ENDPOINTS are answered with 429 before doing any work, so
+the capacity left goes to the protected read endpoints.
+"""
+
+import asyncio
+import fnmatch
+import time
+from typing import Iterable, Optional
+
+from config.global_settings import (
+    LOAD_SHED_ENABLED,
+    LOAD_SHED_MAX_LOOP_LAG,
+    LOAD_SHED_QUEUE_DEPTH,
+    LOAD_SHED_RETRY_AFTER,
+    LOAD_SHED_PROTECTED_ENDPOINTS,
+)
+from utils.scheduler import DeviceScheduler, scheduler
+
+# Seconds between two event loop lag samples.
+LAG_SAMPLE_INTERVAL = 0.1
+# Share of the previous lag kept at each sample.
+LAG_DECAY = 0.8
+
+
+class LoadShedder:
+    """
+    Decides whether a request is shed from the event loop lag and the scheduler queue depth.
+    """
+
+    def __init__(
+        self,
+        device_scheduler: DeviceScheduler = scheduler,
+        enabled: bool = LOAD_SHED_ENABLED,
+        max_loop_lag: float = LOAD_SHED_MAX_LOOP_LAG,
+        queue_depth: int = LOAD_SHED_QUEUE_DEPTH,
+        retry_after: int = LOAD_SHED_RETRY_AFTER,
+        protected_endpoints: Iterable[str] = LOAD_SHED_PROTECTED_ENDPOINTS,
+    ):
+        self.scheduler = device_scheduler
+        self.enabled = enabled
+        self.max_loop_lag = max_loop_lag
+        self.queue_depth = queue_depth
+        self.retry_after = retry_after
+        self.protected_endpoints = list(protected_endpoints)
+        self.loop_lag = 0.0
+        self.loop_lag_max = 0.0
+        self._shed = 0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        """
+        Starts sampling the event loop lag.
+        """
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._sample_loop_lag())
+
+    async def stop(self) -> None:
+        """
+        Stops sampling the event loop lag.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def overload(self) -> Optional[str]:
+        """
+        Returns why the server is overloaded, or None.
+        """
+        if self.max_loop_lag > 0 and self.loop_lag >= self.max_loop_lag:
+            return f"event loop lag {self.loop_lag:.3f}s"
+        if self.queue_depth > 0:
+            queued = self.scheduler.queue_depth()
+            if queued >= self.queue_depth:
+                return f"{queued} device calls queued"
+        return None
+
+    def check(self, endpoint: str) -> Optional[str]:
+        """
+        Returns why a request to the endpoint is shed, or None if it is admitted.
+
+        Args:
+          endpoint (str): The route path of the request, e.g. /jobs/{job_id}.
+        """
+        if not self.enabled or self.is_protected(endpoint):
+            return None
+        reason = self.overload()
+        if reason is not None:
+            self._shed += 1
+        return reason
+
+    def is_protected(self, endpoint: str) -> bool:
+        """
+        Whether requests to the endpoint are never shed.
+        """
+        return any(
+            fnmatch.fnmatch(endpoint, pattern) for pattern in self.protected_endpoints
+        )
+
+    def stats(self) -> dict:
+        """
+        Returns the load shedding settings, the current overload signals and the requests shed.
+
+        Returns:
+          dict: Whether shedding is enabled, the event loop lag now and at most, the scheduler queue depth, thresholds, protected endpoints, the current overload reason and the requests shed so far.
+        """
+        return {
+            "enabled": self.enabled,
+            "loop_lag": round(self.loop_lag, 4),
+            "loop_lag_max": round(self.loop_lag_max, 4),
+            "queue_depth": self.scheduler.queue_depth(),
+            "max_loop_lag": self.max_loop_lag,
+            "shed_queue_depth": self.queue_depth,
+            "protected_endpoints": self.protected_endpoints,
+            "overload": self.overload(),
+            "shed": self._shed,
+        }
+
+    async def _sample_loop_lag(self) -> None:
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(LAG_SAMPLE_INTERVAL)
+            lag = max(0.0, time.monotonic() - started - LAG_SAMPLE_INTERVAL)
+            # Decays instead of dropping to the next sample, so a single stall is noticed.
+            self.loop_lag = max(lag, self.loop_lag * LAG_DECAY)
+            self.loop_lag_max = max(self.loop_lag_max, self.loop_lag)
+
+
+load_shedder = LoadShedder()
@@ -0,0 +1,94 @@
+"""
+OpenAPI schema cached on disk between server starts.
+
+FastAPI builds the schema on the first request to /docs or /openapi.json by
+walking every route and its models. The schema is saved to OPENAPI_CACHE_FILE
+together with a fingerprint of the routes and of the source files defining
+their endpoints, and loaded from there on the next start while the fingerprint
+matches.
+"""
+
+import hashlib
+import inspect
+import json
+import os
+from typing import Callable
+
+import fastapi
+from fastapi import FastAPI
+from fastapi.routing import APIRoute
+
+from log_config.logger_setup import logger
+
+
+def routes_fingerprint(app: FastAPI) -> str:
+    """
+    Returns a hash changing whenever the routes, their documentation, their endpoints' source or FastAPI change.
+    """
+    digest = hashlib.sha256(fastapi.__version__.encode())
+    sources = set()
+    for route in app.routes:
+        if not isinstance(route, APIRoute):
+            continue
+        # Summaries and descriptions come from docstrings, possibly of other modules.
+        digest.update(
+            repr(
+                (
+                    route.path,
+                    sorted(route.methods),
+                    route.operation_id,
+                    route.summary,
+                    route.description,
+                    route.response_description,
+                    route.tags,
+                    route.status_code,
+                    route.deprecated,
+                )
+            ).encode()
+        )
+        source = inspect.getsourcefile(inspect.unwrap(route.endpoint))
+        if source:
+            sources.add(source)
+    for source in sorted(sources):
+        with open(source, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def cached_openapi(app: FastAPI, cache_file: str) -> Callable[[], dict]:
+    """
+    Returns a replacement for app.openapi that reads the schema from cache_file when still valid.
+
+    Args:
+      app (FastAPI): The application.
+      cache_file (str): JSON file holding the schema and its fingerprint. Empty to disable the cache.
+
+    Returns:
+      callable: The function to assign to app.openapi.
+    """
+    build = app.openapi
+
+    def openapi() -> dict:
+        if app.openapi_schema is not None or not cache_file:
+            return build()
+        fingerprint = routes_fingerprint(app)
+        try:
+            with open(cache_file, encoding="utf-8") as f:
+                cached = json.load(f)
+            if cached.get("fingerprint") == fingerprint:
+                app.openapi_schema = cached["schema"]
+                return app.openapi_schema
+        except (OSError, ValueError, KeyError):
+            pass
+        schema = build()
+        try:
+            os.makedirs(os.path.dirname(cache_file) or ".", exist_ok=True)
+            temporary = f"{cache_file}.{os.getpid()}.tmp"
+            with open(temporary, "w", encoding="utf-8") as f:
+                json.dump({"fingerprint": fingerprint, "schema": schema}, f)
+            os.replace(temporary, cache_file)
+        except OSError as e:
+            logger.warning("OPENAPI schema not cached in %s: %s", cache_file, e)
+        return schema
+
+    return openapi
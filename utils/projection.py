@@ -0,0 +1,204 @@
+"""
+Field projection of JSON-like results, with JSONPath-like selectors.
+
+A selector is a path from the root of the result, the leading "$" is optional:
+  - name or .name: the key "name".
+  - * or [*]: every key of a dict, or every item of a list.
+  - ['name'] or ["name"]: a key containing dots or brackets, e.g. ['10.0.0.0/8'].
+  - [0]: an item of a list.
+  - [?(@.key == 'value')]: every key or item whose value matches. "@" alone compares the
+    value itself, and the operator can be == or !=. Literals are quoted strings,
+    numbers, true, false or null.
+
+Several comma separated selectors are merged into one result that keeps the
+structure and order of the original, holding only the selected values.
+Selectors that match nothing are ignored.
+
+Examples:
+  *.oper_status,*.ipv4                  status and addresses of every interface
+  [?(@.oper_status == 'down')].description
+  health_data[?(@.process == 'ALL_PROCESSES')].value
+"""
+
+import json
+import re
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, List, Optional, Tuple, Union
+
+# Returned for values no selector matched.
+_MISSING = object()
+
+_NAME = re.compile(r"\.?([^.\[\]\s*]+)")
+_WILDCARD = re.compile(r"\.?\*|\[\*\]")
+_QUOTED = re.compile(r"""\[\s*('(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*")\s*\]""")
+_INDEX = re.compile(r"\[\s*(-?\d+)\s*\]")
+_FILTER = re.compile(
+    r"""\[\?\(\s*@((?:\.[^.\s=!()]+)*)\s*(==|!=)\s*('(?:[^'\\]|\\.)*'|"(?:[^"\\]|\\.)*"|[^\s)]+)\s*\)\]"""
+)
+
+
+@dataclass(frozen=True)
+class _Filter:
+    path: Tuple[str, ...]
+    operator: str
+    value: Any
+
+    def matches(self, value) -> bool:
+        for key in self.path:
+            if not isinstance(value, dict) or key not in value:
+                return self.operator == "!="
+            value = value[key]
+        return (value == self.value) == (self.operator == "==")
+
+
+class _Wildcard:
+    def __repr__(self) -> str:
+        return "*"
+
+
+WILDCARD = _Wildcard()
+
+Step = Union[str, int, _Wildcard, _Filter]
+
+
+@lru_cache(maxsize=256)
+def parse_selectors(fields: str) -> Tuple[Tuple[Step, ...], ...]:
+    """
+    Parses comma separated selectors.
+
+    Args:
+      fields (str): The selectors, e.g. "*.oper_status,*.ipv4".
+
+    Returns:
+      tuple: The steps of every selector.
+
+    Raises:
+      ValueError: If a selector is not valid.
+    """
+    return tuple(
+        _parse_selector(selector)
+        for selector in _split_selectors(fields)
+        if selector.strip()
+    )
+
+
+def project(data, selectors: Tuple[Tuple[Step, ...], ...]):
+    """
+    Keeps only the values of data matched by the selectors.
+
+    Args:
+      data: A result made of dicts, lists and scalars.
+      selectors (tuple): Selectors returned by parse_selectors.
+
+    Returns:
+      The projected result, an empty dict or list if nothing matched. Scalars are returned unchanged.
+    """
+    if not selectors or not isinstance(data, (dict, list)):
+        return data
+    projected = _project(data, [tuple(selector) for selector in selectors])
+    if projected is _MISSING:
+        return [] if isinstance(data, list) else {}
+    return projected
+
+
+def _project(value, selectors: List[Tuple[Step, ...]]):
+    if any(not selector for selector in selectors):
+        return value
+    if isinstance(value, dict):
+        items = value.items()
+    elif isinstance(value, list):
+        items = enumerate(value)
+    else:
+        return _MISSING
+
+    projected = {} if isinstance(value, dict) else []
+    for key, child in items:
+        remaining = [
+            selector[1:]
+            for selector in selectors
+            if _step_matches(selector[0], key, child, len(value))
+        ]
+        if not remaining:
+            continue
+        child = _project(child, remaining)
+        if child is _MISSING:
+            continue
+        if isinstance(projected, dict):
+            projected[key] = child
+        else:
+            projected.append(child)
+    return projected if projected else _MISSING
+
+
+def _step_matches(step: Step, key, child, size: int) -> bool:
+    if step is WILDCARD:
+        return True
+    if isinstance(step, _Filter):
+        return step.matches(child)
+    if isinstance(step, int):
+        return isinstance(key, int) and key == (step if step >= 0 else size + step)
+    return key == step or (isinstance(key, int) and step == str(key))
+
+
+def _split_selectors(fields: str) -> List[str]:
+    # Commas inside brackets belong to the selector, e.g. ['a,b'].
+    selectors, current, depth, quote = [], [], 0, None
+    for char in fields:
+        if quote:
+            quote = None if char == quote else quote
+        elif char in "'\"":
+            quote = char
+        elif char == "[":
+            depth += 1
+        elif char == "]":
+            depth -= 1
+        elif char == "," and depth == 0:
+            selectors.append("".join(current))
+            current = []
+            continue
+        current.append(char)
+    selectors.append("".join(current))
+    return selectors
+
+
+def _parse_selector(selector: str) -> Tuple[Step, ...]:
+    text = selector.strip()
+    if text.startswith("$"):
+        text = text[1:]
+    steps: List[Step] = []
+    position = 0
+    while position < len(text):
+        for pattern in (_WILDCARD, _QUOTED, _INDEX, _FILTER, _NAME):
+            match = pattern.match(text, position)
+            if match:
+                break
+        else:
+            raise ValueError(
+                f"Invalid selector '{selector}' at position {position}: '{text[position:]}'"
+            )
+        steps.append(_step(pattern, match))
+        position = match.end()
+    return tuple(steps)
+
+
+def _step(pattern: re.Pattern, match: re.Match) -> Step:
+    if pattern is _WILDCARD:
+        return WILDCARD
+    if pattern is _QUOTED:
+        return _literal(match.group(1))
+    if pattern is _INDEX:
+        return int(match.group(1))
+    if pattern is _FILTER:
+        path = tuple(key for key in match.group(1).split(".") if key)
+        return _Filter(path, match.group(2), _literal(match.group(3)))
+    return match.group(1)
+
+
+def _literal(text: str) -> Optional[Any]:
+    if text[0] in "'\"":
+        return text[1:-1].replace("\\" + text[0], text[0]).replace("\\\\", "\\")
+    try:
+        return json.loads(text)
+    except ValueError:
+        raise ValueError(f"Invalid literal {text}, quote strings") from None
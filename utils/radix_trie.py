@@ -0,0 +1,140 @@
+"""
+This module provides a path-compressed binary (Patricia) trie of IP prefixes.
+
+It answers longest-prefix-match queries in at most one step per prefix bit,
+and keeps IPv4 and IPv6 prefixes in separate tries.
+"""
+
+import ipaddress
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+
+IPNetwork = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+
+_EMPTY = object()
+
+
+class _Node:
+    __slots__ = ("key", "length", "value", "children")
+
+    def __init__(self, key: int, length: int, value: Any = _EMPTY):
+        self.key = key
+        self.length = length
+        self.value = value
+        self.children = [None, None]
+
+
+class RadixTrie:
+    """
+    Maps IP prefixes to values and finds the longest prefix containing an address.
+    """
+
+    def __init__(self):
+        self._roots: Dict[int, _Node] = {}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def insert(self, prefix: Union[str, IPNetwork], value: Any) -> None:
+        """
+        Adds a prefix, replacing the value if the prefix is already present.
+
+        Args:
+          prefix (str | IPv4Network | IPv6Network): The prefix, e.g. "10.0.0.0/8". Host bits are ignored.
+          value: The value returned by lookups matching this prefix.
+        """
+        network = ipaddress.ip_network(prefix, strict=False)
+        width = network.max_prefixlen
+        key = int(network.network_address)
+        length = network.prefixlen
+        node = self._roots.setdefault(network.version, _Node(0, 0))
+
+        while True:
+            if node.length == length:
+                if node.value is _EMPTY:
+                    self._size += 1
+                node.value = value
+                return
+            bit = _bit(key, node.length, width)
+            child = node.children[bit]
+            if child is None:
+                node.children[bit] = _Node(key, length, value)
+                self._size += 1
+                return
+            common = _common_length(key, child.key, min(length, child.length), width)
+            if common == child.length:
+                node = child
+                continue
+
+            # Split the edge to the child at the first differing bit.
+            if common == length:
+                middle = _Node(key, length, value)
+            else:
+                middle = _Node(_mask(key, common, width), common)
+                middle.children[_bit(key, common, width)] = _Node(key, length, value)
+            middle.children[_bit(child.key, common, width)] = child
+            node.children[bit] = middle
+            self._size += 1
+            return
+
+    def longest_match(
+        self, address: Union[str, ipaddress.IPv4Address, ipaddress.IPv6Address]
+    ) -> Optional[Tuple[IPNetwork, Any]]:
+        """
+        Finds the most specific prefix containing an address.
+
+        Args:
+          address (str | IPv4Address | IPv6Address): The address to look up.
+
+        Returns:
+          tuple: The matching prefix and its value, or None if no prefix contains the address.
+        """
+        address = ipaddress.ip_address(address)
+        width = address.max_prefixlen
+        key = int(address)
+        node = self._roots.get(address.version)
+        best = None
+        while node is not None:
+            if _common_length(key, node.key, node.length, width) < node.length:
+                break
+            if node.value is not _EMPTY:
+                best = node
+            if node.length == width:
+                break
+            node = node.children[_bit(key, node.length, width)]
+
+        if best is None:
+            return None
+        return _network_class(address.version)((best.key, best.length)), best.value
+
+    def items(self) -> Iterator[Tuple[IPNetwork, Any]]:
+        """
+        Iterates over the prefixes and values, IPv4 first, in address order.
+        """
+        for version in sorted(self._roots):
+            network_class = _network_class(version)
+            stack = [self._roots[version]]
+            while stack:
+                node = stack.pop()
+                if node.value is not _EMPTY:
+                    yield network_class((node.key, node.length)), node.value
+                stack.extend(child for child in reversed(node.children) if child)
+
+
+def _network_class(version: int) -> type:
+    return ipaddress.IPv4Network if version == 4 else ipaddress.IPv6Network
+
+
+def _bit(key: int, position: int, width: int) -> int:
+    return (key >> (width - 1 - position)) & 1
+
+
+def _mask(key: int, length: int, width: int) -> int:
+    return key & (((1 << length) - 1) << (width - length))
+
+
+def _common_length(a: int, b: int, limit: int, width: int) -> int:
+    difference = (a ^ b) >> (width - limit) if limit else 0
+    if difference == 0:
+        return limit
+    return limit - difference.bit_length()
@@ -0,0 +1,317 @@
+"""
+Scheduler for blocking calls made from async code.
+
+Calls run on a dedicated, bounded thread pool instead of the default asyncio
+executor. Calls for the same device wait in that device's queue and only a
+limited number of them run at once. Free workers are handed to devices in
+round-robin order, so one busy device cannot take every worker.
+
+Queues are bounded: a call is rejected with SchedulerOverloadedError when its
+device already has SCHEDULER_MAX_QUEUE_PER_DEVICE calls waiting, when
+SCHEDULER_MAX_QUEUE calls wait in total, or when it waited longer than
+SCHEDULER_MAX_QUEUE_WAIT seconds without getting a worker.
+"""
+
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, Hashable, Optional, Union
+
+from config.global_settings import (
+    SCHEDULER_MAX_WORKERS,
+    SCHEDULER_PER_DEVICE_CONCURRENCY,
+    SCHEDULER_MAX_QUEUE,
+    SCHEDULER_MAX_QUEUE_PER_DEVICE,
+    SCHEDULER_MAX_QUEUE_WAIT,
+)
+
+
+class SchedulerOverloadedError(RuntimeError):
+    """
+    Raised when a call is not admitted to the scheduler queues, or waited too long in them.
+    """
+
+    def __init__(self, message: str, retry_after: float):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+@dataclass
+class _WorkItem:
+    call: Callable[[], any]
+    context: contextvars.Context
+    # None for calls submitted from a thread, their future is a concurrent Future.
+    loop: Optional[asyncio.AbstractEventLoop]
+    future: Union[asyncio.Future, Future]
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+
+@dataclass
+class _Lane:
+    queue: Deque[_WorkItem] = field(default_factory=deque)
+    running: int = 0
+    wait_time_total: float = 0.0
+    wait_time_max: float = 0.0
+    completed: int = 0
+
+
+class DeviceScheduler:
+    """
+    Runs blocking calls on a bounded worker pool with per-device queues.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = SCHEDULER_MAX_WORKERS,
+        per_device_concurrency: int = SCHEDULER_PER_DEVICE_CONCURRENCY,
+        max_queue: int = SCHEDULER_MAX_QUEUE,
+        max_queue_per_device: int = SCHEDULER_MAX_QUEUE_PER_DEVICE,
+        max_queue_wait: float = SCHEDULER_MAX_QUEUE_WAIT,
+    ):
+        self.max_workers = max(1, max_workers)
+        self.per_device_concurrency = max(1, per_device_concurrency)
+        self.max_queue = max_queue
+        self.max_queue_per_device = max_queue_per_device
+        self.max_queue_wait = max_queue_wait
+        self._rejected = {"queue_full": 0, "device_queue_full": 0, "queue_wait": 0}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lanes: Dict[Hashable, _Lane] = {}
+        self._ready: Deque[Hashable] = deque()
+        self._running = 0
+        self._lock = threading.Lock()
+
+    async def run(self, device_key: Optional[Hashable], func, *args, **kwargs):
+        """
+        Runs a blocking function on the worker pool and waits for its result.
+
+        Args:
+          device_key (Hashable): The device the call is for. None for calls not bound to a device,
+            which are only limited by the global pool size.
+          func (callable): The blocking function.
+          *args, **kwargs: Arguments for the function.
+
+        Returns:
+          The return value of the function.
+
+        Raises:
+          SchedulerOverloadedError: If the queues are full, or the call waited too long for a worker.
+        """
+        loop = asyncio.get_running_loop()
+        item = _WorkItem(
+            call=functools.partial(func, *args, **kwargs),
+            context=contextvars.copy_context(),
+            loop=loop,
+            future=loop.create_future(),
+        )
+        lane = self._enqueue(device_key, item)
+        try:
+            if self.max_queue_wait > 0:
+                await asyncio.wait({item.future}, timeout=self.max_queue_wait)
+                self._expire(device_key, lane, item)
+            return await item.future
+        except asyncio.CancelledError:
+            with self._lock:
+                if item in lane.queue:
+                    lane.queue.remove(item)
+            raise
+
+    def submit(self, device_key: Optional[Hashable], func, *args, **kwargs) -> Future:
+        """
+        Queues a blocking function on the worker pool without waiting for it.
+
+        Unlike run, it can be called from any thread, e.g. from a worker to start a background refresh.
+
+        Args:
+          device_key (Hashable): The device the call is for. None for calls not bound to a device.
+          func (callable): The blocking function.
+          *args, **kwargs: Arguments for the function.
+
+        Returns:
+          Future: Completed with the return value of the function.
+
+        Raises:
+          SchedulerOverloadedError: If the queues are full.
+        """
+        item = _WorkItem(
+            call=functools.partial(func, *args, **kwargs),
+            context=contextvars.copy_context(),
+            loop=None,
+            future=Future(),
+        )
+        self._enqueue(device_key, item)
+        return item.future
+
+    def stats(self) -> dict:
+        """
+        Returns queue depth, running calls and queue wait time per device.
+
+        Returns:
+          dict: Scheduler statistics.
+        """
+        with self._lock:
+            devices = {}
+            for key, lane in self._lanes.items():
+                devices[str(key) if key is not None else "_global"] = {
+                    "queued": len(lane.queue),
+                    "running": lane.running,
+                    "completed": lane.completed,
+                    "wait_time_avg_sec": (
+                        round(lane.wait_time_total / lane.completed, 6)
+                        if lane.completed
+                        else 0.0
+                    ),
+                    "wait_time_max_sec": round(lane.wait_time_max, 6),
+                }
+            return {
+                "max_workers": self.max_workers,
+                "per_device_concurrency": self.per_device_concurrency,
+                "max_queue": self.max_queue,
+                "max_queue_per_device": self.max_queue_per_device,
+                "max_queue_wait": self.max_queue_wait,
+                "rejected": dict(self._rejected),
+                "running": self._running,
+                "queued": sum(len(lane.queue) for lane in self._lanes.values()),
+                "devices": devices,
+            }
+
+    def queue_depth(self, device_key: Optional[Hashable] = None) -> int:
+        """
+        Returns the calls waiting for a worker, for one device or in total.
+        """
+        with self._lock:
+            if device_key is not None:
+                lane = self._lanes.get(device_key)
+                return len(lane.queue) if lane else 0
+            return sum(len(lane.queue) for lane in self._lanes.values())
+
+    def _enqueue(self, device_key: Optional[Hashable], item: _WorkItem) -> _Lane:
+        with self._lock:
+            lane = self._lanes.setdefault(device_key, _Lane())
+            self._admit_locked(device_key, lane)
+            if not lane.queue and device_key not in self._ready:
+                self._ready.append(device_key)
+            lane.queue.append(item)
+        self._dispatch()
+        return lane
+
+    def _admit_locked(self, device_key: Optional[Hashable], lane: _Lane) -> None:
+        if (
+            device_key is not None
+            and self.max_queue_per_device > 0
+            and len(lane.queue) >= self.max_queue_per_device
+        ):
+            self._rejected["device_queue_full"] += 1
+            raise SchedulerOverloadedError(
+                f"{len(lane.queue)} calls already waiting for {device_key}",
+                self._retry_after(lane),
+            )
+        if self.max_queue > 0:
+            queued = sum(len(other.queue) for other in self._lanes.values())
+            if queued >= self.max_queue:
+                self._rejected["queue_full"] += 1
+                raise SchedulerOverloadedError(
+                    f"{queued} device calls already waiting", self._retry_after(lane)
+                )
+
+    def _expire(self, device_key: Optional[Hashable], lane: _Lane, item: _WorkItem) -> None:
+        with self._lock:
+            # Calls already running are not interrupted, only calls still waiting.
+            if item.future.done() or not any(queued is item for queued in lane.queue):
+                return
+            lane.queue.remove(item)
+            self._rejected["queue_wait"] += 1
+        item.future.cancel()
+        raise SchedulerOverloadedError(
+            f"Call for {device_key} waited more than {self.max_queue_wait}s for a worker",
+            self._retry_after(lane),
+        )
+
+    @staticmethod
+    def _retry_after(lane: _Lane) -> float:
+        average_wait = lane.wait_time_total / lane.completed if lane.completed else 0.0
+        return max(1.0, average_wait)
+
+    def _lane_limit(self, device_key: Optional[Hashable]) -> int:
+        if device_key is None:
+            return self.max_workers
+        return self.per_device_concurrency
+
+    def _dispatch(self) -> None:
+        to_start = []
+        with self._lock:
+            while self._running < self.max_workers and self._ready:
+                started = False
+                for _ in range(len(self._ready)):
+                    device_key = self._ready.popleft()
+                    lane = self._lanes[device_key]
+                    if not lane.queue:
+                        continue
+                    if lane.running >= self._lane_limit(device_key):
+                        self._ready.append(device_key)
+                        continue
+                    item = lane.queue.popleft()
+                    if lane.queue:
+                        # Back of the line, so other devices get the next worker.
+                        self._ready.append(device_key)
+                    if item.future.cancelled():
+                        started = True
+                        break
+                    waited = time.monotonic() - item.enqueued_at
+                    lane.wait_time_total += waited
+                    lane.wait_time_max = max(lane.wait_time_max, waited)
+                    lane.running += 1
+                    self._running += 1
+                    to_start.append((device_key, item))
+                    started = True
+                    break
+                if not started:
+                    break
+        for device_key, item in to_start:
+            self._start(device_key, item)
+
+    def _start(self, device_key: Optional[Hashable], item: _WorkItem) -> None:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="device-worker"
+            )
+        work = self._executor.submit(item.context.run, item.call)
+        work.add_done_callback(
+            lambda done: self._finish(device_key, item, done)
+        )
+
+    def _finish(
+        self, device_key: Optional[Hashable], item: _WorkItem, done: Future
+    ) -> None:
+        with self._lock:
+            lane = self._lanes[device_key]
+            lane.running -= 1
+            lane.completed += 1
+            self._running -= 1
+        if item.loop is None:
+            _set_future(item.future, done)
+            self._dispatch()
+            return
+        try:
+            item.loop.call_soon_threadsafe(_set_future, item.future, done)
+        except RuntimeError:
+            # The event loop that submitted the call is closed.
+            pass
+        self._dispatch()
+
+
+def _set_future(future: Union[asyncio.Future, Future], done: Future) -> None:
+    if future.cancelled():
+        return
+    exception = done.exception()
+    if exception is not None:
+        future.set_exception(exception)
+    else:
+        future.set_result(done.result())
+
+
+scheduler = DeviceScheduler()
@@ -0,0 +1,122 @@
+"""
+Startup timing of the server process.
+
+The report breaks the start time into the imports of main, grouped by top level
+package, the build of the app and the lifespan startup. pyATS, unicon and Genie
+are imported on first use, not with the server, so they do not delay the port
+opening. With STARTUP_PREWARM set, they are imported in a background thread
+once the server is ready, and the time each module took is added to the report.
+
+The import timer starts when this module is imported, so main imports it first.
+"""
+
+import builtins
+import importlib
+import sys
+import threading
+import time
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional
+
+from log_config.logger_setup import logger
+
+
+class StartupReport:
+    """
+    Timestamps of the startup phases and import time per top level package.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._marks: List[tuple] = []
+        self._imports: Dict[str, float] = defaultdict(float)
+        self._prewarm: Dict[str, float] = {}
+        self._children: List[float] = []
+        self._import: Optional[Callable] = None
+        self._lock = threading.Lock()
+
+    def start_import_timer(self) -> None:
+        """
+        Times every module imported from now on, until stop_import_timer.
+        """
+        if self._import is None:
+            self._import = builtins.__import__
+            builtins.__import__ = self._timed_import
+
+    def stop_import_timer(self) -> None:
+        """
+        Stops timing imports and marks the imports as done.
+        """
+        if self._import is not None:
+            builtins.__import__, self._import = self._import, None
+        self.mark("imports")
+
+    def mark(self, phase: str) -> None:
+        """
+        Records the time, since main started importing, at which a phase ended.
+        """
+        with self._lock:
+            self._marks.append((phase, time.perf_counter() - self.started))
+
+    def prewarm(
+        self, modules: Iterable[str], calls: Optional[Dict[str, Callable[[], object]]] = None
+    ) -> None:
+        """
+        Imports modules and runs warm-up calls, recording how long each one took.
+
+        Failures are logged and skipped, a missing optional module must not stop the server.
+
+        Args:
+          modules (Iterable[str]): Modules to import.
+          calls (dict, optional): Functions to run after the imports by name, e.g. building the OpenAPI schema.
+        """
+        steps = [(name, lambda name=name: importlib.import_module(name)) for name in modules]
+        steps += list((calls or {}).items())
+        for name, step in steps:
+            started = time.perf_counter()
+            try:
+                step()
+            except Exception as e:
+                logger.warning("STARTUP prewarm of %s failed: %s", name, e)
+                continue
+            with self._lock:
+                self._prewarm[name] = round(time.perf_counter() - started, 4)
+        self.mark("prewarm")
+        logger.info("STARTUP prewarm done: %s", self._prewarm)
+
+    def report(self, top: int = 15) -> dict:
+        """
+        Returns the startup timings.
+
+        Args:
+          top (int, optional): Number of packages listed by import time. Defaults to 15.
+
+        Returns:
+          dict: Seconds since main started importing at the end of each phase, the slowest imports by top level package, and the prewarm time per module.
+        """
+        with self._lock:
+            imports = sorted(self._imports.items(), key=lambda item: -item[1])
+            return {
+                "phases": {phase: round(at, 4) for phase, at in self._marks},
+                "imports_total": round(sum(self._imports.values()), 4),
+                "imports": {name: round(elapsed, 4) for name, elapsed in imports[:top]},
+                "prewarm": dict(self._prewarm),
+            }
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level or name in sys.modules:
+            return self._import(name, globals, locals, fromlist, level)
+        started = time.perf_counter()
+        self._children.append(0.0)
+        try:
+            return self._import(name, globals, locals, fromlist, level)
+        finally:
+            elapsed = time.perf_counter() - started
+            # Own time only, nested imports are counted under their own package.
+            self._imports[name.partition(".")[0]] += elapsed - self._children.pop()
+            if self._children:
+                self._children[-1] += elapsed
+
+
+startup_report = StartupReport()
+startup_report.start_import_timer()
@@ -0,0 +1,105 @@
+"""
+This module serializes large results incrementally, as NDJSON or as a chunked JSON document,
+and formats Server-Sent Events.
+
+Entries are serialized one at a time and sent in chunks of about
+STREAMING_CHUNK_SIZE characters, so the full JSON text of a result is never
+held in memory at once.
+"""
+
+from typing import Any, Collection, Iterable, Iterator, Optional
+
+from config.global_settings import STREAMING_CHUNK_SIZE
+from utils.fast_json import dumps
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+JSON_MEDIA_TYPE = "application/json"
+SSE_MEDIA_TYPE = "text/event-stream"
+
+
+def iter_ndjson(data: Any, expand: Collection[str] = ()) -> Iterator[str]:
+    """
+    Serializes a result as one JSON line per entry.
+
+    A dict yields one {key: value} line per key, a list one line per item.
+
+    Args:
+      data: The result to serialize.
+      expand (Collection[str], optional): Dict keys whose value is streamed entry by entry instead of as one line.
+
+    Yields:
+      str: JSON lines, each ending with a newline.
+    """
+    if isinstance(data, dict):
+        for key, value in data.items():
+            if key in expand and isinstance(value, (dict, list)):
+                yield from iter_ndjson(value, expand)
+            else:
+                yield _dumps({key: value}) + "\n"
+    elif isinstance(data, list):
+        for item in data:
+            yield _dumps(item) + "\n"
+    else:
+        yield _dumps(data) + "\n"
+
+
+def iter_json(data: Any, depth: int = 1) -> Iterator[str]:
+    """
+    Serializes a result as a single JSON document, piece by piece.
+
+    Args:
+      data: The result to serialize.
+      depth (int, optional): Container levels streamed entry by entry. Deeper values are serialized whole. Defaults to 1.
+
+    Yields:
+      str: Consecutive pieces of the JSON document.
+    """
+    if depth <= 0 or not isinstance(data, (dict, list)):
+        yield _dumps(data)
+    elif isinstance(data, dict):
+        yield "{"
+        for index, (key, value) in enumerate(data.items()):
+            yield ("," if index else "") + _dumps(str(key)) + ":"
+            yield from iter_json(value, depth - 1)
+        yield "}"
+    else:
+        yield "["
+        for index, item in enumerate(data):
+            if index:
+                yield ","
+            yield from iter_json(item, depth - 1)
+        yield "]"
+
+
+def chunked(pieces: Iterable[str], size: int = STREAMING_CHUNK_SIZE) -> Iterator[str]:
+    """
+    Groups small serialized pieces into chunks of about size characters.
+    """
+    buffer = []
+    buffered = 0
+    for piece in pieces:
+        buffer.append(piece)
+        buffered += len(piece)
+        if buffered >= size:
+            yield "".join(buffer)
+            buffer = []
+            buffered = 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def sse_event(data: Any, event: Optional[str] = None, event_id: Any = None) -> str:
+    """
+    Formats a Server-Sent Events message with a JSON payload.
+    """
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event is not None:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {_dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def _dumps(value: Any) -> str:
+    return dumps(value).decode("utf-8")
@@ -1,5 +1,15 @@
+import re
 import json
 import inspect
+from functools import lru_cache
+from collections.abc import KeysView, ValuesView
+
+# Full and abbreviated IOS interface names, e.g. GigabitEthernet1/0/1, Gi1 or Vlan10.
+INTERFACE_PATTERN = re.compile(
+    r"\b(?:[A-Za-z]*(?:Ethernet|GigE)|Loopback|Tunnel|Vlan|Port-channel|Serial|BDI"
+    r"|Dialer|Virtual-Access|Virtual-Template|Null"
+    r"|Gi|Te|Fo|Hu|Fa|Et|Lo|Tu|Vl|Po|Se)\d+(?:/\d+)*(?:\.\d+)?\b"
+)
 
 
 def output_to_json(data: str) -> str:
@@ -9,6 +19,17 @@ def output_to_json(data: str) -> str:
     return json.dumps(data)
 
 
+def json_default(obj):
+    """
+    Converts objects the json module can't serialize, such as dict views, sets and exceptions.
+    """
+    if isinstance(obj, (KeysView, ValuesView, set, frozenset)):
+        return list(obj)
+    if isinstance(obj, BaseException):
+        return f"{type(obj).__name__}: {obj}"
+    return str(obj)
+
+
 def remove_white_spaces(string: str) -> str:
     """
     Removes extra white spaces from a string.
@@ -24,6 +45,7 @@ def load_json_file(json_file: str) -> dict:
         return json.load(f)
 
 
+@lru_cache(maxsize=None)
 def get_docstring_summary_and_description(func):
     """
     Extracts the summary and description from a function's docstring.
@@ -42,3 +64,17 @@ def get_docstring_summary_and_description(func):
     summary = lines[0]
     description = "\n".join(lines[1:]).strip()
     return summary, description
+
+
+def route_docs(func) -> dict:
+    """
+    Returns the summary and description of a route, read once from a function's docstring.
+
+    Args:
+        func (function): The function whose docstring documents the route.
+
+    Returns:
+        dict: The summary and description arguments of the route decorator.
+    """
+    summary, description = get_docstring_summary_and_description(func)
+    return {"summary": summary, "description": description}